@@ -0,0 +1,165 @@
+"""
+عدادات لوحة التحكم: صف لكل (كيان، مفتاح) مثل ('propertyrequest', 'status:pending').
+تُحدّث بالفرق عند كل حفظ أو حذف أو انتقال جماعي، فتصبح قراءة اللوحة استعلاماً واحداً.
+لإضافة إحصائية جديدة يكفي إضافة Dimension إلى الكيان ثم تشغيل reconcile_counters.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from properties.models import Property, PropertyRequest, RentalRequest
+
+from .models import DashboardCounter
+
+TOTAL = 'total'
+# يكتبه reconcile وحده: عدادات الكيان بُنيت من الجدول، والتحديثات بالفرق فوقها صحيحة.
+# لا يكفي وجود صف total لأن أول تحديث بالفرق بعد تفريغ الجدول يُنشئه بقيمة جزئية.
+READY = 'ready'
+
+
+class Dimension:
+    """بُعد للعد: اسمه والحقل المأخوذة منه قيمته"""
+
+    def __init__(self, name, field, by_day=False):
+        self.name = name
+        self.field = field
+        # حقول التاريخ والوقت تُعد حسب اليوم المحلي
+        self.by_day = by_day
+
+    def key(self, values):
+        value = values[self.field]
+        if self.by_day:
+            value = timezone.localdate(value) if value else None
+        return f'{self.name}:{value}'
+
+    def condition(self, value):
+        lookup = f'{self.field}__date' if self.by_day else self.field
+        return Q(**{lookup: value})
+
+    def grouped(self, queryset):
+        """(القيمة، العدد) لكل قيمة بتجميع واحد في قاعدة البيانات"""
+        column = TruncDate(self.field) if self.by_day else F(self.field)
+        return queryset.annotate(_value=column).values_list('_value').annotate(_count=Count('pk')).order_by()
+
+
+class Entity:
+    def __init__(self, name, model, dimensions):
+        self.name = name
+        self.model = model
+        self.dimensions = dimensions
+        self.fields = tuple(dict.fromkeys(dimension.field for dimension in dimensions))
+
+    def keys(self, values):
+        if values is None:
+            return []
+        return [TOTAL, *[dimension.key(values) for dimension in self.dimensions]]
+
+    def condition(self, key):
+        """شرط التصفية المقابل لمفتاح، لحساب العداد مباشرة من الجدول"""
+        if key == TOTAL:
+            return Q()
+        name, value = key.split(':', 1)
+        dimension = next(dimension for dimension in self.dimensions if dimension.name == name)
+        return dimension.condition(value)
+
+
+ENTITIES = {
+    entity.name: entity for entity in (
+        Entity('property', Property, (
+            Dimension('approved', 'is_approved'),
+            Dimension('status', 'status'),
+            Dimension('type', 'property_type'),
+            Dimension('city', 'city'),
+        )),
+        Entity('propertyrequest', PropertyRequest, (
+            Dimension('status', 'status'),
+            Dimension('city', 'city'),
+            Dimension('day', 'created_at', by_day=True),
+        )),
+        Entity('rentalrequest', RentalRequest, (
+            Dimension('status', 'status'),
+            Dimension('day', 'created_at', by_day=True),
+        )),
+    )
+}
+ENTITY_BY_MODEL = {entity.model: entity for entity in ENTITIES.values()}
+
+
+def update(entity, old_values, new_values):
+    """تطبيق الفرق بين حالتين لمجموعة سجلات (None لسجل غير موجود)"""
+    changes = Counter()
+    for values, sign in ((old_values, -1), (new_values, 1)):
+        for item in values:
+            for key in entity.keys(item):
+                changes[key] += sign
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+
+    with transaction.atomic():
+        DashboardCounter.objects.bulk_create(
+            [DashboardCounter(entity=entity.name, key=key) for key, delta in changes.items() if delta > 0],
+            ignore_conflicts=True,
+        )
+        for key, delta in changes.items():
+            DashboardCounter.objects.filter(entity=entity.name, key=key).update(count=F('count') + delta)
+
+
+def compute(entity, model=None):
+    """حساب كل عدادات الكيان من جدوله: استعلام تجميع لكل بُعد"""
+    queryset = (model or entity.model)._default_manager.all()
+    counts = {TOTAL: queryset.count()}
+    for dimension in entity.dimensions:
+        for value, count in dimension.grouped(queryset):
+            counts[f'{dimension.name}:{value}'] = count
+    return counts
+
+
+def reconcile(counter_model=DashboardCounter, models=None):
+    """
+    إعادة حساب العدادات من الجداول. models تسمح بتمرير نماذج الترحيلات.
+    يُرجع عدد المفاتيح التي اختلفت قيمتها.
+    """
+    drift = 0
+    with transaction.atomic():
+        for entity in ENTITIES.values():
+            counts = {**compute(entity, model=(models or {}).get(entity.name)), READY: 1}
+            stored = dict(counter_model.objects.filter(entity=entity.name).values_list('key', 'count'))
+            drift += sum(1 for key in stored.keys() | counts.keys() if stored.get(key, 0) != counts.get(key, 0))
+            counter_model.objects.filter(entity=entity.name).delete()
+            counter_model.objects.bulk_create(
+                [counter_model(entity=entity.name, key=key, count=count) for key, count in counts.items()],
+                batch_size=500,
+            )
+    return drift
+
+
+def get_counts(wanted):
+    """
+    قراءة عدادات متعددة باستعلام واحد. wanted قاموس {الاسم: (الكيان، المفتاح)}.
+    إذا لم تُهيأ عدادات كيان بعد (لا يوجد صف ready) تُحسب قيمه باستعلام تجميع شرطي واحد.
+    """
+    condition = Q(pk__in=[])
+    for entity_name in {entity_name for entity_name, _ in wanted.values()}:
+        keys = {key for name, key in wanted.values() if name == entity_name}
+        condition |= Q(entity=entity_name, key__in=[READY, *keys])
+    stored = {(row.entity, row.key): row.count for row in DashboardCounter.objects.filter(condition)}
+
+    counts = {}
+    for entity_name in {entity_name for entity_name, _ in wanted.values()}:
+        names = {name: key for name, (other, key) in wanted.items() if other == entity_name}
+        if (entity_name, READY) in stored:
+            counts.update({name: stored.get((entity_name, key), 0) for name, key in names.items()})
+        else:
+            counts.update(aggregate(ENTITIES[entity_name], names))
+    return counts
+
+
+def aggregate(entity, names):
+    """حساب عدة عدادات لكيان مباشرة من جدوله باستعلام تجميع شرطي واحد"""
+    return entity.model._default_manager.aggregate(**{
+        name: Count('pk', filter=entity.condition(key)) for name, key in names.items()
+    })
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from admin_panel import counters
+
+
+class Command(BaseCommand):
+    help = 'إعادة حساب عدادات لوحة التحكم من الجداول وتصحيح أي انحراف'
+
+    def handle(self, *args, **options):
+        drift = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'تمت المطابقة، وصُحّح {drift} عداد'))
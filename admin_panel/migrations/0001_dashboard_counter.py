@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:37
+
+from django.db import migrations, models
+
+
+def build_counters(apps, schema_editor):
+    from admin_panel import counters
+
+    counters.reconcile(
+        apps.get_model('admin_panel', 'DashboardCounter'),
+        models={entity: apps.get_model('properties', entity) for entity in counters.ENTITIES},
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('properties', '0007_propertyrequest_property'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=200)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'عداد لوحة التحكم',
+                'verbose_name_plural': 'عدادات لوحة التحكم',
+                'constraints': [models.UniqueConstraint(fields=('entity', 'key'), name='unique_dashboard_counter')],
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
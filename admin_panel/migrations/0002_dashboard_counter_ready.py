@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def rebuild_counters(apps, schema_editor):
+    # العدادات المبنية قبل صف ready تُعاد من الجداول حتى تُقرأ بدل التجميع
+    from admin_panel import counters
+
+    counters.reconcile(
+        apps.get_model('admin_panel', 'DashboardCounter'),
+        models={entity: apps.get_model('properties', entity) for entity in counters.ENTITIES},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0001_dashboard_counter'),
+        ('properties', '0012_rentalrequest_duration_bounds'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_counters, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,18 @@
 from django.db import models
 
-# Create your models here.
+
+class DashboardCounter(models.Model):
+    """عداد مجمّع لكل كيان (الإجمالي وحسب الحالة والمدينة...)، يُحدّث مع كل تغيير"""
+    entity = models.CharField(max_length=50)
+    key = models.CharField(max_length=200)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.entity} {self.key}: {self.count}"
+
+    class Meta:
+        verbose_name = "عداد لوحة التحكم"
+        verbose_name_plural = "عدادات لوحة التحكم"
+        constraints = [
+            models.UniqueConstraint(fields=['entity', 'key'], name='unique_dashboard_counter'),
+        ]
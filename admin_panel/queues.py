@@ -0,0 +1,77 @@
+import datetime
+
+from django.utils import timezone
+
+from properties.availability import mark_conflicts
+from properties.models import PropertyRequest, RentalRequest
+from properties.pagination import CursorPaginator
+from properties.utils import parse_date_param
+
+QUEUE_PAGE_SIZE = 50
+QUEUE_ORDERING = ('-created_at', '-id')
+# الطابور يعرض المعلقة ما لم تُطلب حالة أخرى، فيبقى على فهرس (status, created_at)
+DEFAULT_STATUS = 'pending'
+ALL_STATUSES = 'all'
+DATE_FILTERS = ('created_from', 'created_to')
+
+# حقل المدينة لكل نوع من الطلبات
+CITY_FIELDS = {
+    'propertyrequest': 'city',
+    'rentalrequest': 'property__city',
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def filter_requests(queryset, params):
+    """تصفية طابور الطلبات حسب الحالة (المعلقة افتراضياً، all للكل) والمدينة وتاريخ الإنشاء"""
+    status = params.get('status', DEFAULT_STATUS)
+    if status and status != ALL_STATUSES:
+        queryset = queryset.filter(status=status)
+    city = (params.get('city') or '').strip()
+    if city:
+        queryset = queryset.filter(**{CITY_FIELDS[queryset.model._meta.model_name]: city})
+    # حدود زمنية بدلاً من __date حتى يبقى الفهرس على created_at صالحاً؛ التاريخ غير الصالح يُهمل
+    created_from = parse_date_param(params.get('created_from'))
+    if created_from:
+        queryset = queryset.filter(created_at__gte=_day_start(created_from))
+    created_to = parse_date_param(params.get('created_to'))
+    if created_to:
+        queryset = queryset.filter(created_at__lt=_day_start(created_to + datetime.timedelta(days=1)))
+    return queryset
+
+
+def invalid_date_filters(params):
+    """فلاتر التاريخ المرسلة بقيمة غير صالحة؛ الطابور يهملها، والإجراء الجماعي يرفضها حتى لا يتسع نطاقه"""
+    return [name for name in DATE_FILTERS if params.get(name) and parse_date_param(params[name]) is None]
+
+
+def selected_ids(params):
+    """المعرّفات المحددة صراحة (قائمة فارغة إذا لم يُحدد شيء)؛ ValueError إذا كان أحدها غير صالح"""
+    values = params.getlist('ids')
+    if not all(value.isdigit() for value in values):
+        raise ValueError('معرّف غير صالح')
+    return [int(value) for value in values]
+
+
+def property_request_queue(params):
+    return filter_requests(PropertyRequest.objects.select_related('owner', 'property'), params)
+
+
+def rental_request_queue(params):
+    rentals = RentalRequest.objects.select_related('client', 'property', 'property__owner')
+    return filter_requests(rentals, params)
+
+
+def queue_page(queryset, params):
+    """صفحة من الطابور بالترقيم بالمؤشر، فلا تتأثر تكلفتها بحجم الطابور"""
+    return CursorPaginator(queryset, QUEUE_PAGE_SIZE, ordering=QUEUE_ORDERING).get_page(params.get('cursor'))
+
+
+def rental_request_page(params):
+    """صفحة طلبات الإيجار مع التعارض محسوباً لصفوفها فقط"""
+    page = queue_page(rental_request_queue(params), params)
+    mark_conflicts(page.object_list)
+    return page
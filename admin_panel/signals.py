@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from properties.signals import bulk_created, status_changed
+
+from . import counters
+
+
+def current_values(entity, instance):
+    return {field: getattr(instance, field) for field in entity.fields}
+
+
+def counter_saving(sender, instance, **kwargs):
+    entity = counters.ENTITY_BY_MODEL[sender]
+    instance._stored_counter_values = instance.stored_values(entity.fields)
+
+
+def counter_saved(sender, instance, **kwargs):
+    entity = counters.ENTITY_BY_MODEL[sender]
+    counters.update(entity, [instance._stored_counter_values], [current_values(entity, instance)])
+
+
+def counter_deleted(sender, instance, **kwargs):
+    entity = counters.ENTITY_BY_MODEL[sender]
+    counters.update(entity, [instance.stored_values(entity.fields) or current_values(entity, instance)], [])
+
+
+def counter_bulk_created(sender, objects, **kwargs):
+    entity = counters.ENTITY_BY_MODEL[sender]
+    counters.update(entity, [None] * len(objects), [current_values(entity, obj) for obj in objects])
+
+
+def counter_status_changed(sender, changes, status, **kwargs):
+    entity = counters.ENTITY_BY_MODEL[sender]
+    rows = list(sender._default_manager.filter(pk__in=list(changes)).values('pk', *entity.fields))
+    counters.update(entity, [{**row, 'status': changes[row['pk']]} for row in rows], rows)
+
+
+for model in counters.ENTITY_BY_MODEL:
+    pre_save.connect(counter_saving, sender=model)
+    post_save.connect(counter_saved, sender=model)
+    post_delete.connect(counter_deleted, sender=model)
+    bulk_created.connect(counter_bulk_created, sender=model)
+    status_changed.connect(counter_status_changed, sender=model)
@@ -1,3 +1,368 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import metrics
+from properties import services, transitions
+from properties.models import Property, PropertyFacet, PropertyRequest, RentalRequest, RequestTransition
+from users.models import User
+
+from . import counters
+from .models import DashboardCounter
+from .queues import QUEUE_PAGE_SIZE, property_request_queue, queue_page, rental_request_page
+
+
+def create_requests(owner, count, **kwargs):
+    return PropertyRequest.objects.bulk_create([
+        PropertyRequest(
+            owner=owner, title=f'عقار {index}', description='وصف', property_type='apartment',
+            address='شارع', area=100, price=3000, **{'city': 'الرياض', **kwargs},
+        )
+        for index in range(count)
+    ])
+
+
+class BulkTransitionTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        User.objects.create_user('staff', password='password123', is_staff=True)
+        self.client.login(username='staff', password='password123')
+
+    def test_bulk_approve_by_filter(self):
+        riyadh = create_requests(self.owner, 300)
+        create_requests(self.owner, 5, city='جدة')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('admin_panel:bulk_property_requests'), {'action': 'approve', 'scope': 'filter', 'city': 'الرياض'},
+            )
+        # إدخالات وتحديثات جماعية، وليس استعلاماً لكل طلب
+        self.assertLess(len(queries), 60)
+        self.assertGreater(len(queries), 5)
+        data = response.json()
+        self.assertEqual(data['summary'], {'approved': 300})
+        self.assertEqual(Property.objects.filter(city='الرياض', is_approved=True).count(), 300)
+        self.assertEqual(
+            set(PropertyRequest.objects.filter(pk__in=[r.pk for r in riyadh]).values_list('status', flat=True)),
+            {'approved'},
+        )
+        self.assertEqual(PropertyFacet.objects.get(dimension='city', value='الرياض').count, 300)
+        self.assertEqual(PropertyRequest.objects.filter(city='جدة', status='pending').count(), 5)
+
+    def test_per_item_outcomes_for_selection(self):
+        pending, rejected = create_requests(self.owner, 2)
+        rejected.status = 'rejected'
+        rejected.save()
+        response = self.client.post(
+            reverse('admin_panel:bulk_property_requests'),
+            {'action': 'reject', 'ids': [pending.pk, rejected.pk, 999999]},
+        )
+        outcomes = {item['id']: item['outcome'] for item in response.json()['results']}
+        self.assertEqual(outcomes, {pending.pk: 'rejected', rejected.pk: 'unchanged', 999999: 'not_found'})
+
+    def test_bulk_rental_reject(self):
+        property_obj = Property.objects.create(
+            owner=self.owner, title='شقة', description='وصف', property_type='apartment',
+            address='شارع', city='الرياض', area=100, price=3000, is_approved=True,
+        )
+        client = User.objects.create_user('client', password='password123', user_type='client')
+        RentalRequest.objects.bulk_create([
+            RentalRequest(client=client, property=property_obj, message='-', preferred_start_date='2026-01-01', duration_months=12)
+            for _ in range(3)
+        ])
+        response = self.client.post(reverse('admin_panel:bulk_rental_requests'), {'action': 'reject', 'scope': 'filter'})
+        self.assertEqual(response.json()['summary'], {'rejected': 3})
+        self.assertFalse(RentalRequest.objects.filter(status='pending').exists())
+
+    def test_invalid_or_missing_selection_changes_nothing(self):
+        create_requests(self.owner, 3)
+        url = reverse('admin_panel:bulk_property_requests')
+        self.assertEqual(self.client.post(url, {'action': 'approve', 'ids': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'action': 'approve'}).status_code, 400)
+        self.assertEqual(PropertyRequest.objects.filter(status='pending').count(), 3)
+
+    def test_impossible_date_rejects_filter_scope(self):
+        create_requests(self.owner, 3)
+        response = self.client.post(
+            reverse('admin_panel:bulk_property_requests'),
+            {'action': 'approve', 'scope': 'filter', 'created_from': '2026-02-30'},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(PropertyRequest.objects.filter(status='pending').count(), 3)
+
+    def test_requires_post(self):
+        response = self.client.get(reverse('admin_panel:bulk_property_requests'))
+        self.assertEqual(response.status_code, 405)
+
+
+class DashboardCounterTests(TestCase):
+    wanted = {
+        'pending': ('propertyrequest', 'status:pending'),
+        'rejected': ('propertyrequest', 'status:rejected'),
+        'properties': ('property', 'approved:True'),
+        'rentals': ('rentalrequest', 'total'),
+    }
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+
+    def assertNoDrift(self):
+        self.assertEqual(counters.reconcile(), 0)
+
+    def test_counters_follow_saves_and_bulk_transitions(self):
+        first, second, third = create_requests(self.owner, 3)
+        counters.reconcile()
+        created = PropertyRequest.objects.create(
+            owner=self.owner, title='جديد', description='وصف', property_type='villa',
+            address='شارع', city='جدة', area=300, price=9000,
+        )
+        services.approve_property_requests(ids=[first.pk, created.pk])
+        services.reject_property_requests(ids=[second.pk])
+        third.status = 'rejected'
+        third.save()
+        Property.objects.filter(source_request=first).get().delete()
+        self.assertEqual(
+            counters.get_counts(self.wanted), {'pending': 0, 'rejected': 2, 'properties': 1, 'rentals': 0},
+        )
+        self.assertNoDrift()
+
+    def test_reads_are_one_query(self):
+        create_requests(self.owner, 3)
+        counters.reconcile()
+        with self.assertNumQueries(1):
+            counts = counters.get_counts(self.wanted)
+        self.assertEqual(counts['pending'], 3)
+
+    def test_falls_back_to_conditional_aggregate(self):
+        create_requests(self.owner, 3)
+        DashboardCounter.objects.all().delete()
+        with self.assertNumQueries(4):
+            counts = counters.get_counts(self.wanted)
+        self.assertEqual(counts, {'pending': 3, 'rejected': 0, 'properties': 0, 'rentals': 0})
+
+    def test_incremental_update_does_not_mark_counters_built(self):
+        create_requests(self.owner, 3)
+        DashboardCounter.objects.all().delete()
+        PropertyRequest.objects.create(
+            owner=self.owner, title='جديد', description='وصف', property_type='villa',
+            address='شارع', city='جدة', area=300, price=9000,
+        )
+        self.assertTrue(DashboardCounter.objects.filter(entity='propertyrequest', key='total').exists())
+        self.assertEqual(counters.get_counts(self.wanted)['pending'], 4)
+        counters.reconcile()
+        with self.assertNumQueries(1):
+            self.assertEqual(counters.get_counts(self.wanted)['pending'], 4)
+
+
+class RequestQueueTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        create_requests(self.owner, 60)
+        create_requests(self.owner, 5, city='جدة', status='rejected')
+
+    def test_page_is_one_query_with_related_rows(self):
+        with self.assertNumQueries(1):
+            page = queue_page(property_request_queue(QueryDict('status=pending')), QueryDict())
+            owners = {item.owner.username for item in page}
+        self.assertEqual(owners, {'owner'})
+        self.assertEqual(len(page), QUEUE_PAGE_SIZE)
+        self.assertTrue(page.has_next())
+
+        next_page = queue_page(property_request_queue(QueryDict('status=pending')), {'cursor': page.next_cursor})
+        self.assertEqual(len(next_page), 10)
+        self.assertFalse(next_page.has_next())
+
+    def test_filters(self):
+        queue = property_request_queue(QueryDict('status=rejected&city=جدة'))
+        self.assertEqual(queue.count(), 5)
+        self.assertEqual(property_request_queue(QueryDict('created_from=2000-01-01&created_to=2000-01-02')).count(), 0)
+        today = timezone.localdate().isoformat()
+        queue = property_request_queue(QueryDict(f'status=all&created_from={today}&created_to={today}'))
+        self.assertEqual(queue.count(), 65)
+        # حدود زمنية على العمود نفسه، لا دالة تاريخ تمنع استخدام الفهرس
+        self.assertNotIn('django_datetime_cast_date', str(queue.query))
+
+    def test_impossible_date_is_ignored(self):
+        self.assertEqual(property_request_queue(QueryDict('created_from=2026-02-30&created_to=2026-13-01')).count(), 60)
+        User.objects.create_user('staff', password='password123', is_staff=True)
+        self.client.login(username='staff', password='password123')
+        for name in ('property_requests', 'rental_requests'):
+            response = self.client.get(reverse(f'admin_panel:{name}'), {'created_from': '2026-02-30'})
+            self.assertEqual(response.status_code, 200, name)
+
+    def test_default_queue_is_pending(self):
+        queue = property_request_queue(QueryDict())
+        self.assertEqual(queue.count(), 60)
+        plan = queue.order_by('-created_at', '-id')[:QUEUE_PAGE_SIZE].explain()
+        self.assertIn('propertyrequest_queue_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_status_queue_uses_index(self):
+        queue = property_request_queue(QueryDict('status=pending')).order_by('-created_at', '-id')[:QUEUE_PAGE_SIZE]
+        plan = queue.explain()
+        self.assertIn('propertyrequest_queue_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_staff_pages_render(self):
+        User.objects.create_user('staff', password='password123', is_staff=True)
+        self.client.login(username='staff', password='password123')
+        for name in ('dashboard', 'property_requests', 'rental_requests'):
+            response = self.client.get(reverse(f'admin_panel:{name}'), {'status': 'all'})
+            self.assertEqual(response.status_code, 200, name)
+        response = self.client.get(reverse('admin_panel:property_requests'))
+        self.assertEqual(len(response.context['requests']), QUEUE_PAGE_SIZE)
+
+    def test_queue_templates_render_pages(self):
+        User.objects.create_user('staff', password='password123', is_staff=True)
+        self.client.login(username='staff', password='password123')
+        url = reverse('admin_panel:property_requests')
+        response = self.client.get(url, {'city': 'الرياض'})
+        self.assertContains(response, 'عقار 59')
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertContains(response, f'cursor={next_cursor}')
+        response = self.client.get(url, {'city': 'الرياض', 'cursor': next_cursor})
+        self.assertEqual(len(response.context['requests']), 10)
+        self.assertContains(response, 'الأحدث')
+        self.assertContains(self.client.get(url, {'status': 'approved'}), 'لا توجد طلبات مطابقة')
+
+        property_obj = Property.objects.create(
+            owner=self.owner, title='شقة الإيجار', description='وصف', property_type='apartment',
+            address='شارع', city='الرياض', area=100, price=3000, is_approved=True,
+        )
+        client = User.objects.create_user('client', password='password123', user_type='client')
+        for status in ('approved', 'pending'):
+            RentalRequest.objects.create(
+                client=client, property=property_obj, message='-', preferred_start_date=datetime.date(2026, 1, 1),
+                duration_months=6, status=status,
+            )
+        response = self.client.get(reverse('admin_panel:rental_requests'))
+        self.assertContains(response, 'شقة الإيجار')
+        self.assertContains(response, 'متعارض')
+        self.assertContains(self.client.get(reverse('admin_panel:dashboard')), reverse('admin_panel:property_requests'))
+
+    def test_rental_conflicts_only_for_page(self):
+        property_obj = Property.objects.create(
+            owner=self.owner, title='شقة', description='وصف', property_type='apartment',
+            address='شارع', city='الرياض', area=100, price=3000, is_approved=True,
+        )
+        client = User.objects.create_user('client', password='password123', user_type='client')
+        RentalRequest.objects.create(
+            client=client, property=property_obj, message='-', preferred_start_date=datetime.date(2026, 1, 1),
+            duration_months=6, status='approved',
+        )
+        overlapping, free = [
+            RentalRequest.objects.create(
+                client=client, property=property_obj, message='-', preferred_start_date=start, duration_months=1,
+            )
+            for start in (datetime.date(2026, 3, 1), datetime.date(2026, 8, 1))
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            page = rental_request_page(QueryDict())
+        self.assertEqual(len(queries), 2)
+        # استعلام الصفحة نفسه بلا الاستعلام الفرعي للتعارض
+        self.assertEqual(queries[0]['sql'].count('SELECT'), 1)
+        self.assertEqual({rental.pk: rental.has_conflict for rental in page}, {overlapping.pk: True, free.pk: False})
+
+
+class TransitionLogTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        self.staff = User.objects.create_superuser('staff', password='password123')
+        self.client.login(username='staff', password='password123')
+
+    def test_bulk_transitions_logged_in_one_insert(self):
+        create_requests(self.owner, 5)
+        create_requests(self.owner, 2, city='جدة')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('admin_panel:bulk_property_requests'), {'action': 'reject', 'scope': 'filter'})
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "properties_requesttransition"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(RequestTransition.objects.values_list('actor__username', 'from_status', 'to_status')),
+            {('staff', 'pending', 'rejected')},
+        )
+
+        response = self.client.get(reverse('admin_panel:decision_stats'), {'group_by': 'city'})
+        rows = {row['city']: row for row in response.json()['results']}
+        self.assertEqual(rows['الرياض']['decisions'], 5)
+        self.assertEqual(rows['جدة']['approved'], 0)
+        self.assertGreaterEqual(rows['جدة']['avg_latency'], 0)
+
+    def test_decision_stats_days(self):
+        create_requests(self.owner, 2)
+        self.client.post(reverse('admin_panel:bulk_property_requests'), {'action': 'reject', 'scope': 'filter'})
+        url = reverse('admin_panel:decision_stats')
+        for days in ('30', '9' * 30, 'abc', '-5', ''):
+            response = self.client.get(url, {'days': days})
+            self.assertEqual(response.status_code, 200, days)
+            self.assertEqual(response.json()['results'][0]['decisions'], 2, days)
+
+    def test_admin_change_form_records_actor(self):
+        property_obj = Property.objects.create(
+            owner=self.owner, title='شقة', description='وصف', property_type='apartment',
+            address='شارع', city='الدمام', area=100, price=3000, is_approved=True,
+        )
+        rental = RentalRequest.objects.create(
+            client=self.owner, property=property_obj, message='-', preferred_start_date=datetime.date(2026, 1, 1), duration_months=3,
+        )
+        self.client.post(reverse('admin:properties_rentalrequest_change', args=[rental.pk]), {
+            'client': self.owner.pk, 'property': property_obj.pk, 'message': '-',
+            'preferred_start_date': '2026-01-01', 'duration_months': 3, 'status': 'approved', 'admin_notes': '',
+        })
+        transition = RequestTransition.objects.get()
+        self.assertEqual(
+            (transition.request_type, transition.actor, transition.city, transition.to_status),
+            ('rental', self.staff, 'الدمام', 'approved'),
+        )
+        stats = transitions.decision_stats('actor')
+        self.assertEqual([(row['actor__username'], row['decisions']) for row in stats], [('staff', 1)])
+
+    def test_log_is_append_only(self):
+        request = create_requests(self.owner, 1)[0]
+        request.status = 'rejected'
+        request.save()
+        transition = RequestTransition.objects.get()
+        self.assertIsNone(transition.actor)
+        with self.assertRaises(ValueError):
+            transition.save()
+        with self.assertRaises(ValueError):
+            transition.delete()
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.staff = User.objects.create_user('staff', password='password123', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def test_endpoint_reports_requests_queries_and_templates(self):
+        cache.clear()
+        self.client.get(reverse('properties:home'))
+        self.client.get(reverse('properties:home'))
+        body = self.client.get(reverse('admin_panel:metrics')).content.decode()
+        self.assertIn('http_requests_total{view="properties:home",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{view="properties:home"} 2', body)
+        self.assertIn('db_queries_per_request_bucket{view="properties:home",le="+Inf"} 2', body)
+        template_seconds = float(body.split('template_render_duration_seconds_total{view="properties:home"} ')[1].split()[0])
+        self.assertGreater(template_seconds, 0)
+
+    def test_endpoint_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('admin_panel:metrics')).status_code, 302)
+
+    def test_repeated_statements_are_counted_and_logged(self):
+        def view(request):
+            for username in ('a', 'b', 'c'):
+                User.objects.filter(username=username).exists()
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        with self.settings(METRICS_DUPLICATE_QUERY_WARNING=3), self.assertLogs('core.metrics', 'WARNING'):
+            metrics.MetricsMiddleware(view)(request)
+        self.assertIn('db_duplicate_queries_total{view="<unresolved>"} 2', metrics.render_prometheus())
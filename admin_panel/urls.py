@@ -7,6 +7,11 @@ urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('property-requests/', views.property_requests, name='property_requests'),
     path('rental-requests/', views.rental_requests, name='rental_requests'),
+    path('property-requests/bulk/', views.bulk_property_requests, name='bulk_property_requests'),
+    path('rental-requests/bulk/', views.bulk_rental_requests, name='bulk_rental_requests'),
+    path('decision-stats/', views.decision_stats, name='decision_stats'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
+    path('metrics/', views.metrics_endpoint, name='metrics'),
     path('approve-property/<int:request_id>/', views.approve_property_request, name='approve_property_request'),
     path('reject-property/<int:request_id>/', views.reject_property_request, name='reject_property_request'),
     path('approve-rental/<int:request_id>/', views.approve_rental_request, name='approve_rental_request'),
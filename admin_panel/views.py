@@ -1,37 +1,65 @@
+import datetime
+from collections import Counter
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from properties.models import Property, PropertyRequest, RentalRequest, PropertyImage
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+from properties.models import PropertyRequest, RentalRequest
+from core import cache as tiered_cache
+from core import metrics
+from properties import services, transitions
+from . import counters
+from .queues import filter_requests, invalid_date_filters, property_request_queue, queue_page, rental_request_page, selected_ids
+
+# الإجراءات الجماعية المتاحة لكل طابور
+PROPERTY_REQUEST_ACTIONS = {
+    'approve': services.approve_property_requests,
+    'reject': services.reject_property_requests,
+}
+RENTAL_REQUEST_ACTIONS = {
+    'approve': services.approve_rental_requests,
+    'reject': services.reject_rental_requests,
+}
+# أطول فترة لإحصاءات القرارات؛ القيم الأكبر تُقلّص إليها بدل تجاوز حدود timedelta
+MAX_STATS_DAYS = 3650
 
 @staff_member_required
 def dashboard(request):
     """لوحة التحكم الرئيسية"""
-    pending_property_requests = PropertyRequest.objects.filter(status='pending').count()
-    pending_rental_requests = RentalRequest.objects.filter(status='pending').count()
-    total_properties = Property.objects.filter(is_approved=True).count()
-
-    context = {
-        'pending_property_requests': pending_property_requests,
-        'pending_rental_requests': pending_rental_requests,
-        'total_properties': total_properties,
-    }
+    today = timezone.localdate()
+    context = counters.get_counts({
+        'pending_property_requests': ('propertyrequest', 'status:pending'),
+        'pending_rental_requests': ('rentalrequest', 'status:pending'),
+        'total_properties': ('property', 'approved:True'),
+        'property_requests_today': ('propertyrequest', f'day:{today}'),
+        'rental_requests_today': ('rentalrequest', f'day:{today}'),
+    })
     return render(request, 'admin_panel/dashboard.html', context)
 
 @staff_member_required
 def property_requests(request):
     """طلبات عرض العقارات"""
-    requests = PropertyRequest.objects.all().order_by('-created_at')
+    page_obj = queue_page(property_request_queue(request.GET), request.GET)
     context = {
-        'requests': requests,
+        'requests': page_obj,
+        'page_obj': page_obj,
+        'filters': request.GET,
+        'status_choices': PropertyRequest.STATUS_CHOICES,
     }
     return render(request, 'admin_panel/property_requests.html', context)
 
 @staff_member_required
 def rental_requests(request):
     """طلبات الإيجار"""
-    requests = RentalRequest.objects.all().order_by('-created_at')
+    page_obj = rental_request_page(request.GET)
     context = {
-        'requests': requests,
+        'requests': page_obj,
+        'page_obj': page_obj,
+        'filters': request.GET,
+        'status_choices': RentalRequest.STATUS_CHOICES,
     }
     return render(request, 'admin_panel/rental_requests.html', context)
 
@@ -40,33 +68,7 @@ def approve_property_request(request, request_id):
     """قبول طلب عرض عقار"""
     property_request = get_object_or_404(PropertyRequest, id=request_id)
 
-    if property_request.status == 'pending':
-        property_request.status = 'approved'
-        property_request.save()
-
-        # إنشاء العقار
-        property_obj = Property.objects.create(
-            owner=property_request.owner,
-            title=property_request.title,
-            description=property_request.description,
-            property_type=property_request.property_type,
-            address=property_request.address,
-            city=property_request.city,
-            area=property_request.area,
-            bedrooms=property_request.bedrooms,
-            bathrooms=property_request.bathrooms,
-            price=property_request.price,
-            is_approved=True
-        )
-
-        # نسخ الصور
-        for img in property_request.images.all():
-            PropertyImage.objects.create(
-                property=property_obj,
-                image=img.image,
-                is_main=img.is_main
-            )
-
+    if services.approve_property_requests(ids=[property_request.pk], actor=request.user)[property_request.pk] == 'approved':
         messages.success(request, 'تم قبول طلب العقار وإنشاء العقار بنجاح!')
 
     return redirect('admin_panel:property_requests')
@@ -76,9 +78,7 @@ def reject_property_request(request, request_id):
     """رفض طلب عرض عقار"""
     property_request = get_object_or_404(PropertyRequest, id=request_id)
 
-    if property_request.status == 'pending':
-        property_request.status = 'rejected'
-        property_request.save()
+    if services.reject_property_requests(ids=[property_request.pk], actor=request.user)[property_request.pk] == 'rejected':
         messages.success(request, 'تم رفض طلب العقار!')
 
     return redirect('admin_panel:property_requests')
@@ -88,9 +88,7 @@ def approve_rental_request(request, request_id):
     """قبول طلب إيجار"""
     rental_request = get_object_or_404(RentalRequest, id=request_id)
 
-    if rental_request.status == 'pending':
-        rental_request.status = 'approved'
-        rental_request.save()
+    if services.approve_rental_requests(ids=[rental_request.pk], actor=request.user)[rental_request.pk] == 'approved':
         messages.success(request, 'تم قبول طلب الإيجار!')
 
     return redirect('admin_panel:rental_requests')
@@ -100,9 +98,69 @@ def reject_rental_request(request, request_id):
     """رفض طلب إيجار"""
     rental_request = get_object_or_404(RentalRequest, id=request_id)
 
-    if rental_request.status == 'pending':
-        rental_request.status = 'rejected'
-        rental_request.save()
+    if services.reject_rental_requests(ids=[rental_request.pk], actor=request.user)[rental_request.pk] == 'rejected':
         messages.success(request, 'تم رفض طلب الإيجار!')
 
     return redirect('admin_panel:rental_requests')
+
+def _bulk_transition(request, queryset, actions):
+    action = actions.get(request.POST.get('action'))
+    if action is None:
+        return JsonResponse({'error': 'إجراء غير معروف'}, status=400)
+    try:
+        ids = selected_ids(request.POST)
+    except ValueError:
+        return JsonResponse({'error': 'معرّفات غير صالحة'}, status=400)
+    if not ids:
+        # التطبيق على كل نتيجة التصفية يجب أن يُطلب صراحة، لا أن يكون بديلاً عن تحديد فارغ
+        if request.POST.get('scope') != 'filter':
+            return JsonResponse({'error': 'لم يُحدد أي طلب'}, status=400)
+        if invalid_date_filters(request.POST):
+            return JsonResponse({'error': 'تاريخ غير صالح'}, status=400)
+        queryset, ids = filter_requests(queryset, request.POST), None
+    results = action(queryset, ids=ids, actor=request.user)
+    return JsonResponse({
+        'results': [{'id': pk, 'outcome': outcome} for pk, outcome in results.items()],
+        'summary': Counter(results.values()),
+    })
+
+@staff_member_required
+@require_POST
+def bulk_property_requests(request):
+    """قبول أو رفض مجموعة طلبات عرض (ids محددة، أو scope=filter لكل نتيجة الفلتر)"""
+    return _bulk_transition(request, PropertyRequest.objects.all(), PROPERTY_REQUEST_ACTIONS)
+
+@staff_member_required
+@require_POST
+def bulk_rental_requests(request):
+    """قبول أو رفض مجموعة طلبات إيجار (ids محددة، أو scope=filter لكل نتيجة الفلتر)"""
+    return _bulk_transition(request, RentalRequest.objects.all(), RENTAL_REQUEST_ACTIONS)
+
+@staff_member_required
+def decision_stats(request):
+    """زمن اتخاذ القرار في الطلبات حسب الموظف أو المدينة (?group_by=actor|city&days=30)"""
+    group_by = request.GET.get('group_by', 'actor')
+    if group_by not in ('actor', 'city'):
+        return JsonResponse({'error': 'group_by يجب أن يكون actor أو city'}, status=400)
+    since = None
+    try:
+        days = int(request.GET.get('days', ''))
+    except ValueError:
+        days = 0
+    if days > 0:
+        since = timezone.now() - datetime.timedelta(days=min(days, MAX_STATS_DAYS))
+    rows = transitions.decision_stats(group_by, since)
+    for row in rows:
+        row['avg_latency'] = row['avg_latency'].total_seconds()
+        row['max_latency'] = row['max_latency'].total_seconds()
+    return JsonResponse({'group_by': group_by, 'results': rows})
+
+@staff_member_required
+def cache_stats(request):
+    """إصابات وإخفاقات الذاكرة المؤقتة (L1/L2) في عملية الخادم الحالية"""
+    return JsonResponse(tiered_cache.stats())
+
+@staff_member_required
+def metrics_endpoint(request):
+    """قياسات الصفحات في عملية الخادم الحالية بصيغة Prometheus"""
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
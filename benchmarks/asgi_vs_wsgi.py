@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Compare the public pages served by the sync views under WSGI with the async
+views (properties/async_views.py) under ASGI.
+
+    python benchmarks/asgi_vs_wsgi.py --properties 2000 --concurrency 32 --requests 2000
+
+Each mode runs in its own process against the same freshly migrated SQLite
+file. Requests go straight into Django's WSGIHandler (from a thread pool, like
+a threaded WSGI server) or ASGIHandler (from asyncio tasks, like an ASGI
+server), so the numbers compare Django's two request paths and not a
+particular web server. The cache is disabled unless --cache is given.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from common import seed, setup_django, summarize
+
+
+def seed_database(db_path, count):
+    setup_django(db_path, cache=False)
+    from properties.models import Property
+
+    seed(count)
+    return list(Property.objects.filter(is_approved=True).values_list('pk', flat=True)[:50])
+
+
+def paths(property_ids, total):
+    routes = [
+        '/',
+        '/properties/',
+        '/properties/?type=villa&sort=price',
+        '/properties/?' + urlencode({'city': 'جدة', 'min_price': 3000}),
+    ] + [f'/property/{pk}/' for pk in property_ids[:10]]
+    return [routes[index % len(routes)] for index in range(total)]
+
+
+def run_wsgi(targets, concurrency):
+    from django.core.handlers.wsgi import WSGIHandler
+    from wsgiref.util import setup_testing_defaults
+
+    handler = WSGIHandler()
+
+    def call(target):
+        url = urlsplit(target)
+        environ = {'PATH_INFO': url.path, 'QUERY_STRING': url.query, 'HTTP_HOST': 'localhost'}
+        setup_testing_defaults(environ)
+        statuses = []
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        b''.join(response)
+        response.close()
+        return time.perf_counter() - started, statuses[0].startswith(('200', '304'))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, targets))
+    return results, time.perf_counter() - started
+
+
+def run_asgi(targets, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+
+    async def call(target):
+        url = urlsplit(target)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': url.path, 'raw_path': url.path.encode(), 'query_string': url.query.encode(),
+            'headers': [(b'host', b'localhost')], 'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+        }
+        messages = []
+        body = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            if body:
+                return body.pop()
+            await asyncio.Event().wait()  # the client never disconnects
+
+        async def send(message):
+            messages.append(message)
+
+        started = time.perf_counter()
+        await handler(scope, receive, send)
+        return time.perf_counter() - started, messages[0]['status'] in (200, 304)
+
+    async def main():
+        queue = list(reversed(targets))
+        results = []
+
+        async def worker():
+            while queue:
+                results.append(await call(queue.pop()))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results, time.perf_counter() - started
+
+    return asyncio.run(main())
+
+
+def worker_main(options):
+    setup_django(options.db, options.cache)
+    from django.conf import settings
+
+    settings.ASYNC_PUBLIC_VIEWS = options.worker == 'asgi'
+    targets = paths(json.loads(options.ids), options.requests)
+    run = run_asgi if options.worker == 'asgi' else run_wsgi
+    run(targets[:len(targets) // 10 or 1], options.concurrency)  # warm-up
+    results, elapsed = run(targets, options.concurrency)
+    print(json.dumps(summarize([latency for latency, _ in results], elapsed, sum(not ok for _, ok in results))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--properties', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--cache', action='store_true', help='keep the configured cache enabled')
+    parser.add_argument('--worker', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--ids', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.worker:
+        worker_main(options)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = str(Path(directory) / 'benchmark.sqlite3')
+        print(f'Seeding {options.properties} properties...')
+        ids = seed_database(db_path, options.properties)
+        for mode in ('wsgi', 'asgi'):
+            command = [
+                sys.executable, __file__, '--worker', mode, '--db', db_path, '--ids', json.dumps(ids),
+                '--requests', str(options.requests), '--concurrency', str(options.concurrency),
+            ] + (['--cache'] if options.cache else [])
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f'{mode.upper():5} ' + '  '.join(f'{key}={value}' for key, value in result.items()))
+
+
+if __name__ == '__main__':
+    main()
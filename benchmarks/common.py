@@ -0,0 +1,52 @@
+"""
+Helpers shared by the benchmark scripts: Django setup against a separate
+database (core.settings_benchmark), seeding it with generate_sample_data and
+latency summaries.
+"""
+import io
+import os
+import statistics
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+# Created by generate_sample_data.
+STAFF_USERNAME = 'sample-staff'
+
+
+def setup_django(db_path, cache=True):
+    """Point core.settings_benchmark at db_path; cache=False swaps in a dummy cache."""
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'core.settings_benchmark'
+    os.environ['BENCHMARK_DB'] = str(db_path)
+    import django
+    from django.conf import settings
+
+    django.setup()
+    if not cache:
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def seed(scale, seed=0, workers=1):
+    """Migrate the benchmark database and fill it with generate_sample_data."""
+    from django.core.cache import cache
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    cache.clear()
+    call_command('generate_sample_data', scale=scale, seed=seed, workers=workers, stdout=io.StringIO())
+
+
+def summarize(latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49] * 1000, 2),
+        'p95_ms': round(quantiles[94] * 1000, 2),
+        'p99_ms': round(quantiles[98] * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2),
+    }
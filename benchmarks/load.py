@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+"""
+End-to-end load benchmark over every named route in properties.urls,
+users.urls and admin_panel.urls.
+
+    python benchmarks/load.py --scale 10000                # seed (first run) and measure
+    python benchmarks/load.py --scale 100000 --users 32 --iterations 200
+    python benchmarks/load.py --update-baseline            # accept the current numbers
+
+The dataset is seeded once per scale into benchmarks/data/ and every run
+starts from a fresh copy of it, so write scenarios are repeatable. Each
+scenario is driven by --users concurrent simulated users (threads with their
+own session: anonymous, client, owner or staff) through Django's request
+handler with the production settings profile (core.settings_benchmark).
+Per-route p50/p95/p99 latency, throughput, status codes and SQL queries per
+request (from core.metrics), each the median over --rounds repetitions, are
+written to --output. The run exits with status 1 when a route regresses
+against --baseline: more queries per request, any 5xx response, or p95 latency
+or throughput worse than --tolerance allows (p50 is too sensitive to thread
+scheduling to gate on).
+"""
+import argparse
+import itertools
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from common import BASE_DIR, STAFF_USERNAME, seed, setup_django, summarize
+
+BENCHMARK_DIR = BASE_DIR / 'benchmarks'
+URLCONFS = ['properties.urls', 'users.urls', 'admin_panel.urls']
+# Latency differences below this many milliseconds are treated as noise;
+# with --users threads sharing the GIL, tail latencies jitter by tens of ms.
+NOISE_FLOOR_MS = 25
+
+
+@dataclass
+class Scenario:
+    name: str  # URL name
+    role: str = 'anonymous'
+    method: str = 'get'
+    args: str = ''  # key into the id pools passed to reverse()
+    query: dict = field(default_factory=dict)
+    data: dict = field(default_factory=dict)
+    label: str = ''
+
+    @property
+    def key(self):
+        method = 'POST ' if self.method == 'post' else ''
+        return f'{method}{self.name}{self.label}[{self.role}]'
+
+
+SCENARIOS = [
+    Scenario('properties:home'),
+    Scenario('properties:home', role='client'),
+    Scenario('properties:property_list'),
+    Scenario('properties:property_list', query={'type': 'villa', 'sort': 'price'}, label='?type'),
+    Scenario('properties:property_list', query={'q': 'شقة واسعة'}, label='?q'),
+    Scenario('properties:property_list', query={'page': 5}, label='?page'),
+    Scenario('properties:property_detail', args='property'),
+    Scenario('properties:property_detail', role='client', args='property'),
+    Scenario('properties:rent_request', role='client', args='property'),
+    Scenario('properties:add_property_request', role='owner'),
+    Scenario('properties:my_requests', role='client'),
+    Scenario('properties:my_requests', role='owner'),
+    Scenario('properties:my_properties', role='owner'),
+    Scenario('users:login'),
+    Scenario('users:login', method='post', data={'username': 'sample-client0', 'password': 'password123'}),
+    Scenario('users:logout'),
+    Scenario('users:register'),
+    Scenario('users:profile', role='owner'),
+    Scenario('users:profile', role='client'),
+    Scenario('users:edit_profile', role='client'),
+    Scenario('users:change_password', role='client'),
+    Scenario('admin_panel:dashboard', role='staff'),
+    Scenario('admin_panel:property_requests', role='staff'),
+    Scenario('admin_panel:property_requests', role='staff', query={'status': 'pending', 'city': 'جدة'}, label='?city'),
+    Scenario('admin_panel:rental_requests', role='staff'),
+    Scenario('admin_panel:decision_stats', role='staff'),
+    Scenario('admin_panel:cache_stats', role='staff'),
+    Scenario('admin_panel:metrics', role='staff'),
+    # Each request below moves a different pending request out of the queue.
+    Scenario('admin_panel:approve_property_request', role='staff', args='pending_property_request'),
+    Scenario('admin_panel:reject_property_request', role='staff', args='pending_property_request'),
+    Scenario('admin_panel:approve_rental_request', role='staff', args='pending_rental_request'),
+    Scenario('admin_panel:reject_rental_request', role='staff', args='pending_rental_request'),
+    Scenario('admin_panel:bulk_property_requests', role='staff', method='post',
+             args='pending_property_request', data={'action': 'reject'}),
+    Scenario('admin_panel:bulk_rental_requests', role='staff', method='post',
+             args='pending_rental_request', data={'action': 'reject'}),
+]
+
+
+def named_routes():
+    from importlib import import_module
+
+    names = set()
+    for urlconf in URLCONFS:
+        module = import_module(urlconf)
+        names.update(f'{module.app_name}:{pattern.name}' for pattern in module.urlpatterns if pattern.name)
+    return names
+
+
+def id_pools():
+    """Endless, thread-safe iterators over the ids scenarios pass to their URL."""
+    from properties.models import Property, PropertyRequest, RentalRequest
+    from users.models import User
+
+    def ids(queryset, limit=5000):
+        return itertools.cycle(list(queryset.order_by('pk').values_list('pk', flat=True)[:limit]))
+
+    pools = {
+        'property': ids(Property.objects.filter(is_approved=True, status='available')),
+        'pending_property_request': ids(PropertyRequest.objects.filter(status='pending')),
+        'pending_rental_request': ids(RentalRequest.objects.filter(status='pending')),
+        'client': ids(User.objects.filter(user_type='client', is_staff=False)),
+        'owner': ids(User.objects.filter(user_type='owner', is_staff=False)),
+        'staff': ids(User.objects.filter(username=STAFF_USERNAME)),
+    }
+    lock = threading.Lock()
+
+    def take(name):
+        with lock:
+            return next(pools[name])
+    return take
+
+
+def run_scenario(pool, sessions, scenario, take, iterations):
+    from django.test import Client
+    from django.urls import reverse
+
+    from core import metrics
+    from users.models import User
+
+    def call(index):
+        # One session per simulated user (thread); logging in is not timed.
+        if not hasattr(sessions, 'client'):
+            sessions.client = Client(raise_request_exception=False)
+            if scenario.role != 'anonymous':
+                sessions.client.force_login(User.objects.get(pk=take(scenario.role)))
+        data = dict(scenario.data)
+        if scenario.method == 'post' and scenario.args:
+            url, data['ids'] = reverse(scenario.name), take(scenario.args)
+        else:
+            url = reverse(scenario.name, args=[take(scenario.args)] if scenario.args else [])
+        started = time.perf_counter()
+        if scenario.method == 'post':
+            response = sessions.client.post(url, data)
+        else:
+            response = sessions.client.get(url, scenario.query)
+        return time.perf_counter() - started, response.status_code
+
+    metrics.reset()
+    started = time.perf_counter()
+    results = list(pool.map(call, range(iterations)))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    result = summarize([latency for latency, _ in results], elapsed, sum(status >= 500 for _, status in results))
+    totals = metrics.snapshot().get(scenario.name, {'requests': 0})
+    if totals['requests']:
+        result['queries_per_request'] = round(totals['queries'] / totals['requests'], 2)
+        result['duplicate_queries_per_request'] = round(totals['duplicates'] / totals['requests'], 2)
+    result['statuses'] = statuses
+    return result
+
+
+def median_of(rounds):
+    """One result per scenario: the median of each number over the rounds, counts summed."""
+    result = {
+        name: statistics.median(round_[name] for round_ in rounds)
+        for name, value in rounds[0].items() if isinstance(value, (int, float))
+    }
+    for name in ('requests', 'errors'):
+        result[name] = sum(round_[name] for round_ in rounds)
+    result['statuses'] = {}
+    for round_ in rounds:
+        for status, count in round_['statuses'].items():
+            result['statuses'][status] = result['statuses'].get(status, 0) + count
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of `results` against `baseline`, one message per problem."""
+    problems = []
+    for key, old in baseline['routes'].items():
+        new = results['routes'].get(key)
+        if new is None:
+            problems.append(f'{key}: missing from this run')
+            continue
+        if new.get('queries_per_request', 0) > old.get('queries_per_request', 0) + 0.5:
+            problems.append(f"{key}: queries per request {old.get('queries_per_request')} -> {new['queries_per_request']}")
+        # A server error is a failure even if the baseline had it too.
+        if new['errors']:
+            problems.append(f"{key}: {new['errors']} server errors ({new['statuses']})")
+        if new['p95_ms'] > old['p95_ms'] * (1 + tolerance) and new['p95_ms'] - old['p95_ms'] > NOISE_FLOOR_MS:
+            problems.append(f"{key}: p95 {old['p95_ms']}ms -> {new['p95_ms']}ms")
+        if new['throughput'] < old['throughput'] * (1 - tolerance):
+            problems.append(f"{key}: throughput {old['throughput']} -> {new['throughput']} req/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end load benchmark over every named route.')
+    parser.add_argument('--scale', type=int, default=10000, help='number of properties (e.g. 10000, 100000, 1000000)')
+    parser.add_argument('--users', type=int, default=16, help='concurrent simulated users per scenario')
+    parser.add_argument('--iterations', type=int, default=100, help='requests per scenario and round')
+    parser.add_argument('--rounds', type=int, default=3, help='repetitions per scenario; the median is reported')
+    parser.add_argument('--db', type=Path, help='database file (default: benchmarks/data/<scale>.sqlite3)')
+    parser.add_argument('--reseed', action='store_true', help='recreate the dataset even if the database exists')
+    parser.add_argument('--workers', type=int, default=1, help='processes used to seed the dataset')
+    parser.add_argument('--only', help='run only scenarios whose key contains this text')
+    parser.add_argument('--output', type=Path, default=BENCHMARK_DIR / 'results.json')
+    parser.add_argument('--baseline', type=Path, default=BENCHMARK_DIR / 'baseline.json')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed latency/throughput change (0.5 = 50%%)')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results to --baseline')
+    options = parser.parse_args()
+
+    # The seeded database is a template; every run works on a fresh copy so
+    # write scenarios always find the same pending requests.
+    template = options.db or BENCHMARK_DIR / 'data' / f'{options.scale}.sqlite3'
+    work = template.with_suffix('.run.sqlite3')
+    template.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{work}{suffix}').unlink(missing_ok=True)
+    setup_django(work)
+
+    import django
+    from django.core.cache import cache
+    from django.db import connections
+
+    from properties.management.commands.sync_replicas import copy_database
+
+    missing = named_routes() - {scenario.name for scenario in SCENARIOS}
+    if missing:
+        sys.exit(f'No benchmark scenario for: {", ".join(sorted(missing))}')
+    if options.reseed or not template.exists():
+        print(f'Seeding {options.scale} properties into {template}...')
+        started = time.perf_counter()
+        seed(options.scale, workers=options.workers)
+        connections.close_all()
+        template.unlink(missing_ok=True)
+        copy_database(work, template)
+        print(f'Seeded in {time.perf_counter() - started:.1f}s')
+    else:
+        copy_database(template, work)
+    cache.clear()
+
+    take = id_pools()
+    results = {
+        'meta': {
+            'scale': options.scale, 'users': options.users, 'iterations': options.iterations, 'rounds': options.rounds,
+            'python': platform.python_version(), 'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version, 'machine': platform.machine(),
+        },
+        'routes': {},
+    }
+    with ThreadPoolExecutor(max_workers=options.users) as pool:
+        for scenario in SCENARIOS:
+            if options.only and options.only not in scenario.key:
+                continue
+            sessions = threading.local()
+            run_scenario(pool, sessions, scenario, take, max(options.users, options.iterations // 10))  # warm-up
+            result = median_of([
+                run_scenario(pool, sessions, scenario, take, options.iterations) for _ in range(options.rounds)
+            ])
+            results['routes'][scenario.key] = result
+            print(f"{scenario.key:60} p50={result['p50_ms']:8}ms p95={result['p95_ms']:8}ms "
+                  f"{result['throughput']:7} req/s  queries={result.get('queries_per_request', '-')}  "
+                  f"statuses={result['statuses']}")
+
+    options.output.write_text(json.dumps(results, ensure_ascii=False, indent=2) + '\n')
+    print(f'Results written to {options.output}')
+    if options.update_baseline:
+        options.baseline.write_text(json.dumps(results, ensure_ascii=False, indent=2) + '\n')
+        print(f'Baseline updated: {options.baseline}')
+        return
+    if not options.baseline.exists():
+        print('No baseline to compare against; run with --update-baseline to record one.')
+        return
+
+    baseline = json.loads(options.baseline.read_text())
+    if baseline['meta'] != results['meta']:
+        print(f"Warning: baseline was recorded with {baseline['meta']}; latency comparisons may not be meaningful.")
+    if options.only:
+        baseline['routes'] = {key: value for key, value in baseline['routes'].items() if options.only in key}
+    problems = compare(results, baseline, options.tolerance)
+    if problems:
+        print('Regressions against the baseline:')
+        print('\n'.join(f'  {problem}' for problem in problems))
+        sys.exit(1)
+    print('No regressions against the baseline.')
+
+
+if __name__ == '__main__':
+    main()
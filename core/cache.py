@@ -0,0 +1,259 @@
+"""
+ذاكرة مؤقتة على طبقتين: L1 في ذاكرة العملية (سريعة، لكل عملية) وL2 مشتركة بين
+العمليات. القراءة تبدأ من L1 ثم L2، والكتابة تذهب للطبقتين، وعمر القيم في L1
+قصير (L1_TIMEOUT) لأن الكتابة في عملية أخرى لا تصل إلى L1 هنا.
+
+get_or_set يمنع التدافع (stampede): عند انتهاء مفتاح مكلف تحسبه عملية واحدة
+بقفل في L2 وتنتظر البقية النتيجة. الضمان يحتاج قفلاً ذرياً: مع FileBasedCache القفل
+ملف يُنشأ بـ O_CREAT|O_EXCL (لأن add فيه فحص ثم كتابة)، ومع غيرها يُستخدم add في L2
+وهو ذري في Redis وMemcached. الإبطال بإصدارات مساحات المفاتيح (namespaces).
+"""
+import asyncio
+import inspect
+import os
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.utils.functional import cached_property
+
+_MISSING = object()
+
+# إحصائيات مشتركة بين كل الخيوط في العملية (Django ينشئ نسخة من الـ backend لكل خيط)
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    """عدادات الإصابة والإخفاق في هذه العملية"""
+    with _stats_lock:
+        counts = {name: _stats[name] for name in ('l1_hits', 'l2_hits', 'misses', 'sets', 'stampede_waits')}
+    reads = counts['l1_hits'] + counts['l2_hits'] + counts['misses']
+    counts['hit_ratio'] = round((counts['l1_hits'] + counts['l2_hits']) / reads, 4) if reads else None
+    return counts
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class TieredCache(BaseCache):
+    """
+    backend يجمع ذاكرتين معرّفتين في CACHES. الخيارات:
+    L1 وL2 (أسماء الذاكرتين)، وL1_TIMEOUT، وLOCK_TIMEOUT (أقصى مدة لحساب قيمة).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l1_alias = options.get('L1', 'local')
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 30)
+
+    @cached_property
+    def l1(self):
+        return caches[self.l1_alias]
+
+    @cached_property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _timeouts(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return timeout, self.l1_timeout if timeout is None else min(timeout, self.l1_timeout)
+
+    def get(self, key, default=None, version=None):
+        value = self.l1.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            _count('l1_hits')
+            return value
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            _count('misses')
+            return default
+        _count('l2_hits')
+        self.l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l2_timeout, l1_timeout = self._timeouts(timeout)
+        _count('sets')
+        self.l2.set(key, value, l2_timeout, version=version)
+        self.l1.set(key, value, l1_timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l2_timeout, l1_timeout = self._timeouts(timeout)
+        if not self.l2.add(key, value, l2_timeout, version=version):
+            return False
+        self.l1.set(key, value, l1_timeout, version=version)
+        return True
+
+    def _lock_file(self, lock_key, version):
+        if isinstance(self.l2, FileBasedCache):
+            # بجانب ملفات القيم، وبامتداد لا يمسحه clear ولا يحسبه الحذف عند الامتلاء
+            return f'{self.l2._key_to_file(lock_key, version)}.lock'
+        return None
+
+    def _acquire(self, lock_key, version):
+        path = self._lock_file(lock_key, version)
+        if path is None:
+            return self.l2.add(lock_key, True, self.lock_timeout, version=version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        return True
+
+    def _locked(self, lock_key, version):
+        path = self._lock_file(lock_key, version)
+        if path is None:
+            return self.l2.has_key(lock_key, version=version)
+        # قفل عملية توقفت دون حذفه ينتهي بعد LOCK_TIMEOUT
+        try:
+            return time.time() - os.path.getmtime(path) < self.lock_timeout
+        except FileNotFoundError:
+            return False
+
+    def _release(self, lock_key, version):
+        path = self._lock_file(lock_key, version)
+        if path is None:
+            self.l2.delete(lock_key, version=version)
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            self.add(key, default, timeout, version=version)
+            return self.get(key, default, version=version)
+
+        lock_key = f'{key}:lock'
+        if not self._acquire(lock_key, version):
+            # عملية أخرى تحسب القيمة: ننتظرها حتى مدة القفل ثم نحسبها بأنفسنا
+            _count('stampede_waits')
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline and self._locked(lock_key, version):
+                time.sleep(0.05)
+                value = self.l2.get(key, _MISSING, version=version)
+                if value is not _MISSING:
+                    self.l1.set(key, value, self.l1_timeout, version=version)
+                    return value
+        try:
+            value = default()
+            self.set(key, value, timeout, version=version)
+        finally:
+            self._release(lock_key, version)
+        return value
+
+    async def aget_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """مثل get_or_set، وdefault يمكن أن تكون دالة غير متزامنة"""
+        value = await self.aget(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            await self.aadd(key, default, timeout, version=version)
+            return await self.aget(key, default, version=version)
+
+        lock_key = f'{key}:lock'
+        if not await sync_to_async(self._acquire)(lock_key, version):
+            _count('stampede_waits')
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline and await sync_to_async(self._locked)(lock_key, version):
+                await asyncio.sleep(0.05)
+                value = await self.aget(key, _MISSING, version=version)
+                if value is not _MISSING:
+                    return value
+        try:
+            value = await _call(default)
+            await self.aset(key, value, timeout, version=version)
+        finally:
+            await sync_to_async(self._release)(lock_key, version)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        l2_timeout, l1_timeout = self._timeouts(timeout)
+        self.l1.touch(key, l1_timeout, version=version)
+        return self.l2.touch(key, l2_timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(key, version=version)
+        return self.l2.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return self.l1.has_key(key, version=version) or self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # ذري بقدر incr في L2 (في FileBasedCache قراءة ثم كتابة)
+        value = self.l2.incr(key, delta, version=version)
+        self.l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l1.close(**kwargs)
+        self.l2.close(**kwargs)
+
+
+async def _call(function):
+    value = function()
+    return await value if inspect.isawaitable(value) else value
+
+
+async def aget_or_set(key, default, timeout=DEFAULT_TIMEOUT):
+    """
+    get_or_set للصفحات غير المتزامنة؛ default دالة عادية أو غير متزامنة.
+    مع TieredCache يمر بقفل منع التدافع، ومع غيرها تُحسب القيمة وتُحفظ مباشرة.
+    """
+    backend = caches['default']
+    if isinstance(backend, TieredCache):
+        return await backend.aget_or_set(key, default, timeout)
+    value = await backend.aget(key, _MISSING)
+    if value is _MISSING:
+        value = await _call(default)
+        await backend.aset(key, value, timeout)
+    return value
+
+
+def version_key(namespace):
+    return f'cache-version:{namespace}'
+
+
+def get_version(namespace):
+    """
+    الإصدار الحالي لمساحة مفاتيح؛ يدخل في كل مفتاح تابع لها.
+    تبدأ القيمة من الوقت الحالي حتى لا يعود إصدار قديم إذا حُذف المفتاح من الذاكرة.
+    """
+    return cache.get_or_set(version_key(namespace), time.time_ns, None)
+
+
+async def aget_version(namespace):
+    return await aget_or_set(version_key(namespace), time.time_ns, None)
+
+
+def bump_version(namespace):
+    """
+    إبطال كل المفاتيح التابعة لمساحة بإصدار جديد. كتابة واحدة لقيمة جديدة بدلاً من
+    incr، لأن incr في FileBasedCache قراءة ثم كتابة قد تتسابق فيها عمليتان.
+    """
+    cache.set(version_key(namespace), time.time_ns(), None)
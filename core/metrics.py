@@ -0,0 +1,263 @@
+"""
+قياسات لكل صفحة (اسم الـ URL): زمن الاستجابة، وعدد استعلامات SQL وزمنها، وزمن عرض
+القالب، والاستعلامات المكررة داخل الطلب نفسه (علامة N+1). تُجمع في ذاكرة العملية
+وتُعرض بصيغة Prometheus النصية؛ كل عملية خادم تعطي أرقامها فقط.
+
+الكلفة: قراءة ساعة وزيادة عداد لكل استعلام، وقفل واحد لكل طلب.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from . import cache as tiered_cache
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """ما يُجمع أثناء طلب واحد"""
+
+    __slots__ = ('queries', 'sql_seconds', 'template_seconds', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.statements = Counter()
+
+    @property
+    def duplicates(self):
+        """الاستعلامات التي سبق تنفيذ نص SQL نفسه في الطلب (بمعاملات أخرى غالباً)"""
+        return self.queries - len(self.statements)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class ViewMetrics:
+    __slots__ = ('latency', 'queries', 'statuses', 'sql_seconds', 'template_seconds', 'duplicates')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.statuses = Counter()
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.duplicates = 0
+
+
+_views = defaultdict(ViewMetrics)
+_views_lock = threading.Lock()
+
+
+def record(view, status, seconds, request_metrics):
+    with _views_lock:
+        metrics = _views[view]
+        metrics.latency.observe(seconds)
+        metrics.queries.observe(request_metrics.queries)
+        metrics.statuses[status] += 1
+        metrics.sql_seconds += request_metrics.sql_seconds
+        metrics.template_seconds += request_metrics.template_seconds
+        metrics.duplicates += request_metrics.duplicates
+
+
+def snapshot():
+    """المجاميع لكل صفحة: عدد الطلبات والاستعلامات والأزمنة"""
+    with _views_lock:
+        return {
+            view: {
+                'requests': metrics.latency.count,
+                'queries': metrics.queries.sum,
+                'duplicates': metrics.duplicates,
+                'sql_seconds': metrics.sql_seconds,
+                'template_seconds': metrics.template_seconds,
+            }
+            for view, metrics in _views.items()
+        }
+
+
+def reset():
+    with _views_lock:
+        _views.clear()
+
+
+def _record_query(execute, sql, params, many, context):
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics.sql_seconds += time.perf_counter() - started
+        request_metrics.queries += 1
+        request_metrics.statements[sql] += 1
+
+
+def install_query_recorder(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+# كل اتصال جديد في أي خيط يحصل على المسجّل عند فتحه
+connection_created.connect(install_query_recorder)
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        request_metrics = _current.get()
+        if request_metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            request_metrics.template_seconds += time.perf_counter() - started
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """محرك القوالب المعتاد مع قياس زمن العرض (يشمل الاستعلامات الكسولة داخل القالب)"""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+class MetricsMiddleware:
+    """يقيس كل طلب وينسبه إلى اسم الـ URL؛ يُعطّل بـ METRICS_ENABLED = False"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # الاتصالات المفتوحة قبل تحميل الـ middleware لن تُطلق connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, time.perf_counter() - started, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, time.perf_counter() - started, request_metrics)
+        return response
+
+    def finish(self, request, response, seconds, request_metrics):
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        record(view, response.status_code, seconds, request_metrics)
+        if request_metrics.statements:
+            sql, count = request_metrics.statements.most_common(1)[0]
+            if count >= settings.METRICS_DUPLICATE_QUERY_WARNING:
+                logger.warning('%s ran the same query %d times: %s', view, count, sql[:300])
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _histogram_lines(name, view, histogram):
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        yield f'{name}_bucket{{{_labels(view=view, le=bound)}}} {count}'
+    yield f'{name}_bucket{{{_labels(view=view, le="+Inf")}}} {histogram.count}'
+    yield f'{name}_sum{{{_labels(view=view)}}} {histogram.sum}'
+    yield f'{name}_count{{{_labels(view=view)}}} {histogram.count}'
+
+
+METRICS = [
+    ('http_requests_total', 'counter', 'Requests by URL name and status code.'),
+    ('http_request_duration_seconds', 'histogram', 'Request latency by URL name.'),
+    ('db_queries_per_request', 'histogram', 'SQL queries per request by URL name.'),
+    ('db_query_duration_seconds_total', 'counter', 'Time spent in SQL by URL name.'),
+    ('db_duplicate_queries_total', 'counter', 'Queries repeating an SQL statement already run in the same request.'),
+    ('template_render_duration_seconds_total', 'counter', 'Time spent rendering templates by URL name.'),
+    ('cache_operations_total', 'counter', 'Tiered cache reads and writes in this process.'),
+]
+
+
+def render_prometheus():
+    """كل القياسات بصيغة Prometheus النصية (text exposition 0.0.4)"""
+    lines = {name: [] for name, _, _ in METRICS}
+    with _views_lock:
+        for view, metrics in sorted(_views.items()):
+            labels = _labels(view=view)
+            for status, count in sorted(metrics.statuses.items()):
+                lines['http_requests_total'].append(f'http_requests_total{{{_labels(view=view, status=status)}}} {count}')
+            lines['http_request_duration_seconds'].extend(
+                _histogram_lines('http_request_duration_seconds', view, metrics.latency)
+            )
+            lines['db_queries_per_request'].extend(_histogram_lines('db_queries_per_request', view, metrics.queries))
+            lines['db_query_duration_seconds_total'].append(
+                f'db_query_duration_seconds_total{{{labels}}} {metrics.sql_seconds}'
+            )
+            lines['db_duplicate_queries_total'].append(f'db_duplicate_queries_total{{{labels}}} {metrics.duplicates}')
+            lines['template_render_duration_seconds_total'].append(
+                f'template_render_duration_seconds_total{{{labels}}} {metrics.template_seconds}'
+            )
+    for operation, count in tiered_cache.stats().items():
+        if operation != 'hit_ratio':
+            lines['cache_operations_total'].append(f'cache_operations_total{{{_labels(operation=operation)}}} {count}')
+
+    output = []
+    for name, kind, help_text in METRICS:
+        output += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', *lines[name]]
+    return '\n'.join(output) + '\n'
@@ -0,0 +1,113 @@
+"""
+توجيه القراءة بين القاعدة الرئيسية والنسخ المتماثلة (replicas).
+
+الكتابة وكل الصفحات العادية تستخدم القاعدة الرئيسية ('default'). الصفحات المغلفة
+بـ replica_reads تقرأ نماذج REPLICA_READ_APPS من نسخة من DATABASE_REPLICAS
+تُختار عشوائياً مرة لكل طلب. بعد أي كتابة يضع ReplicaPinMiddleware ملف تعريف
+ارتباط قصير العمر يبقي المتصفح على القاعدة الرئيسية حتى تلحق النسخ بها،
+فيرى المستخدم ما كتبه.
+"""
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'db_primary_pin'
+
+_replica = ContextVar('replica', default=None)
+_request_writes = ContextVar('request_writes', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = _replica.get()
+        if replica is None or model._meta.app_label not in settings.REPLICA_READ_APPS:
+            return PRIMARY
+        return replica
+
+    def db_for_write(self, model, **hints):
+        writes = _request_writes.get()
+        if writes is not None:
+            writes.append(model._meta.label)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # النسخ صورة من القاعدة الرئيسية، فالربط بين أي سجلين مسموح
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # النسخ تأخذ المخطط بالنسخ المتماثل وليس بـ migrate
+        return db not in replicas()
+
+
+def replica_reads(view):
+    """قراءة صفحة عامة للقراءة فقط من نسخة متماثلة، إلا إذا كان المتصفح مثبتاً على الرئيسية"""
+    def use_replica(request):
+        return bool(replicas()) and request.method in ('GET', 'HEAD') and PIN_COOKIE not in request.COOKIES
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not use_replica(request):
+                return await view(request, *args, **kwargs)
+            token = _replica.set(random.choice(replicas()))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not use_replica(request):
+            return view(request, *args, **kwargs)
+        token = _replica.set(random.choice(replicas()))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica.reset(token)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """تثبيت المتصفح على القاعدة الرئيسية لمدة REPLICA_PIN_SECONDS بعد أي كتابة"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        writes = []
+        token = _request_writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        return self.pin(response, writes)
+
+    async def __acall__(self, request):
+        writes = []
+        token = _request_writes.set(writes)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        return self.pin(response, writes)
+
+    def pin(self, response, writes):
+        if writes and replicas():
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
@@ -43,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.routers.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,7 +58,7 @@ ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,6 +84,62 @@ DATABASES = {
     }
 }
 
+# Read replicas for public listing pages (see core/routers.py). Each alias is a
+# copy of 'default' kept in sync by `python manage.py sync_replicas`; an empty
+# list sends every query to 'default'. core/settings_replica.py sets one up.
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+# Only these apps are read from replicas; sessions and users stay on 'default'.
+REPLICA_READ_APPS = ['properties']
+# Seconds a browser keeps reading from 'default' after it writes; should
+# exceed the replication lag.
+REPLICA_PIN_SECONDS = 10
+
+
+# Cache: per-process L1 in front of a cache shared by all workers (L2). The
+# file-based L2 stands in for Redis/Memcached; point 'shared' at one of those
+# in production. The stampede lock uses an O_EXCL lock file on a file-based L2
+# and add() otherwise, so any other L2 must have an atomic add. See core/cache.py.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'L1': 'local',
+            'L2': 'shared',
+            # Seconds a value may be served from L1 after another worker changed it.
+            'L1_TIMEOUT': 5,
+            # Longest a worker waits for another to compute the same key.
+            'LOCK_TIMEOUT': 30,
+        },
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'l1',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# The test runner moves 'shared' to a temporary directory for the run, so
+# tests never clear or fill the cache above.
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Seconds a property_list page stays cached; listings are also invalidated
+# whenever a property or an occupying rental changes.
+PROPERTY_LISTING_CACHE_TIMEOUT = 60
+
+
+# Per-URL latency, SQL and template timings, served to staff at
+# admin_panel:metrics in Prometheus text format.
+METRICS_ENABLED = True
+# Log a warning when one request runs the same SQL statement this many times.
+METRICS_DUPLICATE_QUERY_WARNING = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,3 +192,27 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
+
+# Serve home, property_list and property_detail from properties/async_views.py.
+# Enable when running under ASGI (core.asgi); under WSGI the sync views are faster.
+ASYNC_PUBLIC_VIEWS = False
+
+# Seconds a shared cache (CDN/proxy) may serve property_detail to anonymous
+# visitors without revalidating; 0 means revalidate every time (cheap 304s).
+PROPERTY_DETAIL_SHARED_MAX_AGE = 0
+
+# Thumbnail/WebP derivatives are rendered in a process pool after upload.
+IMAGE_DERIVATIVES_ASYNC = True
+IMAGE_DERIVATIVE_WORKERS = 2
+
+# Limits enforced while property request photos stream to disk.
+PROPERTY_REQUEST_MAX_IMAGES = 30
+PROPERTY_REQUEST_MAX_IMAGE_SIZE = 10 * 1024 * 1024
+DATA_UPLOAD_MAX_NUMBER_FILES = 50
+
+# Outbox delivery (python manage.py send_notifications).
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_CONCURRENCY = 4
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 60
+NOTIFICATION_RETRY_MAX_SECONDS = 3600
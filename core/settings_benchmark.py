@@ -0,0 +1,26 @@
+"""
+Benchmark settings: used by the scripts in benchmarks/.
+
+The production profile pointed at a separate SQLite file (BENCHMARK_DB) so a
+run never touches the development database, with its own directory for the
+shared cache tier.
+"""
+import os
+
+from .settings_production import *  # noqa: F401,F403
+from .settings_production import BASE_DIR, CACHES, DATABASES
+
+ALLOWED_HOSTS = ['localhost', 'testserver']
+
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'NAME': os.environ.get('BENCHMARK_DB', BASE_DIR / 'benchmark.sqlite3'),
+    },
+}
+
+CACHES = {
+    **CACHES,
+    'shared': {**CACHES['shared'], 'LOCATION': BASE_DIR / '.cache' / 'benchmark'},
+}
@@ -0,0 +1,48 @@
+"""
+Production settings: DJANGO_SETTINGS_MODULE=core.settings_production
+
+Tunes SQLite for concurrent web workers. WAL lets readers run alongside the
+single writer, write transactions take the write lock up front (BEGIN
+IMMEDIATE) so they queue on busy_timeout instead of failing with "database
+is locked" when a read is upgraded to a write, and connections are reused
+across requests.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, SECRET_KEY
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
+
+# Milliseconds a connection waits for the write lock before raising.
+SQLITE_BUSY_TIMEOUT = 20000
+
+# Applied to every new connection.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # durable across application crashes in WAL mode
+    'busy_timeout': SQLITE_BUSY_TIMEOUT,
+    'cache_size': -64000,  # negative means KiB: 64 MB page cache per connection
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        # Seconds; persistent connections keep the page cache and mmap warm.
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT / 1000,
+        },
+    },
+}
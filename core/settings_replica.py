@@ -0,0 +1,20 @@
+"""
+Local primary/replica setup: DJANGO_SETTINGS_MODULE=core.settings_replica
+
+Public listing pages read from db.replica.sqlite3, which stands in for a
+streaming replica. Keep it fresh with:
+
+    python manage.py sync_replicas --loop
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+DATABASES = {
+    **DATABASES,
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_REPLICAS = ['replica']
@@ -0,0 +1,24 @@
+"""
+مشغل الاختبارات: الذاكرة المشتركة (L2) في مجلد مؤقت طوال التشغيل، فلا تمسح
+الاختبارات (cache.clear()) ذاكرة المطور في .cache ولا تبقى مفاتيح الإصدارات
+بلا مدة من تشغيل إلى آخر.
+"""
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.TemporaryDirectory(prefix='test-cache-')
+        caches = {**settings.CACHES, 'shared': {**settings.CACHES['shared'], 'LOCATION': self.cache_directory.name}}
+        self.cache_settings = override_settings(CACHES=caches)
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        self.cache_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
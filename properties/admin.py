@@ -1,15 +1,38 @@
 from django.contrib import admin
-from .models import Property, PropertyImage, PropertyRequest, PropertyRequestImage, RentalRequest
+from django.db.models import Q
+from . import transitions
+from .models import Property, PropertyImage, PropertyRequest, PropertyRequestImage, RentalRequest, RequestTransition
+from .search import property_index, property_request_index
+from .services import approve_property_request
+
+class FullTextSearchMixin:
+    """البحث في قوائم لوحة الإدارة عبر فهرس FTS5 بدلاً من LIKE"""
+    search_index = None
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        condition = self.search_index.condition(search_term, queryset.db) | Q(owner__username=search_term)
+        return queryset.filter(condition), False
+
+class TransitionActorMixin:
+    """نسب انتقالات الحالة التي تتم من لوحة الإدارة إلى المستخدم الحالي"""
+
+    def changeform_view(self, request, *args, **kwargs):
+        with transitions.recording(request.user):
+            return super().changeform_view(request, *args, **kwargs)
 
 class PropertyImageInline(admin.TabularInline):
     model = PropertyImage
     extra = 1
 
 @admin.register(Property)
-class PropertyAdmin(admin.ModelAdmin):
+class PropertyAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'owner', 'property_type', 'city', 'price', 'status', 'is_approved', 'created_at')
     list_filter = ('property_type', 'status', 'is_approved', 'city')
     search_fields = ('title', 'description', 'address', 'owner__username')
+    search_index = property_index
     inlines = [PropertyImageInline]
 
     def save_model(self, request, obj, form, change):
@@ -22,41 +45,39 @@ class PropertyRequestImageInline(admin.TabularInline):
     extra = 1
 
 @admin.register(PropertyRequest)
-class PropertyRequestAdmin(admin.ModelAdmin):
+class PropertyRequestAdmin(TransitionActorMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'owner', 'property_type', 'city', 'price', 'status', 'created_at')
     list_filter = ('property_type', 'status', 'city')
     search_fields = ('title', 'description', 'address', 'owner__username')
+    search_index = property_request_index
     inlines = [PropertyRequestImageInline]
 
-    def save_model(self, request, obj, form, change):
-        # إذا تم قبول الطلب، إنشاء عقار جديد
-        if obj.status == 'approved' and change:
-            # التحقق من عدم وجود عقار مرتبط بهذا الطلب
-            if not Property.objects.filter(title=obj.title, owner=obj.owner).exists():
-                property_obj = Property.objects.create(
-                    owner=obj.owner,
-                    title=obj.title,
-                    description=obj.description,
-                    property_type=obj.property_type,
-                    address=obj.address,
-                    city=obj.city,
-                    area=obj.area,
-                    bedrooms=obj.bedrooms,
-                    bathrooms=obj.bathrooms,
-                    price=obj.price,
-                    is_approved=True
-                )
-                # نسخ الصور
-                for img in obj.images.all():
-                    PropertyImage.objects.create(
-                        property=property_obj,
-                        image=img.image,
-                        is_main=img.is_main
-                    )
-        super().save_model(request, obj, form, change)
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # إنشاء العقار بعد حفظ الصور المضافة في نفس النموذج
+        obj = form.instance
+        if obj.status == 'approved':
+            obj.property, _ = approve_property_request(obj.pk, actor=request.user)
 
 @admin.register(RentalRequest)
-class RentalRequestAdmin(admin.ModelAdmin):
+class RentalRequestAdmin(TransitionActorMixin, admin.ModelAdmin):
     list_display = ('property', 'client', 'preferred_start_date', 'duration_months', 'status', 'created_at')
     list_filter = ('status', 'preferred_start_date')
     search_fields = ('property__title', 'client__username', 'message')
+
+@admin.register(RequestTransition)
+class RequestTransitionAdmin(admin.ModelAdmin):
+    list_display = ('request_type', 'request_id', 'from_status', 'to_status', 'actor', 'city', 'latency', 'created_at')
+    list_filter = ('request_type', 'to_status', 'city')
+    list_select_related = ('actor',)
+    date_hierarchy = 'created_at'
+
+    # السجل للقراءة فقط
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,69 @@
+"""
+نسخ غير متزامنة من الصفحات العامة (الرئيسية، القائمة، التفاصيل) لخادم ASGI
+(core.asgi)، تُفعّل بالإعداد ASYNC_PUBLIC_VIEWS. الاستعلامات المستقلة تُنتظر معاً
+بـ asyncio.gather، والقالب يُعرض في خيط متزامن لأنه قد يقرأ الجلسة والمستخدم.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.shortcuts import aget_object_or_404, render
+from django.views.decorators.http import condition
+
+from core.routers import replica_reads
+from .cache import FEATURED_NAMESPACE, acached_listing, afeatured_properties, aget_version
+from .facets import aget_facets
+from .filters import LISTING_SORTS, search_listings
+from .http import preload_validators, property_etag, property_last_modified, shared_cache_for_anonymous
+from .models import Property
+from .pagination import CursorPage, CursorPaginator
+
+arender = sync_to_async(render)
+
+
+@replica_reads
+async def home(request):
+    """الصفحة الرئيسية"""
+    featured_version = await aget_version(FEATURED_NAMESPACE)
+    context = {
+        'featured_properties': await afeatured_properties(featured_version),
+        'featured_version': featured_version,
+    }
+    return await arender(request, 'properties/home.html', context)
+
+
+@replica_reads
+async def property_list(request):
+    """قائمة العقارات: صفحة النتائج وعدادات الفلاتر معاً"""
+    properties, query, sort = search_listings(request.GET)
+
+    if 'page' in request.GET:
+        paginator = Paginator(properties.order_by(*LISTING_SORTS[sort]), 12)
+        page = sync_to_async(paginator.get_page)(request.GET.get('page'))
+    else:
+        paginator = CursorPaginator(properties, 12, ordering=LISTING_SORTS[sort])
+        page = acached_listing(request.GET, lambda: paginator.aget_page(request.GET.get('cursor')))
+    page_obj, facets = await asyncio.gather(page, aget_facets(request.GET))
+
+    context = {
+        'page_obj': page_obj,
+        'cursor_pagination': isinstance(page_obj, CursorPage),
+        'property_types': Property.PROPERTY_TYPES,
+        'facets': facets,
+        'sort': sort,
+        'query': query,
+    }
+    return await arender(request, 'properties/property_list.html', context)
+
+
+@replica_reads
+@shared_cache_for_anonymous
+@preload_validators
+@condition(etag_func=property_etag, last_modified_func=property_last_modified)
+async def property_detail(request, pk):
+    """تفاصيل العقار"""
+    properties = Property.objects.select_related('owner').prefetch_related('images')
+    context = {
+        'property': await aget_object_or_404(properties, pk=pk, is_approved=True),
+    }
+    return await arender(request, 'properties/property_detail.html', context)
@@ -0,0 +1,54 @@
+"""
+توفر العقارات وتعارض فترات الإيجار.
+تتعارض الفترة [من، إلى) مع إيجار فعلي (OCCUPYING) يبدأ قبل "إلى" وينتهي بعد "من".
+لا نفترض أن الإيجارات الفعلية لا تتداخل (الحفظ المباشر قد يُدخل تداخلاً)، والبحث
+مدى في الفهرس rental_period_idx على إيجارات العقار التي تبدأ قبل "إلى"، والنهاية
+مقروءة من الفهرس نفسه دون الرجوع إلى الجدول.
+"""
+from django.db.models import Exists, OuterRef
+
+from .models import OCCUPYING, RentalRequest
+
+
+def overlapping(property_ref, start, end, exclude_ref=None):
+    """الإيجارات الفعلية للعقار التي تتداخل مع [start، end)"""
+    rentals = RentalRequest.objects.filter(
+        OCCUPYING, property=property_ref, preferred_start_date__lt=end, end_date__gt=start,
+    )
+    if exclude_ref is not None:
+        rentals = rentals.exclude(pk=exclude_ref)
+    return rentals
+
+
+def has_conflict(property_id, start, end, exclude_pk=None):
+    """هل تتداخل الفترة [start، end) مع إيجار فعلي للعقار؟"""
+    return overlapping(property_id, start, end, exclude_pk).exists()
+
+
+def conflict_exists():
+    """تعبير EXISTS لكل طلب إيجار: هل يتداخل مع إيجار فعلي آخر للعقار نفسه؟"""
+    return Exists(overlapping(OuterRef('property'), OuterRef('preferred_start_date'), OuterRef('end_date'), OuterRef('pk')))
+
+
+def annotate_conflicts(rentals):
+    """إضافة has_conflict لكل طلب إيجار"""
+    return rentals.annotate(has_conflict=conflict_exists())
+
+
+def mark_conflicts(rentals):
+    """
+    has_conflict لطلبات محمّلة مسبقاً (صفحة من الطابور) باستعلام واحد، فيُحسب
+    التعارض لصفوف الصفحة فقط لا لكل صفوف الجدول.
+    """
+    conflicts = dict(
+        annotate_conflicts(RentalRequest.objects.filter(pk__in=[rental.pk for rental in rentals]))
+        .values_list('pk', 'has_conflict')
+    )
+    for rental in rentals:
+        rental.has_conflict = conflicts.get(rental.pk, False)
+    return rentals
+
+
+def filter_available(properties, start, end):
+    """العقارات التي لا يشغلها إيجار فعلي في أي يوم من [start، end)"""
+    return properties.filter(~Exists(overlapping(OuterRef('pk'), start, end)))
@@ -0,0 +1,65 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import aget_or_set, aget_version, bump_version, get_version  # noqa: F401
+from core.routers import PRIMARY
+from .filters import available_properties
+from .utils import city_key
+
+FEATURED_NAMESPACE = 'featured'
+FEATURED_COUNT = 6
+
+LISTINGS_NAMESPACE = 'listings'
+# معاملات قائمة العقارات التي تؤثر في النتيجة؛ غيرها (مثل utm_*) لا يدخل في المفتاح
+LISTING_PARAMS = ('type', 'city', 'min_price', 'max_price', 'available_from', 'available_to', 'q', 'sort', 'cursor')
+
+
+def featured_queryset():
+    # من القاعدة الرئيسية دائماً: النتيجة تُحفظ بلا مدة تحت الإصدار الذي رُفع بعد الكتابة،
+    # وقراءتها من نسخة متماثلة متأخرة تبقي المحتوى القديم حتى الإبطال التالي
+    return available_properties().using(PRIMARY).select_related('main_image').order_by('-created_at')[:FEATURED_COUNT]
+
+
+def featured_properties(version=None):
+    """العقارات المميزة للصفحة الرئيسية، محفوظة حتى يتغير إصدارها"""
+    version = version or get_version(FEATURED_NAMESPACE)
+    return cache.get_or_set(f'featured-properties:{version}', lambda: list(featured_queryset()), None)
+
+
+async def afeatured_properties(version):
+    async def build():
+        return [obj async for obj in featured_queryset()]
+    return await aget_or_set(f'featured-properties:{version}', build, None)
+
+
+def _listing_digest(params):
+    """بصمة ثابتة لمعاملات القائمة: ترتيب ثابت، بلا قيم فارغة، والمدينة بصيغتها الموحدة"""
+    normalized = {}
+    for name in LISTING_PARAMS:
+        value = (params.get(name) or '').strip()
+        if name == 'city':
+            value = city_key(value)
+        if value:
+            normalized[name] = value
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def listing_key(params):
+    return f'property-list:{get_version(LISTINGS_NAMESPACE)}:{_listing_digest(params)}'
+
+
+def cached_listing(params, build):
+    """
+    نتيجة صفحة من قائمة العقارات محفوظة حسب معاملاتها، وتُبطل كلها عند تغير أي
+    عقار أو إيجار فعلي. المدة محدودة لأن القراءة قد تأتي من نسخة متماثلة متأخرة.
+    """
+    return cache.get_or_set(listing_key(params), build, getattr(settings, 'PROPERTY_LISTING_CACHE_TIMEOUT', 60))
+
+
+async def acached_listing(params, build):
+    """مثل cached_listing، وbuild دالة غير متزامنة"""
+    key = f'property-list:{await aget_version(LISTINGS_NAMESPACE)}:{_listing_digest(params)}'
+    return await aget_or_set(key, build, getattr(settings, 'PROPERTY_LISTING_CACHE_TIMEOUT', 60))
@@ -0,0 +1,134 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import LISTED, Property, PropertyFacet
+from .utils import city_key, normalize_arabic
+
+# حدود الشرائح السعرية [من، إلى)، وآخر شريحة مفتوحة
+PRICE_BUCKETS = (
+    (0, 2000),
+    (2000, 5000),
+    (5000, 10000),
+    (10000, 20000),
+    (20000, None),
+)
+
+FACET_FIELDS = ('is_approved', 'status', 'property_type', 'city', 'price')
+
+PROPERTY_TYPE_LABELS = dict(Property.PROPERTY_TYPES)
+
+
+def price_bucket(price):
+    for low, high in PRICE_BUCKETS:
+        if high is None or price < high:
+            return f'{low}-{high or ""}'
+
+
+def facet_keys(values):
+    """مفاتيح العدادات التي يساهم فيها عقار بقيم الحقول المعطاة"""
+    if not values or not values['is_approved'] or values['status'] != 'available':
+        return {}
+    bucket = price_bucket(Decimal(values['price']))
+    return {
+        ('type', values['property_type']): PROPERTY_TYPE_LABELS.get(values['property_type'], values['property_type']),
+        ('city', normalize_arabic(values['city'])): values['city'],
+        ('price', bucket): bucket,
+    }
+
+
+def stored_values(instance):
+    """قيم حقول العدادات كما حُمّلت من قاعدة البيانات"""
+    return instance.stored_values(FACET_FIELDS)
+
+
+def current_values(instance):
+    return {field: getattr(instance, field) for field in FACET_FIELDS}
+
+
+def update_counts(old_values, new_values):
+    """
+    تطبيق الفرق بين حالتين لمجموعة عقارات على جدول العدادات.
+    كل عنصر قاموس بقيم FACET_FIELDS أو None لعقار غير موجود.
+    """
+    changes, labels = Counter(), {}
+    for values, sign in ((old_values, -1), (new_values, 1)):
+        for item in values:
+            keys = facet_keys(item)
+            labels.update(keys)
+            for key in keys:
+                changes[key] += sign
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+
+    with transaction.atomic():
+        PropertyFacet.objects.bulk_create(
+            [PropertyFacet(dimension=dimension, value=value, label=labels[dimension, value])
+             for (dimension, value), delta in changes.items() if delta > 0],
+            ignore_conflicts=True,
+        )
+        for (dimension, value), delta in changes.items():
+            PropertyFacet.objects.filter(dimension=dimension, value=value).update(count=F('count') + delta)
+
+
+def rebuild(property_model=Property, facet_model=PropertyFacet):
+    """إعادة حساب جدول العدادات بالكامل من جدول العقارات"""
+    counts, labels = Counter(), {}
+    for values in property_model.objects.filter(LISTED).values(*FACET_FIELDS).iterator(chunk_size=2000):
+        keys = facet_keys(values)
+        counts.update(keys.keys())
+        labels.update(keys)
+
+    with transaction.atomic():
+        facet_model.objects.all().delete()
+        facet_model.objects.bulk_create(
+            [facet_model(dimension=dimension, value=value, label=labels[dimension, value], count=count)
+             for (dimension, value), count in counts.items()],
+            batch_size=500,
+        )
+    return len(counts)
+
+
+def _stored_facets():
+    return PropertyFacet.objects.filter(count__gt=0).order_by('dimension', '-count', 'value')
+
+
+def get_facets(params, city_limit=20):
+    """عدادات الفلاتر مع تحديد الاختيار الحالي في الطلب"""
+    return build_facets(list(_stored_facets()), params, city_limit)
+
+
+async def aget_facets(params, city_limit=20):
+    return build_facets([facet async for facet in _stored_facets()], params, city_limit)
+
+
+def build_facets(stored, params, city_limit):
+    city = city_key(params.get('city'))
+    min_price, max_price = params.get('min_price'), params.get('max_price')
+    facets = {'type': [], 'city': [], 'price': []}
+    type_counts = {facet.value: facet for facet in stored if facet.dimension == 'type'}
+    # كل الأنواع تظهر في القائمة حتى لو لم يكن لها عقارات
+    types = [
+        type_counts.get(value) or PropertyFacet(dimension='type', value=value, label=label, count=0)
+        for value, label in Property.PROPERTY_TYPES
+    ]
+    for facet in [*types, *(facet for facet in stored if facet.dimension != 'type')]:
+        if facet.dimension == 'type':
+            selected = facet.value == params.get('type')
+        elif facet.dimension == 'city':
+            selected = bool(city) and city_key(facet.value) == city
+        else:
+            low, high = facet.value.split('-')
+            facet.min_price = low
+            facet.max_price = f'{Decimal(high) - Decimal("0.01")}' if high else ''
+            selected = (min_price or '') == low and (max_price or '') == facet.max_price
+        facet.selected = selected
+        facets[facet.dimension].append(facet)
+
+    facets['total'] = sum(facet.count for facet in facets['type'])
+    facets['city'] = facets['city'][:city_limit]
+    facets['price'].sort(key=lambda facet: int(facet.value.split('-')[0]))
+    return facets
@@ -0,0 +1,100 @@
+"""
+سجل نشاط موحد للمستخدم: طلبات العرض، وطلبات الإيجار التي أرسلها، وطلبات الإيجار
+على عقاراته. كل مصدر يُقرأ بالترقيم بالمؤشر على (created_at، النوع، id) تنازلياً
+ثم تُدمج المصادر المرتبة، فتبقى تكلفة الصفحة ثابتة مهما كثرت الطلبات.
+"""
+import base64
+import binascii
+import heapq
+import json
+
+from django.db.models import Count, Q, Value
+from django.utils.dateparse import parse_datetime
+
+from .models import PropertyRequest, RentalRequest
+from .pagination import CursorEncoder, CursorPage
+
+FEED_KINDS = {
+    'property': 'طلبات العرض',
+    'rental': 'طلبات الإيجار',
+    'inquiry': 'طلبات على عقاراتي',
+}
+
+
+class FeedItem:
+    def __init__(self, kind, obj):
+        self.kind = kind
+        self.obj = obj
+
+    def sort_key(self):
+        return (self.obj.created_at, self.kind, self.obj.pk)
+
+
+def feed_sources(user):
+    """استعلام كل مصدر من مصادر السجل مع الصفوف المرتبطة"""
+    return {
+        'property': PropertyRequest.objects.filter(owner=user).select_related('property'),
+        'rental': RentalRequest.objects.filter(client=user).select_related('property'),
+        'inquiry': RentalRequest.objects.filter(property_owner=user).select_related('property', 'client'),
+    }
+
+
+def encode_cursor(item):
+    data = json.dumps([item.obj.created_at, item.kind, item.obj.pk], cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, kind, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        created_at = parse_datetime(created_at)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if created_at is None or kind not in FEED_KINDS or not isinstance(pk, int):
+        return None
+    return created_at, kind, pk
+
+
+def _after(kind, cursor):
+    """صفوف مصدر من نوع kind التي تلي المؤشر في الترتيب الموحد"""
+    created_at, cursor_kind, pk = cursor
+    if kind < cursor_kind:
+        return Q(created_at__lte=created_at)
+    if kind == cursor_kind:
+        return Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+    return Q(created_at__lt=created_at)
+
+
+def get_feed_page(user, per_page=20, cursor=None, kinds=None):
+    """صفحة من السجل الموحد؛ المؤشر للأمام فقط (next_cursor)"""
+    cursor = decode_cursor(cursor) if cursor else None
+    sources = []
+    for kind, queryset in feed_sources(user).items():
+        if kinds and kind not in kinds:
+            continue
+        if cursor is not None:
+            queryset = queryset.filter(_after(kind, cursor))
+        rows = queryset.order_by('-created_at', '-id')[:per_page + 1]
+        sources.append([FeedItem(kind, obj) for obj in rows])
+
+    merged = list(heapq.merge(*sources, key=FeedItem.sort_key, reverse=True))
+    items = merged[:per_page]
+    next_cursor = encode_cursor(items[-1]) if len(merged) > per_page else None
+    return CursorPage(items, next_cursor=next_cursor)
+
+
+def feed_counts(user):
+    """عدد الطلبات لكل نوع وحالة باستعلام تجميع واحد (UNION ALL)"""
+    grouped = [
+        queryset.order_by().annotate(kind=Value(kind)).values('kind', 'status').annotate(count=Count('pk'))
+        for kind, queryset in feed_sources(user).items()
+    ]
+    rows = grouped[0].union(*grouped[1:], all=True)
+
+    counts = {'total': 0, 'pending': 0, 'approved': 0, 'rejected': 0, 'completed': 0}
+    counts.update({kind: 0 for kind in FEED_KINDS})
+    for row in rows:
+        counts['total'] += row['count']
+        counts[row['kind']] += row['count']
+        counts[row['status']] = counts.get(row['status'], 0) + row['count']
+    return counts
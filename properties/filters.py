@@ -0,0 +1,72 @@
+import datetime
+
+from .availability import filter_available
+from .models import LISTED, Property
+from .search import property_index
+from .utils import city_key, parse_date_param
+
+# أعلى محرف في يونيكود، يُستخدم لتحويل البحث بالبادئة إلى نطاق على الفهرس
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+# خيارات ترتيب قائمة العقارات، وكل ترتيب ينتهي بمفتاح فريد للترقيم بالمؤشر
+LISTING_SORTS = {
+    'relevance': ('search_rank', 'id'),
+    'newest': ('-created_at', '-id'),
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+}
+
+
+def available_properties():
+    """العقارات المعتمدة والمتاحة للإيجار"""
+    return Property.objects.filter(LISTED)
+
+
+def filter_properties(properties, params):
+    """تطبيق فلاتر قائمة العقارات (النوع، المدينة، السعر، التوفر) على الاستعلام"""
+    # فلترة حسب النوع
+    property_type = params.get('type')
+    if property_type:
+        properties = properties.filter(property_type=property_type)
+
+    # فلترة حسب المدينة: بادئة على العمود الموحد بدلاً من LIKE '%..%'
+    city = city_key(params.get('city'))
+    if city:
+        properties = properties.filter(
+            city_normalized__gte=city,
+            city_normalized__lt=city + PREFIX_UPPER_BOUND,
+        )
+
+    # فلترة حسب السعر
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    if min_price:
+        properties = properties.filter(price__gte=min_price)
+    if max_price:
+        properties = properties.filter(price__lte=max_price)
+
+    # فلترة حسب التوفر في فترة [من، إلى)، ويوم واحد إذا لم تُحدد النهاية؛ التاريخ غير الصالح يُهمل
+    available_from = parse_date_param(params.get('available_from'))
+    if available_from:
+        available_to = parse_date_param(params.get('available_to'))
+        if not available_to or available_to <= available_from:
+            available_to = available_from + datetime.timedelta(days=1)
+        properties = filter_available(properties, available_from, available_to)
+
+    return properties
+
+
+def search_listings(params):
+    """استعلام قائمة العقارات بالفلاتر والبحث النصي؛ يُرجع (الاستعلام، نص البحث، الترتيب)"""
+    properties = filter_properties(available_properties(), params).select_related('main_image')
+
+    # البحث النصي مرتب حسب الصلة
+    query = params.get('q', '').strip()
+    if query:
+        properties = property_index.filter(properties, query)
+
+    sort = params.get('sort')
+    if sort not in LISTING_SORTS or (sort == 'relevance' and not query):
+        sort = 'relevance' if query else 'newest'
+    return properties, query, sort
+
@@ -0,0 +1,98 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .models import Property
+
+
+def detail_validators(request, pk):
+    """
+    بيانات التحقق لصفحة العقار باستعلام واحد، محفوظة على الطلب
+    لأن دالتي ETag وLast-Modified تُستدعيان كلتاهما.
+    """
+    cache_attr = f'_property_validators_{pk}'
+    if not hasattr(request, cache_attr):
+        setattr(request, cache_attr, _validators_query(pk).first())
+    return getattr(request, cache_attr)
+
+
+async def adetail_validators(request, pk):
+    cache_attr = f'_property_validators_{pk}'
+    if not hasattr(request, cache_attr):
+        setattr(request, cache_attr, await _validators_query(pk).afirst())
+    return getattr(request, cache_attr)
+
+
+def _validators_query(pk):
+    return (
+        Property.objects.filter(pk=pk, is_approved=True)
+        .annotate(last_image=Max('images__created_at'), image_count=Count('images'))
+        .values('updated_at', 'last_image', 'image_count', 'owner__updated_at')
+    )
+
+
+def preload_validators(view_func):
+    """
+    للصفحة غير المتزامنة: تحميل بيانات التحقق والمستخدم قبل condition، لأن دالتي
+    ETag وLast-Modified متزامنتان ولا يُسمح لهما بالاستعلام داخل حلقة الأحداث.
+    """
+    @wraps(view_func)
+    async def wrapper(request, pk, *args, **kwargs):
+        request.user = await request.auser()
+        await adetail_validators(request, pk)
+        return await view_func(request, pk, *args, **kwargs)
+    return wrapper
+
+
+def property_last_modified(request, pk):
+    # الوقت لا يميّز المستخدم كما يفعل ETag، فلا يُرسل للمسجلين حتى لا تُعاد لهم نسخة غيرهم
+    if request.user.is_authenticated:
+        return None
+    row = detail_validators(request, pk)
+    if row is None:
+        return None
+    return max(value for value in (row['updated_at'], row['last_image'], row['owner__updated_at']) if value)
+
+
+def property_etag(request, pk):
+    row = detail_validators(request, pk)
+    if row is None:
+        return None
+    # الصفحة تختلف حسب المستخدم (أزرار الطلب وشريط التنقل)
+    viewer = f'{request.user.pk}:{request.user.user_type}' if request.user.is_authenticated else 'anonymous'
+    parts = [pk, row['updated_at'], row['last_image'], row['image_count'], row['owner__updated_at'], viewer]
+    return hashlib.md5(':'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def shared_cache_for_anonymous(view_func):
+    """
+    يسمح للمخابئ المشتركة (CDN/Proxy) بحفظ الصفحة للزوار غير المسجلين،
+    ويجعلها خاصة بالمتصفح للمستخدمين المسجلين. ينطبق أيضاً على ردود 304.
+    """
+    def patch(response, user):
+        if response.status_code in (200, 304):
+            if user.is_authenticated:
+                patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+            else:
+                patch_cache_control(
+                    response, public=True, max_age=0, must_revalidate=True,
+                    s_maxage=getattr(settings, 'PROPERTY_DETAIL_SHARED_MAX_AGE', 0),
+                )
+            patch_vary_headers(response, ('Cookie',))
+        return response
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            response = await view_func(request, *args, **kwargs)
+            return patch(response, await request.auser())
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        return patch(view_func(request, *args, **kwargs), request.user)
+    return wrapper
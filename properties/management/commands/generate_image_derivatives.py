@@ -0,0 +1,34 @@
+from concurrent.futures import as_completed
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from properties import thumbnails
+from properties.models import PropertyImage, PropertyRequestImage
+
+
+class Command(BaseCommand):
+    help = 'توليد النسخ المصغرة وWebP للصور المرفوعة سابقاً'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='إعادة التوليد حتى لو كانت النسخ موجودة')
+
+    def handle(self, *args, **options):
+        names = set(PropertyImage.objects.values_list('image', flat=True))
+        names.update(PropertyRequestImage.objects.values_list('image', flat=True))
+        names.update(get_user_model().objects.exclude(profile_image='').values_list('profile_image', flat=True))
+        names.discard(None)
+        names.discard('')
+
+        futures = thumbnails.submit(sorted(names), force=options['force'])
+        failed = 0
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f'فشل التوليد: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'تم توليد {len(futures) - failed} صورة، وتخطي {len(names) - len(futures)}، وفشل {failed}'
+        ))
@@ -0,0 +1,230 @@
+"""
+بيانات تجريبية بأي حجم لاختبارات الحمل: مستخدمون وعقارات وصورها وطلبات عرض
+وطلبات إيجار، كلها بـ bulk_create.
+
+العقارات تُقسم إلى أجزاء (shards) ثابتة الحجم، لكل جزء مولد عشوائي خاص به
+(من --seed ورقم الجزء) ومجال معرّفات خاص به، فالنتيجة نفسها مهما كان عدد
+العمليات. مع --workers أكبر من 1 تكتب كل عملية أجزاءها في ملف SQLite مستقل
+ثم تُدمج في القاعدة بـ INSERT ... SELECT.
+"""
+import io
+import multiprocessing
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Max
+
+from properties.models import Property, PropertyImage, PropertyRequest, RentalRequest
+from properties.signals import invalidate_listings
+from properties.utils import add_months, city_key
+from users.models import User
+
+# عدد العقارات في الجزء؛ ثابت حتى لا تتغير البيانات بتغير عدد العمليات
+SHARD_SIZE = 10000
+MAX_IMAGES = 3
+PASSWORD = 'password123'
+STAFF_USERNAME = 'sample-staff'
+# تواريخ الإيجار حول تاريخ ثابت لا حول تاريخ التشغيل، فالبذرة نفسها تعطي البيانات نفسها في أي يوم
+EPOCH = date(2026, 1, 1)
+
+CITIES = ['الرياض', 'جدة', 'الدمام', 'مكة المكرمة', 'المدينة المنورة', 'الخبر', 'الطائف', 'أبها']
+TYPES = [value for value, _ in Property.PROPERTY_TYPES]
+WORDS = ['شقة', 'فيلا', 'واسعة', 'مفروشة', 'حديثة', 'قريبة', 'من', 'الخدمات', 'إطلالة', 'هادئة', 'مكتب', 'مستودع']
+
+# الجداول التي تكتبها الأجزاء، بترتيب الإدراج
+SHARD_MODELS = [Property, PropertyImage, PropertyRequest, RentalRequest]
+
+
+def sizes(scale):
+    """عدد المالكين والعملاء لكل حجم"""
+    return max(1, scale // 50), max(1, scale // 20)
+
+
+def shard_bases(shard, bases):
+    """أول معرّف لكل جدول في الجزء؛ المجالات لا تتداخل بين الأجزاء"""
+    return {
+        Property: bases[Property] + shard * SHARD_SIZE,
+        PropertyImage: bases[PropertyImage] + shard * SHARD_SIZE * MAX_IMAGES,
+        PropertyRequest: bases[PropertyRequest] + shard * (SHARD_SIZE // 5),
+        RentalRequest: bases[RentalRequest] + shard * (SHARD_SIZE // 2),
+    }
+
+
+def build_shard(shard, scale, seed, bases, owners, clients, epoch=EPOCH):
+    """صفوف جزء واحد لكل جدول؛ دالة نقية تعتمد فقط على معاملاتها"""
+    rng = random.Random(f'{seed}:{shard}')
+    count = min(SHARD_SIZE, scale - shard * SHARD_SIZE)
+    ids = shard_bases(shard, bases)
+
+    def text(words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+    properties, images = [], []
+    image_id = ids[PropertyImage]
+    for pk in range(ids[Property], ids[Property] + count):
+        city = rng.choice(CITIES)
+        image_ids = range(image_id, image_id + rng.randint(1, MAX_IMAGES))
+        image_id = image_ids.stop
+        properties.append(Property(
+            pk=pk, owner_id=rng.choice(owners), title=text(3), description=text(20),
+            property_type=rng.choice(TYPES), address=text(2), city=city, city_normalized=city_key(city),
+            area=rng.randint(50, 600), bedrooms=rng.randint(0, 6), bathrooms=rng.randint(1, 4),
+            price=Decimal(rng.randint(1000, 30000)), is_approved=rng.random() < 0.9, main_image_id=image_ids[0],
+        ))
+        images += [
+            PropertyImage(pk=index, property_id=pk, image=f'properties/sample_{index % 50}.jpg', is_main=index == image_ids[0])
+            for index in image_ids
+        ]
+
+    requests = [
+        PropertyRequest(
+            pk=pk, owner_id=rng.choice(owners), title=text(3), description=text(20), property_type=rng.choice(TYPES),
+            address=text(2), city=rng.choice(CITIES), area=rng.randint(50, 600), price=Decimal(rng.randint(1000, 30000)),
+            status=rng.choice(['pending', 'pending', 'pending', 'approved', 'rejected']),
+        )
+        for pk in range(ids[PropertyRequest], ids[PropertyRequest] + count // 5)
+    ]
+
+    rentals = []
+    for index in range(count // 2):
+        start = epoch + timedelta(days=rng.randint(-365, 365))
+        months = rng.randint(1, 12)
+        # طلبات الإيجار أقل من العقارات فلكل عقار طلب واحد على الأكثر، ولا تتداخل فترتان مشغولتان
+        occupying = index % 4 == 0
+        property_obj = properties[index % count]
+        rentals.append(RentalRequest(
+            pk=ids[RentalRequest] + index, client_id=rng.choice(clients), property_id=property_obj.pk,
+            property_owner_id=property_obj.owner_id, message=text(8), preferred_start_date=start, duration_months=months, end_date=add_months(start, months),
+            status='approved' if occupying else rng.choice(['pending', 'pending', 'rejected']),
+        ))
+    return {Property: properties, PropertyImage: images, PropertyRequest: requests, RentalRequest: rentals}
+
+
+def write_shard(rows, using, batch_size):
+    with transaction.atomic(using=using):
+        for model in SHARD_MODELS:
+            model.objects.using(using).bulk_create(rows[model], batch_size=batch_size)
+
+
+def write_shard_file(path, shard, scale, seed, bases, owners, clients, epoch, batch_size):
+    """تعمل داخل عملية منفصلة: تكتب الجزء في ملف SQLite خاص به"""
+    alias = f'shard{shard}'
+    connections.settings[alias] = {**connections.settings['default'], 'NAME': path}
+    try:
+        write_shard(build_shard(shard, scale, seed, bases, owners, clients, epoch), alias, batch_size)
+    finally:
+        connections[alias].close()
+    return shard, path
+
+
+class Command(BaseCommand):
+    help = 'توليد بيانات تجريبية بأي حجم (--scale عقار) بشكل حتمي لاختبارات الحمل'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=100, help='عدد العقارات (مثلاً 10000 أو 1000000)')
+        parser.add_argument('--seed', type=int, default=0, help='نفس البذرة تعطي نفس البيانات')
+        parser.add_argument(
+            '--epoch', type=date.fromisoformat, default=EPOCH,
+            help='التاريخ الذي تُولد حوله فترات الإيجار (YYYY-MM-DD)',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000, help='عدد الصفوف في كل INSERT')
+        parser.add_argument('--workers', type=int, default=1, help='عمليات توليد متوازية (SQLite فقط)')
+
+    def handle(self, *args, **options):
+        scale, seed, epoch, workers = options['scale'], options['seed'], options['epoch'], options['workers']
+        if User.objects.filter(username=STAFF_USERNAME).exists():
+            self.stdout.write(self.style.WARNING('البيانات التجريبية موجودة بالفعل'))
+            return
+        database = connections['default'].settings_dict
+        if workers > 1 and (database['ENGINE'] != 'django.db.backends.sqlite3' or connections['default'].is_in_memory_db()):
+            raise CommandError('--workers يحتاج قاعدة SQLite في ملف')
+
+        started = time.monotonic()
+        owners, clients = self.create_users(scale, seed, options['batch_size'])
+        bases = {model: (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1 for model in SHARD_MODELS}
+        shards = range(-(-scale // SHARD_SIZE))
+        if workers > 1:
+            self.write_in_processes(shards, scale, seed, epoch, bases, owners, clients, options['batch_size'], workers)
+        else:
+            for shard in shards:
+                write_shard(build_shard(shard, scale, seed, bases, owners, clients, epoch), 'default', options['batch_size'])
+                self.progress(shard, shards)
+
+        for command in ('rebuild_search_index', 'rebuild_facets', 'reconcile_counters'):
+            call_command(command, stdout=self.stdout if options['verbosity'] > 1 else io.StringIO())
+        invalidate_listings()
+        self.stdout.write(self.style.SUCCESS(
+            f'تم توليد {scale} عقار و{len(owners)} مالك و{len(clients)} عميل '
+            f'في {time.monotonic() - started:.1f} ثانية (كلمة المرور: {PASSWORD})'
+        ))
+
+    def create_users(self, scale, seed, batch_size):
+        owners, clients = sizes(scale)
+        # تجزئة كلمة المرور مرة واحدة: PBKDF2 لكل مستخدم يستغرق دقائق مع الأعداد الكبيرة
+        password = make_password(PASSWORD, salt=f'sample{seed}')
+        users = [User(username=STAFF_USERNAME, is_staff=True, first_name='موظف')]
+        users += [User(username=f'sample-owner{index}', user_type='owner', first_name='مالك') for index in range(owners)]
+        users += [User(username=f'sample-client{index}', user_type='client', first_name='عميل') for index in range(clients)]
+        for user in users:
+            user.password, user.email, user.is_verified = password, f'{user.username}@example.com', True
+        User.objects.bulk_create(users, batch_size=batch_size)
+        ids = dict(User.objects.filter(username__startswith='sample-').values_list('username', 'pk'))
+        return (
+            [ids[f'sample-owner{index}'] for index in range(owners)],
+            [ids[f'sample-client{index}'] for index in range(clients)],
+        )
+
+    def write_in_processes(self, shards, scale, seed, epoch, bases, owners, clients, batch_size, workers):
+        main = connections['default'].settings_dict['NAME']
+        connections.close_all()
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for shard in shards:
+                # جداول الجزء بنفس أعمدة القاعدة دون قيود، فالمفاتيح الأجنبية تشير إلى صفوف في أجزاء أخرى
+                paths.append(str(Path(directory) / f'shard{shard}.sqlite3'))
+                with closing(sqlite3.connect(paths[-1])) as connection:
+                    connection.execute('ATTACH DATABASE ? AS main_db', [str(main)])
+                    for model in SHARD_MODELS:
+                        table = model._meta.db_table
+                        connection.execute(f'CREATE TABLE "{table}" AS SELECT * FROM main_db."{table}" WHERE 0')
+
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=django.setup) as pool:
+                futures = [
+                    pool.submit(write_shard_file, path, shard, scale, seed, bases, owners, clients, epoch, batch_size)
+                    for shard, path in zip(shards, paths)
+                ]
+                # الدمج بالترتيب بينما تكتب العمليات الأجزاء التالية
+                for future in futures:
+                    shard, path = future.result()
+                    self.merge(path)
+                    Path(path).unlink()
+                    self.progress(shard, shards)
+
+    def merge(self, path):
+        connection = connections['default']
+        with connection.cursor() as cursor:
+            cursor.execute('ATTACH DATABASE %s AS shard', [path])
+            try:
+                with transaction.atomic():
+                    for model in SHARD_MODELS:
+                        table = model._meta.db_table
+                        cursor.execute(f'INSERT INTO "{table}" SELECT * FROM shard."{table}"')
+            finally:
+                cursor.execute('DETACH DATABASE shard')
+
+    def progress(self, shard, shards):
+        if len(shards) > 1:
+            self.stdout.write(f'الجزء {shard + 1}/{len(shards)}')
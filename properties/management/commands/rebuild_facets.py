@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from properties import facets
+
+
+class Command(BaseCommand):
+    help = 'إعادة بناء جدول عدادات فلاتر قائمة العقارات من الصفر'
+
+    def handle(self, *args, **options):
+        count = facets.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'تمت إعادة بناء {count} عداد'))
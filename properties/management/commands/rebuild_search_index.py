@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from properties.search import SEARCH_INDEXES
+
+
+class Command(BaseCommand):
+    help = 'إعادة بناء فهارس البحث النصي (FTS5) للعقارات وطلبات العرض'
+
+    def handle(self, *args, **options):
+        for index in SEARCH_INDEXES:
+            count = index.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'{index.table}: {count}'))
@@ -0,0 +1,39 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.routers import PRIMARY, replicas
+
+
+def copy_database(source, target):
+    """
+    نسخ قاعدة SQLite كاملة إلى ملف النسخة المتماثلة بواجهة backup، فتُقرأ لقطة
+    متسقة من الرئيسية دون إيقاف الكتابة عليها، وتبقى اتصالات النسخة المفتوحة صالحة.
+    """
+    with closing(sqlite3.connect(source)) as primary, closing(sqlite3.connect(target, timeout=20)) as replica:
+        primary.backup(replica)
+
+
+class Command(BaseCommand):
+    help = 'مزامنة النسخ المتماثلة (DATABASE_REPLICAS) مع القاعدة الرئيسية؛ بديل محلي للنسخ المتماثل'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='أسماء النسخ؛ الافتراضي كل DATABASE_REPLICAS')
+        parser.add_argument('--loop', action='store_true', help='الاستمرار في المزامنة دورياً')
+        parser.add_argument('--interval', type=float, default=2, help='ثوانٍ بين كل مزامنة في وضع --loop')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or replicas()
+        unknown = [alias for alias in aliases if alias not in settings.DATABASES or alias == PRIMARY]
+        if unknown:
+            raise CommandError(f'نسخ غير معرفة: {", ".join(unknown)}')
+        while True:
+            for alias in aliases:
+                copy_database(settings.DATABASES[PRIMARY]['NAME'], settings.DATABASES[alias]['NAME'])
+            if not options['loop']:
+                self.stdout.write(f'تمت مزامنة {len(aliases)} نسخة')
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+from properties.utils import normalize_arabic
+
+
+def fill_city_normalized(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    properties = list(Property.objects.only('pk', 'city'))
+    for property_obj in properties:
+        property_obj.city_normalized = normalize_arabic(property_obj.city)
+    Property.objects.bulk_update(properties, ['city_normalized'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='city_normalized',
+            field=models.CharField(default='', editable=False, help_text='المدينة بصيغة موحدة للبحث', max_length=100),
+        ),
+        migrations.RunPython(fill_city_normalized, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_approved', True), ('status', 'available')), fields=['created_at'], name='property_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_approved', True), ('status', 'available')), fields=['price'], name='property_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_approved', True), ('status', 'available')), fields=['property_type', 'price'], name='property_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_approved', True), ('status', 'available')), fields=['city_normalized', 'price'], name='property_city_price_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def create_search_indexes(apps, schema_editor):
+    from properties.search import SEARCH_INDEXES
+
+    for index in SEARCH_INDEXES:
+        index.create(schema_editor.connection)
+        model = apps.get_model('properties', index.model.__name__)
+        index.rebuild(model.objects.all(), connection=schema_editor.connection)
+
+
+def drop_search_indexes(apps, schema_editor):
+    from properties.search import SEARCH_INDEXES
+
+    for index in SEARCH_INDEXES:
+        index.drop(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_property_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_main_image(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    PropertyImage = apps.get_model('properties', 'PropertyImage')
+    main_images = {}
+    for image_id, property_id in PropertyImage.objects.order_by('-is_main', 'id').values_list('pk', 'property_id'):
+        main_images.setdefault(property_id, image_id)
+    properties = [Property(pk=pk, main_image_id=image_id) for pk, image_id in main_images.items()]
+    Property.objects.bulk_update(properties, ['main_image'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='main_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='properties.propertyimage'),
+        ),
+        migrations.RunPython(fill_main_image, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:25
+
+from django.db import migrations, models
+
+
+def build_facets(apps, schema_editor):
+    from properties import facets
+
+    facets.rebuild(apps.get_model('properties', 'Property'), apps.get_model('properties', 'PropertyFacet'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0005_property_main_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('type', 'النوع'), ('city', 'المدينة'), ('price', 'السعر')], max_length=10)),
+                ('value', models.CharField(max_length=100)),
+                ('label', models.CharField(blank=True, max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'عداد فلتر',
+                'verbose_name_plural': 'عدادات الفلاتر',
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'value'), name='unique_property_facet')],
+            },
+        ),
+        migrations.RunPython(build_facets, migrations.RunPython.noop),
+    ]
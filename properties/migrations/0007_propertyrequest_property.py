@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_approved_requests(apps, schema_editor):
+    """ربط الطلبات المقبولة سابقاً بعقاراتها (آخر استخدام لمطابقة العنوان والمالك)"""
+    Property = apps.get_model('properties', 'Property')
+    PropertyRequest = apps.get_model('properties', 'PropertyRequest')
+    linked = set()
+    requests = []
+    for property_request in PropertyRequest.objects.filter(status='approved').order_by('id'):
+        property_id = (
+            Property.objects.filter(owner_id=property_request.owner_id, title=property_request.title)
+            .exclude(pk__in=linked).order_by('id').values_list('pk', flat=True).first()
+        )
+        if property_id is not None:
+            linked.add(property_id)
+            property_request.property_id = property_id
+            requests.append(property_request)
+    PropertyRequest.objects.bulk_update(requests, ['property'], batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_property_facets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyrequest',
+            name='property',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='source_request', to='properties.property'),
+        ),
+        migrations.RunPython(link_approved_requests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0007_propertyrequest_property'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertyrequest',
+            index=models.Index(fields=['status', 'created_at'], name='propertyrequest_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentalrequest',
+            index=models.Index(fields=['status', 'created_at'], name='rentalrequest_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+from properties.utils import add_months
+
+
+def fill_end_date(apps, schema_editor):
+    RentalRequest = apps.get_model('properties', 'RentalRequest')
+    rentals = []
+    for rental in RentalRequest.objects.only('preferred_start_date', 'duration_months').iterator(chunk_size=2000):
+        rental.end_date = add_months(rental.preferred_start_date, rental.duration_months)
+        rentals.append(rental)
+    RentalRequest.objects.bulk_update(rentals, ['end_date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0008_request_queue_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rentalrequest',
+            name='end_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_end_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='rentalrequest',
+            index=models.Index(condition=models.Q(('status', 'approved'), ('status', 'completed'), _connector='OR'), fields=['property', 'preferred_start_date', 'end_date'], name='rental_period_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0009_rentalrequest_end_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_type', models.CharField(choices=[('property', 'طلب عرض عقار'), ('rental', 'طلب إيجار')], max_length=10)),
+                ('request_id', models.PositiveBigIntegerField()),
+                ('from_status', models.CharField(max_length=20)),
+                ('to_status', models.CharField(max_length=20)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('latency', models.DurationField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_transitions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'انتقال حالة طلب',
+                'verbose_name_plural': 'سجل انتقالات الطلبات',
+                'indexes': [models.Index(fields=['request_type', 'request_id'], name='transition_request_idx'), models.Index(fields=['created_at'], name='transition_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0010_request_transition'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertyrequest',
+            index=models.Index(fields=['owner', 'created_at'], name='propertyrequest_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentalrequest',
+            index=models.Index(fields=['client', 'created_at'], name='rentalrequest_client_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 22:17
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0011_activity_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rentalrequest',
+            name='duration_months',
+            field=models.IntegerField(help_text='مدة الإيجار بالأشهر', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(120)]),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from properties.utils import city_key
+
+
+def fill_city_key(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    properties = list(Property.objects.only('pk', 'city'))
+    for property_obj in properties:
+        property_obj.city_normalized = city_key(property_obj.city)
+    Property.objects.bulk_update(properties, ['city_normalized'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0012_rentalrequest_duration_bounds'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_city_key, migrations.RunPython.noop),
+    ]
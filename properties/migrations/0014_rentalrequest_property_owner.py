@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 22:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_property_owner(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    RentalRequest = apps.get_model('properties', 'RentalRequest')
+    owner = Property.objects.filter(pk=models.OuterRef('property_id')).values('owner_id')[:1]
+    RentalRequest.objects.update(property_owner_id=models.Subquery(owner))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0013_property_city_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rentalrequest',
+            name='property_owner',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='received_rental_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_property_owner, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='rentalrequest',
+            index=models.Index(fields=['property_owner', 'created_at'], name='rentalrequest_owner_idx'),
+        ),
+    ]
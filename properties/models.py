@@ -1,7 +1,51 @@
 from django.db import models
+from django.db.models import DEFERRED
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
+from .utils import add_months, city_key
 
-class Property(models.Model):
+# شرط ظهور العقار في القوائم العامة
+LISTED = models.Q(is_approved=True, status='available')
+
+# طلبات الإيجار التي تشغل العقار فعلياً في فترتها. يُكتب الشرط بـ OR وليس IN
+# لأن SQLite لا يستخدم الفهرس الجزئي مع IN (?, ?) بمعاملات مربوطة
+OCCUPYING_STATUSES = ('approved', 'completed')
+OCCUPYING = models.Q(status='approved') | models.Q(status='completed')
+
+# أطول مدة إيجار مقبولة بالأشهر، فتبقى نهاية الفترة (add_months) ضمن نطاق التواريخ
+MAX_RENTAL_MONTHS = 120
+
+class LoadedValuesMixin:
+    """يحتفظ بقيم الحقول كما هي في قاعدة البيانات لحساب التغييرات عند الحفظ"""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if value is not DEFERRED
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def stored_values(self, fields):
+        """قيم الحقول كما هي في قاعدة البيانات، أو None لسجل جديد"""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is not None and all(field in loaded for field in fields):
+            return {field: loaded[field] for field in fields}
+        if self._state.adding:
+            return None
+        return type(self)._default_manager.filter(pk=self.pk).values(*fields).first()
+
+class Property(LoadedValuesMixin, models.Model):
     PROPERTY_TYPES = (
         ('apartment', 'شقة'),
         ('villa', 'فيلا'),
@@ -22,21 +66,65 @@ class Property(models.Model):
     property_type = models.CharField(max_length=20, choices=PROPERTY_TYPES)
     address = models.TextField()
     city = models.CharField(max_length=100)
+    city_normalized = models.CharField(max_length=100, editable=False, default='', help_text="المدينة بصيغة موحدة للبحث")
     area = models.FloatField(help_text="المساحة بالمتر المربع")
     bedrooms = models.IntegerField(default=0)
     bathrooms = models.IntegerField(default=0)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     is_approved = models.BooleanField(default=False)
+    main_image = models.ForeignKey('PropertyImage', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.title} - {self.city}"
 
+    def refresh_main_image(self):
+        """تحديث مؤشر الصورة الرئيسية: الصورة المحددة كرئيسية وإلا أقدم صورة"""
+        self.main_image_id = self.images.order_by('-is_main', 'id').values_list('pk', flat=True).first()
+        Property.objects.filter(pk=self.pk).update(main_image_id=self.main_image_id)
+
+    def save(self, *args, **kwargs):
+        self.city_normalized = city_key(self.city)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'city' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'city_normalized'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "عقار"
         verbose_name_plural = "العقارات"
+        indexes = [
+            # فهارس جزئية على العقارات المعروضة تطابق فلاتر قائمة العقارات
+            models.Index(fields=['created_at'], name='property_listing_idx', condition=LISTED),
+            models.Index(fields=['price'], name='property_price_idx', condition=LISTED),
+            models.Index(fields=['property_type', 'price'], name='property_type_price_idx', condition=LISTED),
+            models.Index(fields=['city_normalized', 'price'], name='property_city_price_idx', condition=LISTED),
+        ]
+
+class PropertyFacet(models.Model):
+    """عدد العقارات المعروضة لكل نوع ومدينة وشريحة سعرية، يُحدّث تدريجياً"""
+    DIMENSIONS = (
+        ('type', 'النوع'),
+        ('city', 'المدينة'),
+        ('price', 'السعر'),
+    )
+
+    dimension = models.CharField(max_length=10, choices=DIMENSIONS)
+    value = models.CharField(max_length=100)
+    label = models.CharField(max_length=100, blank=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.get_dimension_display()}: {self.label or self.value} ({self.count})"
+
+    class Meta:
+        verbose_name = "عداد فلتر"
+        verbose_name_plural = "عدادات الفلاتر"
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'value'], name='unique_property_facet'),
+        ]
 
 class PropertyImage(models.Model):
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='images')
@@ -51,7 +139,7 @@ class PropertyImage(models.Model):
         verbose_name = "صورة العقار"
         verbose_name_plural = "صور العقارات"
 
-class PropertyRequest(models.Model):
+class PropertyRequest(LoadedValuesMixin, models.Model):
     """طلب عرض عقار من المالك"""
     STATUS_CHOICES = (
         ('pending', 'في الانتظار'),
@@ -71,6 +159,10 @@ class PropertyRequest(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     admin_notes = models.TextField(blank=True, null=True)
+    # العقار الذي أُنشئ عند قبول الطلب
+    property = models.OneToOneField(
+        Property, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='source_request'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -80,6 +172,12 @@ class PropertyRequest(models.Model):
     class Meta:
         verbose_name = "طلب عرض عقار"
         verbose_name_plural = "طلبات عرض العقارات"
+        indexes = [
+            # طابور الطلبات للموظفين: تصفية بالحالة وترتيب بالأحدث
+            models.Index(fields=['status', 'created_at'], name='propertyrequest_queue_idx'),
+            # سجل نشاط المالك (طلباتي)
+            models.Index(fields=['owner', 'created_at'], name='propertyrequest_owner_idx'),
+        ]
 
 class PropertyRequestImage(models.Model):
     property_request = models.ForeignKey(PropertyRequest, on_delete=models.CASCADE, related_name='images')
@@ -90,7 +188,7 @@ class PropertyRequestImage(models.Model):
     def __str__(self):
         return f"صورة طلب: {self.property_request.title}"
 
-class RentalRequest(models.Model):
+class RentalRequest(LoadedValuesMixin, models.Model):
     """طلب إيجار من العميل"""
     STATUS_CHOICES = (
         ('pending', 'في الانتظار'),
@@ -101,9 +199,19 @@ class RentalRequest(models.Model):
 
     client = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='rental_requests')
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='rental_requests')
+    # مالك العقار منسوخاً منه عند الحفظ، ليُقرأ سجل الطلبات على عقاراته بفهرس (المالك، التاريخ) دون ربط
+    property_owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, editable=False,
+        related_name='received_rental_requests',
+    )
     message = models.TextField(help_text="رسالة من العميل")
     preferred_start_date = models.DateField()
-    duration_months = models.IntegerField(help_text="مدة الإيجار بالأشهر")
+    duration_months = models.IntegerField(
+        help_text="مدة الإيجار بالأشهر",
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_RENTAL_MONTHS)],
+    )
+    # نهاية الفترة (غير مشمولة)، تُحسب من البداية والمدة عند الحفظ
+    end_date = models.DateField(null=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     admin_notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -112,6 +220,80 @@ class RentalRequest(models.Model):
     def __str__(self):
         return f"طلب إيجار: {self.property.title} - {self.client.username}"
 
+    def clean(self):
+        # الإيجارات الفعلية لعقار واحد لا تتداخل؛ لوحة الإدارة تتحقق هنا قبل قبول الطلب
+        super().clean()
+        if self.status not in OCCUPYING_STATUSES or not self.preferred_start_date:
+            return
+        # المدة خارج الحدود مرفوضة في clean_fields قبل هذا
+        if self.duration_months is None or not 1 <= self.duration_months <= MAX_RENTAL_MONTHS:
+            return
+        from .availability import has_conflict
+
+        end = add_months(self.preferred_start_date, self.duration_months)
+        if self.property_id and has_conflict(self.property_id, self.preferred_start_date, end, exclude_pk=self.pk):
+            raise ValidationError({'status': 'العقار مؤجر في جزء من هذه الفترة بطلب آخر مقبول'})
+
+    def save(self, *args, **kwargs):
+        if self.preferred_start_date and self.duration_months is not None:
+            self.end_date = add_months(self.preferred_start_date, self.duration_months)
+        if self.property_id is not None:
+            self.property_owner_id = self.property.owner_id
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'preferred_start_date', 'duration_months'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'end_date'}
+        if update_fields is not None and {'property', 'property_id'} & set(update_fields):
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'property_owner'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "طلب إيجار"
         verbose_name_plural = "طلبات الإيجار"
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='rentalrequest_queue_idx'),
+            models.Index(fields=['client', 'created_at'], name='rentalrequest_client_idx'),
+            models.Index(fields=['property_owner', 'created_at'], name='rentalrequest_owner_idx'),
+            # فترات الإيجار الفعلية لكل عقار مرتبة بالبداية، للبحث عن التعارض بخطوة واحدة في الفهرس
+            models.Index(
+                fields=['property', 'preferred_start_date', 'end_date'], name='rental_period_idx', condition=OCCUPYING,
+            ),
+        ]
+
+class RequestTransition(models.Model):
+    """سجل إضافة فقط لانتقالات حالة الطلبات: من غيّر ماذا ومتى، وكم انتظر الطلب"""
+    REQUEST_TYPES = (
+        ('property', 'طلب عرض عقار'),
+        ('rental', 'طلب إيجار'),
+    )
+
+    request_type = models.CharField(max_length=10, choices=REQUEST_TYPES)
+    request_id = models.PositiveBigIntegerField()
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='request_transitions'
+    )
+    from_status = models.CharField(max_length=20)
+    to_status = models.CharField(max_length=20)
+    # مدينة العقار وقت الانتقال، لتجميع زمن المراجعة حسب المدينة
+    city = models.CharField(max_length=100, blank=True)
+    # المدة منذ إنشاء الطلب حتى هذا الانتقال
+    latency = models.DurationField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.get_request_type_display()} {self.request_id}: {self.from_status} → {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('سجل الانتقالات لا يُعدّل')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('سجل الانتقالات لا يُحذف')
+
+    class Meta:
+        verbose_name = "انتقال حالة طلب"
+        verbose_name_plural = "سجل انتقالات الطلبات"
+        indexes = [
+            models.Index(fields=['request_type', 'request_id'], name='transition_request_idx'),
+            models.Index(fields=['created_at'], name='transition_created_idx'),
+        ]
@@ -0,0 +1,139 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """يحفظ الأوقات بدقة الميكروثانية، فالمؤشر يجب أن يطابق قيمة الصف تماماً"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage:
+    """صفحة من نتائج الترقيم بالمؤشر"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    ترقيم بالمؤشر (keyset) على مفاتيح الترتيب بدلاً من OFFSET وCOUNT(*)،
+    فتبقى تكلفة الصفحة ثابتة مهما كان عمقها.
+    يجب أن ينتهي الترتيب بحقل فريد مثل id.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = [(key.lstrip('-'), key.startswith('-')) for key in ordering]
+
+    def get_page(self, cursor=None):
+        queryset, values, forward = self._page_query(cursor)
+        return self._make_page(list(queryset), values, forward)
+
+    async def aget_page(self, cursor=None):
+        """مثل get_page باستخدام واجهة ORM غير المتزامنة"""
+        queryset, values, forward = self._page_query(cursor)
+        return self._make_page([row async for row in queryset], values, forward)
+
+    def _page_query(self, cursor):
+        try:
+            values, forward = self.decode_cursor(cursor) if cursor else (None, True)
+        except InvalidCursor:
+            values, forward = None, True
+
+        ordering = self.ordering if forward else [(name, not desc) for name, desc in self.ordering]
+        queryset = self.queryset.order_by(*[('-' if desc else '') + name for name, desc in ordering])
+        if values is not None:
+            queryset = queryset.filter(self._after(values, ordering))
+        # نجلب صفاً إضافياً لمعرفة وجود صفحة تالية دون COUNT(*)
+        return queryset[:self.per_page + 1], values, forward
+
+    def _make_page(self, rows, values, forward):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_next:
+                next_cursor = self.encode_cursor(rows[-1], forward=True)
+            if has_previous:
+                previous_cursor = self.encode_cursor(rows[0], forward=False)
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+    def _after(self, values, ordering):
+        """الصفوف التي تلي القيم المعطاة في الترتيب المحدد"""
+        condition = Q()
+        for index, (name, desc) in enumerate(ordering):
+            equal = {other: values[i] for i, (other, _) in enumerate(ordering[:index])}
+            condition |= Q(**equal, **{f'{name}__{"lt" if desc else "gt"}': values[index]})
+        # حد إضافي على المفتاح الأول ليبدأ الفهرس من موضع المؤشر مباشرة
+        name, desc = ordering[0]
+        return Q(**{f'{name}__{"lte" if desc else "gte"}': values[0]}) & condition
+
+    def encode_cursor(self, obj, forward=True):
+        payload = {
+            'v': [getattr(obj, name) for name, _ in self.ordering],
+            'd': 'n' if forward else 'p',
+        }
+        data = json.dumps(payload, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            payload = json.loads(data)
+            raw_values, direction = payload['v'], payload['d']
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+        if direction not in ('n', 'p') or not isinstance(raw_values, list) or len(raw_values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+
+        values = []
+        for (name, _), value in zip(self.ordering, raw_values):
+            try:
+                field = self.queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # قيمة محسوبة (annotation) تُحفظ كما هي
+                values.append(value)
+                continue
+            try:
+                values.append(field.to_python(value))
+            except ValidationError:
+                raise InvalidCursor(cursor)
+        return values, direction == 'n'
@@ -0,0 +1,132 @@
+import re
+
+from django.db import connections, router
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Property, PropertyRequest
+from .utils import normalize_arabic
+
+
+class SearchIndex:
+    """
+    فهرس بحث نصي كامل على جدول FTS5 موازٍ لجدول النموذج.
+    تُخزن النصوص بعد توحيدها (normalize_arabic) ويُرتب الناتج حسب bm25.
+    """
+
+    def __init__(self, model, table, fields, weights):
+        self.model = model
+        self.table = table
+        self.fields = fields
+        self.weights = weights
+
+    def _connection(self):
+        return connections[router.db_for_write(self.model)]
+
+    def _enabled(self, connection):
+        return connection.vendor == 'sqlite'
+
+    def create(self, connection):
+        if self._enabled(connection):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                    f"{', '.join(self.fields)}, prefix='2 3')"
+                )
+
+    def drop(self, connection):
+        if self._enabled(connection):
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def _rows(self, objects):
+        return [
+            (obj.pk, *[normalize_arabic(getattr(obj, field)) for field in self.fields])
+            for obj in objects
+        ]
+
+    def index(self, objects, connection=None):
+        """إضافة السجلات إلى الفهرس أو تحديثها"""
+        connection = connection or self._connection()
+        rows = self._rows(objects)
+        if not rows or not self._enabled(connection):
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(row[0],) for row in rows])
+            placeholders = ', '.join(['%s'] * (len(self.fields) + 1))
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, {', '.join(self.fields)}) VALUES ({placeholders})",
+                rows,
+            )
+
+    def remove(self, pks, connection=None):
+        connection = connection or self._connection()
+        if not self._enabled(connection):
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in pks])
+
+    def rebuild(self, queryset=None, batch_size=1000, connection=None):
+        """إعادة بناء الفهرس بالكامل من جدول النموذج"""
+        connection = connection or self._connection()
+        if not self._enabled(connection):
+            return 0
+        queryset = queryset if queryset is not None else self.model._default_manager.all()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        count, batch = 0, []
+        for obj in queryset.only('pk', *self.fields).iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                self.index(batch, connection)
+                count, batch = count + len(batch), []
+        self.index(batch, connection)
+        return count + len(batch)
+
+    def match_expression(self, query):
+        """تحويل نص البحث إلى تعبير MATCH: كل كلمة بادئة، والكلمات مجتمعة بـ AND"""
+        terms = re.findall(r'\w+', normalize_arabic(query))
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def condition(self, query, using='default'):
+        """شرط تصفية بالسجلات المطابقة لنص البحث"""
+        expression = self.match_expression(query)
+        if not expression:
+            return Q()
+        if not self._enabled(connections[using]):
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f'{field}__icontains': query})
+            return condition
+        matches = RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [expression])
+        return Q(pk__in=matches)
+
+    def filter(self, queryset, query):
+        """تصفية الاستعلام بنص البحث وإضافة search_rank (الأقل هو الأفضل)"""
+        expression = self.match_expression(query)
+        queryset = queryset.filter(self.condition(query, queryset.db))
+        if not expression or not self._enabled(connections[queryset.db]):
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+        weights = ', '.join(str(weight) for weight in self.weights)
+        model_table = self.model._meta.db_table
+        pk_column = self.model._meta.pk.column
+        rank = RawSQL(
+            f'SELECT bm25({self.table}, {weights}) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = "{model_table}"."{pk_column}"',
+            [expression],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(search_rank=rank)
+
+
+property_index = SearchIndex(
+    Property, 'properties_property_fts',
+    fields=('title', 'description', 'address'), weights=(10.0, 1.0, 2.0),
+)
+property_request_index = SearchIndex(
+    PropertyRequest, 'properties_propertyrequest_fts',
+    fields=('title', 'description', 'address'), weights=(10.0, 1.0, 2.0),
+)
+
+SEARCH_INDEXES = (property_index, property_request_index)
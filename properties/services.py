@@ -0,0 +1,158 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import transitions
+from .availability import annotate_conflicts
+from .models import Property, PropertyImage, PropertyRequest, PropertyRequestImage, RentalRequest
+from .signals import bulk_created, status_changed
+from .utils import add_months, city_key
+
+# الحقول المنسوخة من طلب العرض إلى العقار
+COPIED_FIELDS = (
+    'owner_id', 'title', 'description', 'property_type', 'address', 'city',
+    'area', 'bedrooms', 'bathrooms', 'price',
+)
+
+# الطلب المقبول بلا عقار هو حالة لوحة Django الإدارية بعد تغيير الحالة يدوياً
+APPROVABLE_STATUSES = ('pending', 'approved')
+
+# نتائج العمليات الجماعية لكل عنصر
+NOT_FOUND = 'not_found'
+SKIPPED = 'skipped'
+CONFLICT = 'conflict'
+UNCHANGED = 'unchanged'
+
+
+def _outcomes(ids, rows, changed, outcome):
+    """نتيجة كل معرّف مطلوب: outcome للمعدّل، وunchanged/skipped/not_found لغيره"""
+    results = {}
+    for pk in ids if ids is not None else rows:
+        if pk in changed:
+            results[pk] = outcome
+        elif pk not in rows:
+            results[pk] = NOT_FOUND
+        else:
+            results[pk] = UNCHANGED if rows[pk] == outcome else SKIPPED
+    return results
+
+
+def _locked_rows(queryset, ids, fields):
+    queryset = queryset.select_for_update()
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return {row[0]: row[1:] for row in queryset.values_list('pk', *fields)}
+
+
+def approve_property_requests(queryset=None, ids=None, actor=None):
+    """
+    قبول مجموعة طلبات عرض في معاملة واحدة: إدخال جماعي للعقارات والصور
+    وتحديث جماعي للطلبات. الطلب المرتبط بعقار مسبقاً لا يتغير.
+    يُرجع {معرّف الطلب: النتيجة}.
+    """
+    queryset = PropertyRequest.objects.all() if queryset is None else queryset
+    with transaction.atomic(), transitions.recording(actor):
+        rows = _locked_rows(queryset, ids, ('status', 'property_id'))
+        pending = [pk for pk, (status, property_id) in rows.items() if status in APPROVABLE_STATUSES and property_id is None]
+        requests = list(PropertyRequest.objects.filter(pk__in=pending).order_by('pk'))
+
+        properties = Property.objects.bulk_create([
+            Property(
+                is_approved=True,
+                city_normalized=city_key(request.city),
+                **{field: getattr(request, field) for field in COPIED_FIELDS},
+            )
+            for request in requests
+        ])
+        property_by_request = {request.pk: property_obj for request, property_obj in zip(requests, properties)}
+
+        images = PropertyImage.objects.bulk_create([
+            PropertyImage(property=property_by_request[image.property_request_id], image=image.image, is_main=image.is_main)
+            for image in PropertyRequestImage.objects.filter(property_request_id__in=pending).order_by('pk')
+        ])
+        # الصورة الرئيسية: المحددة كرئيسية وإلا أقدم صورة (كما في refresh_main_image)
+        main_images = {}
+        for image in sorted(images, key=lambda image: (not image.is_main, image.pk)):
+            main_images.setdefault(image.property_id, image)
+        for image in main_images.values():
+            image.property.main_image = image
+        Property.objects.bulk_update([image.property for image in main_images.values()], ['main_image'], batch_size=500)
+
+        now = timezone.now()
+        for request in requests:
+            request.status = 'approved'
+            request.property = property_by_request[request.pk]
+            request.updated_at = now
+        PropertyRequest.objects.bulk_update(requests, ['status', 'property', 'updated_at'], batch_size=500)
+
+        if requests:
+            bulk_created.send(sender=Property, objects=properties)
+            status_changed.send(
+                sender=PropertyRequest, changes={pk: rows[pk][0] for pk in pending}, status='approved',
+            )
+
+    rows = {pk: 'approved' if property_id else status for pk, (status, property_id) in rows.items()}
+    return _outcomes(ids, rows, set(pending), 'approved')
+
+
+def approve_property_request(request_id, actor=None):
+    """
+    قبول طلب عرض عقار واحد. استدعاؤه مرة ثانية لا يغير شيئاً.
+    يُرجع (العقار، هل أُنشئ الآن).
+    """
+    outcome = approve_property_requests(ids=[request_id], actor=actor)[request_id]
+    if outcome == NOT_FOUND:
+        raise PropertyRequest.DoesNotExist(request_id)
+    property_obj = Property.objects.filter(source_request=request_id).first()
+    return property_obj, outcome == 'approved'
+
+
+def _set_pending_status(model, queryset, ids, status, actor):
+    """نقل الطلبات المعلقة إلى الحالة المعطاة بأمر UPDATE واحد"""
+    queryset = model.objects.all() if queryset is None else queryset
+    with transaction.atomic(), transitions.recording(actor):
+        rows = {pk: row[0] for pk, row in _locked_rows(queryset, ids, ('status',)).items()}
+        changed = [pk for pk, current in rows.items() if current == 'pending']
+        model.objects.filter(pk__in=changed).update(status=status, updated_at=timezone.now())
+        if changed:
+            status_changed.send(sender=model, changes={pk: 'pending' for pk in changed}, status=status)
+    return _outcomes(ids, rows, set(changed), status)
+
+
+def reject_property_requests(queryset=None, ids=None, actor=None):
+    return _set_pending_status(PropertyRequest, queryset, ids, 'rejected', actor)
+
+
+def approve_rental_requests(queryset=None, ids=None, actor=None):
+    """
+    قبول طلبات الإيجار المعلقة التي لا تتعارض فتراتها مع إيجار فعلي،
+    ولا مع طلب أقدم منها في الدفعة نفسها. المتعارضة نتيجتها conflict.
+    """
+    queryset = RentalRequest.objects.all() if queryset is None else queryset
+    with transaction.atomic(), transitions.recording(actor):
+        rows = {pk: row[0] for pk, row in _locked_rows(queryset, ids, ('status',)).items()}
+        candidates = annotate_conflicts(
+            RentalRequest.objects.filter(pk__in=[pk for pk, status in rows.items() if status == 'pending'])
+        ).order_by('created_at', 'pk')
+
+        changed, conflicts, booked = [], set(), {}
+        for rental in candidates:
+            start = rental.preferred_start_date
+            end = rental.end_date or add_months(start, rental.duration_months)
+            periods = booked.setdefault(rental.property_id, [])
+            if rental.has_conflict or any(other_start < end and start < other_end for other_start, other_end in periods):
+                conflicts.add(rental.pk)
+                continue
+            periods.append((start, end))
+            changed.append(rental.pk)
+
+        RentalRequest.objects.filter(pk__in=changed).update(status='approved', updated_at=timezone.now())
+        if changed:
+            status_changed.send(sender=RentalRequest, changes={pk: 'pending' for pk in changed}, status='approved')
+
+    results = _outcomes(ids, rows, set(changed), 'approved')
+    results.update({pk: CONFLICT for pk in conflicts})
+    return results
+
+
+def reject_rental_requests(queryset=None, ids=None, actor=None):
+    return _set_pending_status(RentalRequest, queryset, ids, 'rejected', actor)
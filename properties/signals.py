@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from users.notifications import notify, notify_many
+
+from . import facets, thumbnails, transitions
+from .cache import FEATURED_NAMESPACE, LISTINGS_NAMESPACE, bump_version
+from .models import OCCUPYING_STATUSES, Property, PropertyImage, PropertyRequest, PropertyRequestImage, RentalRequest
+from .search import property_index, property_request_index
+
+# العمليات الجماعية (bulk_create وupdate) لا تمر بـ save()، فتُرسل هذه الإشارات بدلاً من post_save
+# bulk_created: objects هي السجلات المضافة
+# status_changed: changes هي {المعرّف: الحالة السابقة}، وstatus هي الحالة الجديدة
+bulk_created = Signal()
+status_changed = Signal()
+
+
+def invalidate_listings():
+    # بعد الحفظ النهائي حتى لا يُخزَّن محتوى قديم تحت الإصدار الجديد
+    def bump():
+        bump_version(FEATURED_NAMESPACE)
+        bump_version(LISTINGS_NAMESPACE)
+    transaction.on_commit(bump)
+
+
+@receiver(pre_save, sender=Property)
+def property_saving(sender, instance, **kwargs):
+    instance._stored_facet_values = facets.stored_values(instance)
+    instance._stored_owner_id = (instance.stored_values(('owner_id',)) or {}).get('owner_id')
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, using, **kwargs):
+    property_index.index([instance])
+    # مالك العقار منسوخ في طلبات الإيجار عليه
+    if instance._stored_owner_id not in (None, instance.owner_id):
+        RentalRequest.objects.filter(property=instance).update(property_owner_id=instance.owner_id)
+    facets.update_counts([instance._stored_facet_values], [facets.current_values(instance)])
+    invalidate_listings()
+
+
+@receiver(post_delete, sender=Property)
+def property_deleted(sender, instance, using, **kwargs):
+    property_index.remove([instance.pk])
+    facets.update_counts([facets.stored_values(instance) or facets.current_values(instance)], [])
+    invalidate_listings()
+
+
+@receiver(bulk_created, sender=Property)
+def properties_bulk_created(sender, objects, **kwargs):
+    property_index.index(objects)
+    facets.update_counts([None] * len(objects), [facets.current_values(obj) for obj in objects])
+    invalidate_listings()
+
+
+@receiver(post_save, sender=PropertyRequest)
+def property_request_saved(sender, instance, using, **kwargs):
+    property_request_index.index([instance])
+
+
+@receiver(post_delete, sender=PropertyRequest)
+def property_request_deleted(sender, instance, using, **kwargs):
+    property_request_index.remove([instance.pk])
+
+
+# نصوص الإشعارات لكل انتقال في حالة الطلبات
+DECISION_MESSAGES = {
+    (PropertyRequest, 'approved'): ('تم قبول طلب عرض عقارك', 'تم قبول طلب عرض العقار "{title}" ونشره في الموقع.'),
+    (PropertyRequest, 'rejected'): ('تم رفض طلب عرض عقارك', 'نعتذر، تم رفض طلب عرض العقار "{title}".'),
+    (RentalRequest, 'approved'): ('تم قبول طلب الإيجار', 'تم قبول طلب إيجار العقار "{title}".'),
+    (RentalRequest, 'rejected'): ('تم رفض طلب الإيجار', 'نعتذر، تم رفض طلب إيجار العقار "{title}".'),
+}
+
+
+@receiver(status_changed, sender=PropertyRequest)
+@receiver(status_changed, sender=RentalRequest)
+def requests_decided(sender, changes, status, **kwargs):
+    if (sender, status) not in DECISION_MESSAGES:
+        return
+    subject, body = DECISION_MESSAGES[sender, status]
+    if sender is PropertyRequest:
+        rows = sender.objects.filter(pk__in=list(changes)).values_list('owner_id', 'title')
+    else:
+        rows = sender.objects.filter(pk__in=list(changes)).values_list('client_id', 'property__title')
+    notify_many((recipient_id, subject, body.format(title=title)) for recipient_id, title in rows)
+
+
+@receiver(status_changed, sender=PropertyRequest)
+@receiver(status_changed, sender=RentalRequest)
+def requests_transitioned(sender, changes, status, **kwargs):
+    transitions.record_changes(sender, changes, status)
+
+
+@receiver(pre_save, sender=PropertyRequest)
+@receiver(pre_save, sender=RentalRequest)
+def request_saving(sender, instance, **kwargs):
+    instance._stored_status = (instance.stored_values(('status',)) or {}).get('status')
+
+
+@receiver(post_save, sender=PropertyRequest)
+@receiver(post_save, sender=RentalRequest)
+def request_status_saved(sender, instance, created, **kwargs):
+    if not created and instance._stored_status != instance.status:
+        city = instance.city if sender is PropertyRequest else instance.property.city
+        transitions.record(sender, [(instance.pk, instance._stored_status, instance.created_at, city)], instance.status)
+
+
+@receiver(post_save, sender=RentalRequest)
+@receiver(post_delete, sender=RentalRequest)
+def rental_request_changed(sender, instance, **kwargs):
+    # الإيجارات الفعلية تغير نتائج فلتر التوفر في قائمة العقارات
+    if instance.status in OCCUPYING_STATUSES or getattr(instance, '_stored_status', None) in OCCUPYING_STATUSES:
+        invalidate_listings()
+
+
+@receiver(status_changed, sender=RentalRequest)
+def rentals_transitioned(sender, changes, status, **kwargs):
+    if status in OCCUPYING_STATUSES or any(old in OCCUPYING_STATUSES for old in changes.values()):
+        invalidate_listings()
+
+
+@receiver(post_save, sender=RentalRequest)
+def rental_request_created(sender, instance, created, **kwargs):
+    if created:
+        notify(
+            instance.property.owner,
+            'طلب إيجار جديد',
+            f'أرسل {instance.client.username} طلب إيجار للعقار "{instance.property.title}" '
+            f'يبدأ في {instance.preferred_start_date} لمدة {instance.duration_months} شهر.',
+        )
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+def property_image_changed(sender, instance, **kwargs):
+    Property(pk=instance.property_id).refresh_main_image()
+    invalidate_listings()
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_save, sender=PropertyRequestImage)
+def image_uploaded(sender, instance, **kwargs):
+    thumbnails.schedule(instance.image.name)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def profile_image_uploaded(sender, instance, **kwargs):
+    thumbnails.schedule(instance.profile_image.name)
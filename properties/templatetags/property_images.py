@@ -0,0 +1,11 @@
+from django import template
+
+from properties.thumbnails import picture_html
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, alt='', css_class='', sizes='100vw'):
+    """صورة متجاوبة من النسخ المصغرة مع الرجوع إلى الأصل قبل اكتمالها"""
+    return picture_html(field_file, alt, css_class, sizes)
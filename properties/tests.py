@@ -1,3 +1,985 @@
-from django.test import TestCase
+import base64
+import datetime
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from contextlib import closing
+from io import BytesIO, StringIO
+from unittest import mock
+from decimal import Decimal
+from pathlib import Path
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import Count, F
+from django.db.utils import ConnectionHandler
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import cache as tiered_cache, settings_production
+from core.cache import bump_version, get_version
+from core.routers import PIN_COOKIE, PrimaryReplicaRouter, replica_reads
+from users.models import User
+from .availability import annotate_conflicts, has_conflict, overlapping
+from .filters import available_properties, filter_properties
+from . import async_views, facets, services, thumbnails
+from .cache import FEATURED_NAMESPACE, featured_queryset, listing_key
+from .feed import feed_counts, feed_sources, get_feed_page
+from .models import MAX_RENTAL_MONTHS, OCCUPYING, Property, PropertyFacet, PropertyImage, PropertyRequest, PropertyRequestImage, RentalRequest
+from .management.commands import generate_sample_data
+from .management.commands.sync_replicas import copy_database
+from .pagination import CursorPaginator
+from .search import property_index
+from .utils import add_months, city_key, normalize_arabic
+
+PNG_BYTES = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=='
+)
+
+
+def create_property(owner, **kwargs):
+    data = {
+        'owner': owner,
+        'title': 'شقة للإيجار',
+        'description': 'شقة واسعة',
+        'property_type': 'apartment',
+        'address': 'حي النخيل',
+        'city': 'الرياض',
+        'area': 120,
+        'price': Decimal('2500.00'),
+        'is_approved': True,
+    }
+    data.update(kwargs)
+    return Property.objects.create(**data)
+
+
+class PropertyListingIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+
+    def test_normalize_arabic(self):
+        self.assertEqual(normalize_arabic('  مكّة المكرمة '), 'مكه المكرمه')
+        self.assertEqual(normalize_arabic('إبها'), normalize_arabic('ابها'))
+        self.assertEqual(normalize_arabic('Jeddah'), 'jeddah')
+
+    def test_city_filter_matches_letter_variants(self):
+        create_property(self.owner, city='مكة المكرمة')
+        create_property(self.owner, city='جدة')
+        properties = filter_properties(available_properties(), {'city': 'مكه'})
+        self.assertEqual([p.city for p in properties], ['مكة المكرمة'])
+
+    def test_city_filter_ignores_definite_article(self):
+        self.assertEqual(city_key('الرياض'), 'رياض')
+        self.assertEqual(city_key('مكة المكرمة'), 'مكه مكرمه')
+        # "ال" وحدها ليست أداة تعريف لكلمة
+        self.assertEqual(city_key('ال'), 'ال')
+        create_property(self.owner, city='الرياض')
+        create_property(self.owner, city='جدة')
+        for query in ('رياض', 'الرياض', 'ري'):
+            with self.subTest(query=query):
+                properties = filter_properties(available_properties(), {'city': query})
+                self.assertEqual([p.city for p in properties], ['الرياض'])
+
+    def test_filter_combinations_use_an_index(self):
+        combinations = [
+            {},
+            {'type': 'villa'},
+            {'city': 'الرياض'},
+            {'min_price': '1000'},
+            {'min_price': '1000', 'max_price': '5000'},
+            {'type': 'villa', 'max_price': '5000'},
+            {'city': 'الرياض', 'min_price': '1000', 'max_price': '5000'},
+            {'type': 'villa', 'city': 'الرياض', 'min_price': '1000'},
+        ]
+        for params in combinations:
+            with self.subTest(params=params):
+                plan = filter_properties(available_properties(), params).explain()
+                self.assertIn('USING INDEX property_', plan)
+                self.assertNotRegex(plan, r'SCAN properties_property(?! USING)')
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        for i in range(7):
+            create_property(owner, title=f'عقار {i}', price=Decimal(1000 + (i % 3) * 500))
+
+    def setUp(self):
+        # صفحات القائمة محفوظة في الذاكرة المؤقتة، ولا تُبطل بتراجع معاملة الاختبار
+        cache.clear()
+
+    def test_walks_forward_and_back(self):
+        expected = list(available_properties().order_by('price', 'id'))
+        paginator = CursorPaginator(available_properties(), 3, ordering=('price', 'id'))
+
+        pages, page = [], paginator.get_page()
+        while True:
+            pages.append(list(page))
+            if not page.has_next():
+                break
+            page = paginator.get_page(page.next_cursor)
+        self.assertEqual(sum(pages, []), expected)
+        self.assertFalse(paginator.get_page().has_previous())
+
+        previous = paginator.get_page(page.previous_cursor)
+        self.assertEqual(list(previous), pages[-2])
+        self.assertTrue(previous.has_next())
+
+    def test_rows_in_the_same_millisecond(self):
+        # JSON العادي في Django يقص الوقت إلى أجزاء الألف، فيتخطى المؤشر صفوف الجزء نفسه
+        created_at = timezone.make_aware(datetime.datetime(2026, 1, 1, 12, 0, 0, 123000))
+        for offset, pk in enumerate(Property.objects.order_by('id').values_list('pk', flat=True)):
+            Property.objects.filter(pk=pk).update(created_at=created_at + datetime.timedelta(microseconds=100 + offset))
+        expected = list(available_properties().order_by('-created_at', '-id'))
+        paginator = CursorPaginator(available_properties(), 2)
+
+        rows, page = [], paginator.get_page()
+        while True:
+            rows.extend(page)
+            if not page.has_next():
+                break
+            page = paginator.get_page(page.next_cursor)
+        self.assertEqual(rows, expected)
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = CursorPaginator(available_properties(), 3)
+        self.assertEqual(list(paginator.get_page('not-a-cursor')), list(paginator.get_page()))
+
+    def test_property_list_modes(self):
+        response = self.client.get(reverse('properties:property_list'), {'sort': 'price'})
+        self.assertTrue(response.context['cursor_pagination'])
+        self.assertEqual(len(response.context['page_obj']), 7)
+
+        response = self.client.get(reverse('properties:property_list'), {'page': '1'})
+        self.assertFalse(response.context['cursor_pagination'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 7)
+
+
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_normalized_and_ranked(self):
+        in_description = create_property(self.owner, title='عقار', description='فيلا قرب الحرم في مكة')
+        in_title = create_property(self.owner, title='فيلا مكّة الفاخرة', description='وصف')
+        create_property(self.owner, title='شقة', description='في جدة')
+
+        results = list(property_index.filter(available_properties(), 'مكه').order_by('search_rank', 'id'))
+        self.assertEqual(results, [in_title, in_description])
+
+    def test_index_follows_saves_and_deletes(self):
+        property_obj = create_property(self.owner, title='مكتب')
+        property_obj.title = 'مستودع كبير'
+        property_obj.save()
+        self.assertFalse(property_index.filter(Property.objects.all(), 'مكتب').exists())
+        self.assertTrue(property_index.filter(Property.objects.all(), 'مستودع').exists())
+
+        property_obj.delete()
+        self.assertFalse(property_index.filter(Property.objects.all(), 'مستودع').exists())
+
+    def test_property_list_query(self):
+        create_property(self.owner, title='فيلا مع مسبح')
+        create_property(self.owner, title='شقة صغيرة')
+        response = self.client.get(reverse('properties:property_list'), {'q': 'مسبح'})
+        self.assertEqual(response.context['sort'], 'relevance')
+        self.assertEqual([p.title for p in response.context['page_obj']], ['فيلا مع مسبح'])
+
+    def test_admin_changelist_search(self):
+        create_property(self.owner, title='فيلا مع مسبح')
+        admin = User.objects.create_superuser('admin', password='admin123')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:properties_property_changelist'), {'q': 'مسبح'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+def small_image(name='photo.png'):
+    return SimpleUploadedFile(name, PNG_BYTES, content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MainImageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+
+    def test_main_image_pointer_follows_images(self):
+        property_obj = create_property(self.owner)
+        first = PropertyImage.objects.create(property=property_obj, image=small_image())
+        property_obj.refresh_from_db()
+        self.assertEqual(property_obj.main_image, first)
+
+        main = PropertyImage.objects.create(property=property_obj, image=small_image(), is_main=True)
+        property_obj.refresh_from_db()
+        self.assertEqual(property_obj.main_image, main)
+
+        main.delete()
+        property_obj.refresh_from_db()
+        self.assertEqual(property_obj.main_image, first)
+
+    def assertConstantQueries(self, url, add_property):
+        add_property()
+        cache.clear()
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        for _ in range(3):
+            add_property()
+        cache.clear()
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+        self.assertEqual(len(few), len(many))
+        self.assertGreater(len(few), 0)
+
+    def add_property_with_images(self):
+        property_obj = create_property(self.owner)
+        PropertyImage.objects.create(property=property_obj, image=small_image())
+        PropertyImage.objects.create(property=property_obj, image=small_image(), is_main=True)
+        return property_obj
+
+    def test_listing_pages_render_in_constant_queries(self):
+        self.assertConstantQueries(reverse('properties:home'), self.add_property_with_images)
+        self.assertConstantQueries(reverse('properties:property_list'), self.add_property_with_images)
+        self.client.force_login(self.owner)
+        self.assertConstantQueries(reverse('properties:my_properties'), self.add_property_with_images)
+
+    def test_property_detail_renders_in_constant_queries(self):
+        property_obj = self.add_property_with_images()
+        url = reverse('properties:property_detail', args=[property_obj.pk])
+
+        def add_image():
+            PropertyImage.objects.create(property=property_obj, image=small_image())
+
+        self.assertConstantQueries(url, add_image)
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self):
+        return {(f.dimension, f.value): f.count for f in PropertyFacet.objects.filter(count__gt=0)}
+
+    def test_counts_follow_saves_transitions_and_deletes(self):
+        villa = create_property(self.owner, property_type='villa', city='جدة', price=Decimal('6000'))
+        create_property(self.owner, property_type='villa', city='جده', price=Decimal('1500'))
+        create_property(self.owner, property_type='shop', is_approved=False)
+        self.assertEqual(self.counts(), {
+            ('type', 'villa'): 2, ('city', 'جده'): 2, ('price', '5000-10000'): 1, ('price', '0-2000'): 1,
+        })
+
+        villa.status = 'rented'
+        villa.save()
+        self.assertEqual(self.counts()[('type', 'villa')], 1)
+
+        villa = Property.objects.get(pk=villa.pk)
+        villa.status = 'available'
+        villa.city = 'الرياض'
+        villa.save()
+        self.assertEqual(self.counts()[('city', 'الرياض')], 1)
+        self.assertEqual(self.counts()[('city', 'جده')], 1)
+
+        villa.delete()
+        expected = self.counts()
+        facets.rebuild()
+        self.assertEqual(self.counts(), expected)
+
+    def test_property_list_serves_facets(self):
+        create_property(self.owner, property_type='villa')
+        create_property(self.owner, property_type='shop')
+        response = self.client.get(reverse('properties:property_list'), {'type': 'villa'})
+        page_facets = response.context['facets']
+        self.assertEqual(page_facets['total'], 2)
+        selected = [facet.value for facet in page_facets['type'] if facet.selected]
+        self.assertEqual(selected, ['villa'])
+
+
+class FeaturedCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_home_is_served_from_cache_until_properties_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_property(self.owner, title='فيلا أولى')
+        self.assertContains(self.client.get(reverse('properties:home')), 'فيلا أولى')
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('properties:home'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_property(self.owner, title='فيلا ثانية')
+        self.assertContains(self.client.get(reverse('properties:home')), 'فيلا ثانية')
+
+    def test_listing_cached_by_normalized_params(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_property(self.owner, title='شقة أولى', city='الرياض')
+        url = reverse('properties:property_list')
+        self.assertContains(self.client.get(url, {'city': 'الرياض'}), 'شقة أولى')
+        # الفلتر نفسه بصيغة مختلفة ومعامل لا يؤثر في النتيجة يصيبان المفتاح نفسه
+        self.assertEqual(listing_key({'city': ' الرياض ', 'utm_source': 'x'}), listing_key({'city': 'الرياض'}))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'city': ' الرياض ', 'utm_source': 'x'})
+        self.assertFalse([q for q in queries.captured_queries if 'FROM "properties_property"' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_property(self.owner, title='شقة ثانية', city='الرياض')
+        self.assertContains(self.client.get(url, {'city': 'الرياض'}), 'شقة ثانية')
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.reset_stats()
+
+    def test_reads_fall_back_to_shared_tier(self):
+        cache.set('key', 'value', None)
+        self.assertEqual(caches['shared'].get('key'), 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        # عملية أخرى لا تملك القيمة في L1
+        caches['local'].clear()
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(caches['local'].get('key'), 'value')
+        self.assertIsNone(cache.get('missing'))
+        counts = tiered_cache.stats()
+        self.assertEqual((counts['l1_hits'], counts['l2_hits'], counts['misses']), (1, 1, 1))
+
+        User.objects.create_user('staff', password='password123', is_staff=True)
+        self.client.login(username='staff', password='password123')
+        self.assertEqual(self.client.get(reverse('admin_panel:cache_stats')).json()['l2_hits'], 1)
+
+    def test_stampede_computes_once(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'expensive'
+
+        results = []
+        workers = [threading.Thread(target=lambda: results.append(cache.get_or_set('slow', build, 60))) for _ in range(6)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(results, ['expensive'] * 6)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(tiered_cache.stats()['stampede_waits'], 5)
+
+    def test_file_lock_is_exclusive(self):
+        backend = caches['default']
+        self.assertTrue(backend._acquire('key:lock', None))
+        self.assertTrue(Path(backend._lock_file('key:lock', None)).exists())
+        self.assertTrue(backend._locked('key:lock', None))
+        self.assertFalse(backend._acquire('key:lock', None))
+        backend._release('key:lock', None)
+        self.assertFalse(backend._locked('key:lock', None))
+        self.assertTrue(backend._acquire('key:lock', None))
+        backend._release('key:lock', None)
+
+    def test_namespace_versions(self):
+        version = get_version('test')
+        self.assertEqual(get_version('test'), version)
+        bump_version('test')
+        self.assertGreater(get_version('test'), version)
+
+
+class ConditionalDetailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        cls.property = create_property(cls.owner)
+
+    def test_not_modified_before_rendering(self):
+        url = reverse('properties:property_detail', args=[self.property.pk])
+        response = self.client.get(url)
+        self.assertIn('public', response['Cache-Control'])
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with self.assertNumQueries(1), self.assertTemplateNotUsed('properties/property_detail.html'):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        self.property.price = Decimal('3000.00')
+        self.property.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_other_listings_keep_validators(self):
+        url = reverse('properties:property_detail', args=[self.property.pk])
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_property(self.owner, title='شقة أخرى')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_validator_depends_on_viewer(self):
+        url = reverse('properties:property_detail', args=[self.property.pk])
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.client.force_login(self.owner)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertFalse(response.has_header('Last-Modified'))
+        # عميل يتحقق بالوقت وحده بعد الدخول يحصل على صفحته لا على نسخة الزائر
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_DERIVATIVES_ASYNC=False)
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_derivatives_generated_and_used_in_srcset(self):
+        owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        property_obj = create_property(owner)
+        image = PropertyImage.objects.create(property=property_obj, image=small_image())
+        self.assertTrue(thumbnails.has_derivatives(image.image.name))
+        for rendition, _ in thumbnails.RENDITIONS:
+            for fmt, _ in thumbnails.FORMATS:
+                self.assertTrue(default_storage.exists(thumbnails.derivative_name(image.image.name, rendition, fmt)))
+
+        html = thumbnails.picture_html(image.image, 'alt')
+        self.assertIn('image/webp', html)
+        self.assertIn('320w', html)
+
+    def test_derivatives_keep_the_source_extension(self):
+        names = {
+            thumbnails.derivative_name(name, rendition, fmt)
+            for name in ('properties/foo.jpg', 'properties/foo.png')
+            for rendition, _ in thumbnails.RENDITIONS
+            for fmt, _ in thumbnails.FORMATS
+        }
+        self.assertEqual(len(names), 2 * len(thumbnails.RENDITIONS) * len(thumbnails.FORMATS))
+        self.assertEqual(thumbnails.derivative_name('properties/foo.png', 'thumb', 'jpeg'), 'derivatives/thumb/properties/foo.png.jpg')
+
+    def test_falls_back_to_original(self):
+        with override_settings(IMAGE_DERIVATIVES_ASYNC=True):
+            owner = User.objects.create_user('owner', password='password123', user_type='owner')
+            image = PropertyImage.objects.create(property=create_property(owner), image=small_image())
+        html = thumbnails.picture_html(image.image, 'alt')
+        self.assertNotIn('srcset', html)
+        self.assertIn(image.image.url, html)
+
+    def test_finished_derivatives_refresh_featured_fragment(self):
+        with override_settings(IMAGE_DERIVATIVES_ASYNC=True):
+            owner = User.objects.create_user('owner', password='password123', user_type='owner')
+            image = PropertyImage.objects.create(property=create_property(owner), image=small_image())
+        self.assertFalse(thumbnails.has_derivatives(image.image.name))
+        thumbnails.render_derivatives(default_storage.path(''), image.image.name)
+        # النتيجة السلبية محفوظة لفترة قصيرة فلا يُفحص التخزين في كل عرض
+        self.assertFalse(thumbnails.has_derivatives(image.image.name))
+
+        version = get_version(FEATURED_NAMESPACE)
+        future = Future()
+        future.set_result(image.image.name)
+        thumbnails._mark_ready(future)
+        self.assertTrue(thumbnails.has_derivatives(image.image.name))
+        self.assertNotEqual(get_version(FEATURED_NAMESPACE), version)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_DERIVATIVES_ASYNC=True, PROPERTY_REQUEST_MAX_IMAGES=25)
+class PropertyRequestUploadTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        self.client.login(username='owner', password='password123')
+        self.data = {
+            'title': 'شقة للإيجار', 'description': 'وصف', 'property_type': 'apartment',
+            'address': 'شارع', 'city': 'الرياض', 'area': 100, 'bedrooms': 2, 'bathrooms': 1, 'price': 3000,
+        }
+
+    def test_images_saved_with_one_bulk_insert(self):
+        images = {f'image_{index}': small_image(f'photo{index}.png') for index in range(22)}
+        images['image_22'] = SimpleUploadedFile('notes.txt', b'not an image', content_type='image/png')
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        # request_started يفرغ سجل الاستعلامات، لذلك تُلتقط مباشرة
+        with connection.execute_wrapper(record):
+            response = self.client.post(
+                reverse('properties:add_property_request'), {**self.data, **images, 'is_main_3': 'on'},
+            )
+        self.assertRedirects(response, reverse('properties:my_requests'))
+
+        property_request = PropertyRequest.objects.get()
+        saved = list(property_request.images.order_by('id'))
+        self.assertEqual(len(saved), 22)
+        self.assertEqual([image.pk for image in saved if image.is_main], [saved[3].pk])
+        inserts = [sql for sql in statements if sql.startswith('INSERT INTO "properties_propertyrequestimage"')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_oversized_and_extra_images_rejected(self):
+        with override_settings(PROPERTY_REQUEST_MAX_IMAGE_SIZE=len(PNG_BYTES) - 1):
+            self.client.post(reverse('properties:add_property_request'), {**self.data, 'image_0': small_image()})
+        self.assertFalse(PropertyRequestImage.objects.exists())
+
+        images = {f'image_{index}': small_image(f'photo{index}.png') for index in range(27)}
+        self.client.post(reverse('properties:add_property_request'), {**self.data, **images})
+        self.assertEqual(PropertyRequestImage.objects.count(), 25)
+
+    def test_main_image_follows_its_slot(self):
+        # الخانة 0 مرفوضة والخانة 1 فارغة، فالرئيسية هي صورة الخانة 3 لا ثالث صورة مقبولة
+        self.client.post(reverse('properties:add_property_request'), {
+            **self.data,
+            'image_0': SimpleUploadedFile('notes.txt', b'not an image', content_type='image/png'),
+            'image_1': BytesIO(),  # خانة بلا ملف كما يرسلها المتصفح
+            'image_2': small_image('second.png'),
+            'image_3': small_image('main.png'),
+            'is_main_3': 'on',
+        })
+        main = PropertyRequestImage.objects.get(is_main=True)
+        self.assertIn('main', main.image.name)
+        self.assertEqual(PropertyRequestImage.objects.count(), 2)
+
+    def test_csrf_still_enforced(self):
+        self.client.handler.enforce_csrf_checks = True
+        response = self.client.post(reverse('properties:add_property_request'), self.data)
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_DERIVATIVES_ASYNC=True)
+class ApprovePropertyRequestTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        self.property_request = PropertyRequest.objects.create(
+            owner=self.owner, title='شقة', description='وصف', property_type='apartment',
+            address='شارع', city='جدة', area=90, price=2500,
+        )
+        for index in range(3):
+            PropertyRequestImage.objects.create(
+                property_request=self.property_request, image=small_image(), is_main=index == 1,
+            )
+
+    def test_creates_property_with_images(self):
+        with CaptureQueriesContext(connection) as queries:
+            property_obj, created = services.approve_property_request(self.property_request.pk)
+        self.assertTrue(created)
+        image_inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "properties_propertyimage"')]
+        self.assertEqual(len(image_inserts), 1)
+        self.property_request.refresh_from_db()
+        self.assertEqual(self.property_request.status, 'approved')
+        self.assertEqual(self.property_request.property, property_obj)
+        self.assertEqual(property_obj.images.count(), 3)
+        self.assertTrue(property_obj.main_image.is_main)
+
+    def test_second_call_is_noop(self):
+        property_obj, _ = services.approve_property_request(self.property_request.pk)
+        again, created = services.approve_property_request(self.property_request.pk)
+        self.assertFalse(created)
+        self.assertEqual(again, property_obj)
+        self.assertEqual(Property.objects.count(), 1)
+        self.assertEqual(PropertyImage.objects.count(), 3)
+
+    def test_admin_panel_view_uses_service(self):
+        User.objects.create_user('staff', password='password123', is_staff=True)
+        self.client.login(username='staff', password='password123')
+        url = reverse('admin_panel:approve_property_request', args=[self.property_request.pk])
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(Property.objects.filter(source_request=self.property_request).count(), 1)
+
+
+class RentalAvailabilityTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        self.client_user = User.objects.create_user('client', password='password123', user_type='client')
+        self.booked = create_property(self.owner, title='محجوز')
+        self.free = create_property(self.owner, title='متاح')
+        self.rental = self.rent(self.booked, datetime.date(2026, 1, 1), 3, status='approved')
+
+    def rent(self, property_obj, start, months, status='pending'):
+        return RentalRequest.objects.create(
+            client=self.client_user, property=property_obj, message='-',
+            preferred_start_date=start, duration_months=months, status=status,
+        )
+
+    def test_end_date_and_add_months(self):
+        self.assertEqual(self.rental.end_date, datetime.date(2026, 4, 1))
+        self.assertEqual(add_months(datetime.date(2028, 1, 31), 1), datetime.date(2028, 2, 29))
+        self.assertEqual(add_months(datetime.date(2026, 11, 15), 14), datetime.date(2028, 1, 15))
+
+    def test_conflicts(self):
+        self.assertTrue(has_conflict(self.booked.pk, datetime.date(2026, 3, 31), datetime.date(2026, 5, 1)))
+        self.assertFalse(has_conflict(self.booked.pk, datetime.date(2026, 4, 1), datetime.date(2026, 5, 1)))
+        self.assertFalse(has_conflict(self.booked.pk, datetime.date(2025, 12, 1), datetime.date(2026, 1, 1)))
+        self.assertFalse(has_conflict(self.free.pk, datetime.date(2026, 2, 1), datetime.date(2026, 3, 1)))
+
+    def test_conflicts_with_overlapping_approvals(self):
+        # تداخل أُدخل بالحفظ المباشر دون المرور بالتحقق
+        self.rent(self.free, datetime.date(2027, 1, 1), 12, status='approved')
+        self.rent(self.free, datetime.date(2027, 3, 1), 1, status='approved')
+        self.assertTrue(has_conflict(self.free.pk, datetime.date(2027, 5, 1), datetime.date(2027, 6, 1)))
+        params = {'available_from': '2027-05-01', 'available_to': '2027-06-01'}
+        self.assertNotIn(self.free, filter_properties(available_properties(), params))
+
+    def test_clean_rejects_overlapping_approval(self):
+        rental = self.rent(self.booked, datetime.date(2026, 2, 1), 1)
+        rental.full_clean()
+        rental.status = 'approved'
+        with self.assertRaises(ValidationError):
+            rental.full_clean()
+        rental.preferred_start_date = datetime.date(2026, 4, 1)
+        rental.full_clean()
+
+    def test_conflict_lookup_uses_interval_index(self):
+        plan = overlapping(self.booked.pk, datetime.date(2026, 3, 1), datetime.date(2026, 5, 1)).explain()
+        self.assertIn('rental_period_idx', plan)
+        params = {'available_from': '2026-02-01', 'available_to': '2026-02-15'}
+        self.assertIn('rental_period_idx', filter_properties(available_properties(), params).explain())
+        self.assertIn('rental_period_idx', annotate_conflicts(RentalRequest.objects.all()).explain())
+
+    def test_rent_request_rejects_overlap(self):
+        self.client.login(username='client', password='password123')
+        url = reverse('properties:rent_request', args=[self.booked.pk])
+        data = {'message': 'مرحبا', 'preferred_start_date': '2026-02-01', 'duration_months': 1}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        response = self.client.post(url, {**data, 'preferred_start_date': '2026-04-01'})
+        self.assertRedirects(response, reverse('properties:my_requests'))
+
+    def test_available_filter(self):
+        params = {'available_from': '2026-02-01', 'available_to': '2026-02-15'}
+        self.assertEqual(list(filter_properties(available_properties(), params)), [self.free])
+        params = {'available_from': '2026-04-01'}
+        self.assertEqual(set(filter_properties(available_properties(), params)), {self.free, self.booked})
+
+    def test_invalid_available_date_is_ignored(self):
+        params = {'available_from': '2026-02-30'}
+        self.assertEqual(set(filter_properties(available_properties(), params)), {self.free, self.booked})
+        params = {'available_from': '2026-02-01', 'available_to': '2026-13-01'}
+        self.assertEqual(list(filter_properties(available_properties(), params)), [self.free])
+        response = self.client.get(reverse('properties:property_list'), {'available_from': '2026-02-30'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_rent_request_rejects_out_of_range_duration(self):
+        self.client.login(username='client', password='password123')
+        url = reverse('properties:rent_request', args=[self.free.pk])
+        data = {'message': 'مرحبا', 'preferred_start_date': '2026-02-01'}
+        for months in (0, MAX_RENTAL_MONTHS + 1, 999999999):
+            response = self.client.post(url, {**data, 'duration_months': months})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('duration_months', response.context['form'].errors)
+        self.assertFalse(RentalRequest.objects.filter(property=self.free).exists())
+
+    def test_approval_skips_conflicts(self):
+        first = self.rent(self.free, datetime.date(2026, 1, 1), 2)
+        overlapping = self.rent(self.free, datetime.date(2026, 2, 1), 2)
+        against_existing = self.rent(self.booked, datetime.date(2026, 2, 1), 1)
+        results = services.approve_rental_requests(ids=[first.pk, overlapping.pk, against_existing.pk])
+        self.assertEqual(results, {first.pk: 'approved', overlapping.pk: 'conflict', against_existing.pk: 'conflict'})
+
+
+class ActivityFeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='password123', user_type='owner')
+        other = User.objects.create_user('other', password='password123', user_type='owner')
+        client_user = User.objects.create_user('client', password='password123', user_type='client')
+        own_property = create_property(self.user)
+        other_property = create_property(other)
+        PropertyRequest.objects.bulk_create([
+            PropertyRequest(
+                owner=self.user, title=f'عقار {index}', description='وصف', property_type='apartment',
+                address='شارع', city='الرياض', area=100, price=3000,
+            )
+            for index in range(7)
+        ])
+        RentalRequest.objects.bulk_create(
+            [
+                RentalRequest(
+                    client=self.user, property=other_property, property_owner=other, message='-',
+                    preferred_start_date=datetime.date(2026, 1, 1), duration_months=1,
+                )
+                for _ in range(6)
+            ] + [
+                RentalRequest(
+                    client=client_user, property=own_property, property_owner=self.user, message='-',
+                    preferred_start_date=datetime.date(2026, 1, 1), duration_months=1, status='approved',
+                )
+                for _ in range(5)
+            ]
+        )
+        # نصف الطلبات بالوقت نفسه لاختبار ترتيب التعادل بين المصادر
+        tie = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        PropertyRequest.objects.filter(pk__in=list(PropertyRequest.objects.values_list('pk', flat=True))[:3]).update(created_at=tie)
+        RentalRequest.objects.filter(pk__in=list(RentalRequest.objects.values_list('pk', flat=True))[::2]).update(created_at=tie)
+
+    def test_pages_merge_sources_in_order(self):
+        seen, cursor = [], None
+        while True:
+            with self.assertNumQueries(3):
+                page = get_feed_page(self.user, per_page=4, cursor=cursor)
+                [item.obj.property for item in page if item.kind != 'property']
+            seen.extend(page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        keys = [item.sort_key() for item in seen]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        self.assertEqual(len(set((item.kind, item.obj.pk) for item in seen)), 18)
+        self.assertEqual([item.kind for item in get_feed_page(self.user, kinds=['inquiry'])], ['inquiry'] * 5)
+
+    def test_inquiry_page_uses_owner_index(self):
+        plan = feed_sources(self.user)['inquiry'].order_by('-created_at', '-id')[:21].explain()
+        self.assertIn('rentalrequest_owner_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_property_owner_follows_saves(self):
+        new_owner = User.objects.create_user('new-owner', password='password123', user_type='owner')
+        RentalRequest.objects.filter(client=self.user).update(property_owner=None)
+        rental = RentalRequest.objects.filter(client=self.user).first()
+        rental.save()
+        rental.refresh_from_db()
+        self.assertEqual(rental.property_owner, rental.property.owner)
+
+        own_property = Property.objects.get(owner=self.user)
+        own_property.owner = new_owner
+        own_property.save()
+        self.assertEqual(feed_counts(self.user)['inquiry'], 0)
+        self.assertEqual(feed_counts(new_owner)['inquiry'], 5)
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            counts = feed_counts(self.user)
+        self.assertEqual(
+            counts,
+            {'total': 18, 'pending': 13, 'approved': 5, 'rejected': 0, 'completed': 0, 'property': 7, 'rental': 6, 'inquiry': 5},
+        )
+
+    def test_view(self):
+        self.client.login(username='owner', password='password123')
+        response = self.client.get(reverse('properties:my_requests'), {'kind': 'rental'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['feed']), 6)
+        self.assertEqual(response.context['counts']['total'], 18)
+        self.assertEqual(self.client.get(reverse('properties:my_requests'), {'cursor': 'bad'}).status_code, 200)
+
+
+class ProductionSQLiteTests(unittest.TestCase):
+    """كتابات متزامنة على ملف قاعدة بيانات بإعدادات الإنتاج (core.settings_production)"""
+
+    def database_path(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return Path(directory.name) / 'stress.sqlite3'
+
+    def run_writers(self, options, threads, rounds, sync_after_read=False):
+        handler = ConnectionHandler({
+            'default': {**settings_production.DATABASES['default'], 'NAME': self.database_path(), 'CONN_MAX_AGE': 0, 'OPTIONS': options},
+        })
+        with handler['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE booking (id INTEGER PRIMARY KEY, slot INTEGER)')
+        barrier = threading.Barrier(threads)
+        errors = []
+
+        def writer():
+            # قراءة ثم كتابة في المعاملة نفسها، كما في rent_request وقبول الطلبات
+            connection = handler['default']
+            for slot in range(rounds):
+                if not sync_after_read:
+                    barrier.wait()
+                connection.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT COUNT(*) FROM booking WHERE slot = %s', [slot])
+                        if sync_after_read:
+                            barrier.wait()
+                        cursor.execute('INSERT INTO booking (slot) VALUES (%s)', [slot])
+                    connection.commit()
+                except OperationalError as exc:
+                    errors.append(str(exc))
+                    connection.rollback()
+                finally:
+                    connection.set_autocommit(True)
+            connection.close()
+
+        workers = [threading.Thread(target=writer) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        with handler['default'].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM booking')
+            written = cursor.fetchone()[0]
+        handler.close_all()
+        return written, errors
+
+    def test_default_connection_fails_upgrading_read_to_write(self):
+        written, errors = self.run_writers({}, threads=2, rounds=1, sync_after_read=True)
+        self.assertEqual((written, len(errors)), (1, 1))
+        self.assertIn('database is locked', errors[0])
+
+    def test_concurrent_writers_do_not_lock(self):
+        options = settings_production.DATABASES['default']['OPTIONS']
+        written, errors = self.run_writers(options, threads=8, rounds=25)
+        self.assertEqual(errors, [])
+        self.assertEqual(written, 8 * 25)
+
+    def test_pragmas_applied(self):
+        handler = ConnectionHandler({'default': {
+            **settings_production.DATABASES['default'], 'NAME': self.database_path(),
+        }})
+        with handler['default'].cursor() as cursor:
+            values = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'temp_store'):
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+        handler.close_all()
+        self.assertEqual(values, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 20000, 'temp_store': 2})
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def routed_view(self):
+        router = PrimaryReplicaRouter()
+
+        @replica_reads
+        def view(request):
+            return {'property': router.db_for_read(Property), 'user': router.db_for_read(User), 'write': router.db_for_write(Property)}
+        return view
+
+    def test_public_reads_go_to_replica(self):
+        factory = RequestFactory()
+        view = self.routed_view()
+        self.assertEqual(view(factory.get('/')), {'property': 'replica', 'user': 'default', 'write': 'default'})
+        self.assertEqual(view(factory.post('/'))['property'], 'default')
+        pinned = factory.get('/')
+        pinned.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(view(pinned)['property'], 'default')
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(view(factory.get('/'))['property'], 'default')
+        # خارج الصفحات المغلفة تبقى القراءة على الرئيسية
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Property), 'default')
+
+    def test_featured_properties_read_from_primary(self):
+        # تُحفظ بلا مدة، فلا تُقرأ من نسخة قد تكون متأخرة عن الإبطال
+        view = replica_reads(lambda request: (featured_queryset().db, available_properties().db))
+        self.assertEqual(view(RequestFactory().get('/')), ('default', 'replica'))
+
+    def test_writes_pin_browser_to_primary(self):
+        User.objects.create_user('client', password='password123')
+        response = self.client.get(reverse('users:login'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        response = self.client.post(reverse('users:login'), {'username': 'client', 'password': 'password123'})
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+
+    def test_replication_stand_in(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        primary, replica = Path(directory.name) / 'primary.sqlite3', Path(directory.name) / 'replica.sqlite3'
+        with closing(sqlite3.connect(primary)) as source:
+            source.executescript('PRAGMA journal_mode=WAL; CREATE TABLE item (id INTEGER PRIMARY KEY); INSERT INTO item DEFAULT VALUES;')
+            copy_database(primary, replica)
+            with closing(sqlite3.connect(replica)) as reader:
+                self.assertEqual(reader.execute('SELECT COUNT(*) FROM item').fetchone(), (1,))
+                with source:
+                    source.execute('INSERT INTO item DEFAULT VALUES')
+                copy_database(primary, replica)
+                # الاتصال المفتوح على النسخة يرى البيانات الجديدة
+                self.assertEqual(reader.execute('SELECT COUNT(*) FROM item').fetchone(), (2,))
+
+
+class AsyncPublicViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        cls.villa = create_property(owner, title='فيلا الياسمين', property_type='villa')
+        create_property(owner, title='فيلا النرجس', property_type='villa')
+        create_property(owner, title='شقة بعيدة', city='جدة')
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, path, headers=None):
+        request = AsyncRequestFactory().get(path, headers=headers)
+        request.user = AnonymousUser()
+
+        async def auser():
+            return request.user
+        request.auser = auser
+        return request
+
+    async def test_list_page_and_facets(self):
+        response = await async_views.property_list(self.request('/properties/?type=villa'))
+        self.assertContains(response, 'فيلا الياسمين')
+        self.assertNotContains(response, 'شقة بعيدة')
+        self.assertContains(response, 'جدة')  # عدادات المدن في الفلاتر
+
+        home = await async_views.home(self.request('/'))
+        self.assertContains(home, 'فيلا النرجس')
+
+    async def test_detail_and_conditional_get(self):
+        response = await async_views.property_detail(self.request(f'/property/{self.villa.pk}/'), pk=self.villa.pk)
+        self.assertContains(response, 'فيلا الياسمين')
+        self.assertIn('public', response['Cache-Control'])
+
+        request = self.request(f'/property/{self.villa.pk}/', {'If-None-Match': response['ETag']})
+        self.assertEqual((await async_views.property_detail(request, pk=self.villa.pk)).status_code, 304)
+        with self.assertRaises(Http404):
+            await async_views.property_detail(self.request('/property/0/'), pk=0)
+
+
+class GenerateSampleDataTests(TestCase):
+    def test_generates_related_rows_once(self):
+        call_command('generate_sample_data', scale=30, seed=3, stdout=StringIO())
+        self.assertEqual(Property.objects.count(), 30)
+        self.assertEqual((PropertyRequest.objects.count(), RentalRequest.objects.count()), (6, 15))
+        self.assertTrue(User.objects.get(username=generate_sample_data.STAFF_USERNAME).check_password('password123'))
+        self.assertFalse(Property.objects.exclude(main_image__property=F('pk')).exists())
+        occupied = RentalRequest.objects.filter(OCCUPYING).values('property').annotate(rentals=Count('pk'))
+        self.assertFalse(occupied.filter(rentals__gt=1).exists())
+        self.assertTrue(PropertyFacet.objects.exists())
+
+        call_command('generate_sample_data', scale=30, seed=3, stdout=StringIO())
+        self.assertEqual(Property.objects.count(), 30)
+
+    @mock.patch.object(generate_sample_data, 'SHARD_SIZE', 10)
+    def test_shards_are_deterministic_and_disjoint(self):
+        bases = {model: 1 for model in generate_sample_data.SHARD_MODELS}
+
+        def build(shard, seed=5):
+            return generate_sample_data.build_shard(shard, 25, seed, bases, owners=[1, 2], clients=[3])
+
+        def rows(shard_rows):
+            return [(p.pk, p.title, p.price, p.main_image_id) for p in shard_rows[Property]]
+
+        self.assertEqual(rows(build(0)), rows(build(0)))
+        self.assertNotEqual(rows(build(0)), rows(build(0, seed=6)))
+        # تواريخ الإيجار من --epoch لا من تاريخ التشغيل
+        starts = [rental.preferred_start_date for rental in build(0)[RentalRequest]]
+        shifted = generate_sample_data.build_shard(
+            0, 25, 5, bases, owners=[1, 2], clients=[3], epoch=generate_sample_data.EPOCH + datetime.timedelta(days=10),
+        )
+        self.assertEqual([rental.preferred_start_date - datetime.timedelta(days=10) for rental in shifted[RentalRequest]], starts)
+        shards = [build(shard) for shard in range(3)]
+        for model in generate_sample_data.SHARD_MODELS:
+            pks = [obj.pk for shard in shards for obj in shard[model]]
+            self.assertEqual(len(pks), len(set(pks)))
+        self.assertEqual(sum(len(shard[Property]) for shard in shards), 25)
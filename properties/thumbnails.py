@@ -0,0 +1,163 @@
+"""
+نسخ مصغرة من الصور المرفوعة (مقاسات ثابتة بصيغتي JPEG وWebP) تُولَّد
+في مجموعة عمليات منفصلة بعد الرفع، بعيداً عن مسار الطلب.
+لا يستورد هذا الملف النماذج حتى تبقى عمليات التوليد خفيفة.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.html import format_html
+
+logger = logging.getLogger(__name__)
+
+# مدة تذكر أن صورة ليس لها نسخ بعد، حتى لا يُفحص التخزين في كل عرض
+MISSING_TIMEOUT = 30
+
+# اسم المقاس وعرضه الأقصى بالبكسل
+RENDITIONS = (
+    ('thumb', 320),
+    ('medium', 960),
+)
+FORMATS = (
+    ('jpeg', 'jpg'),
+    ('webp', 'webp'),
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def derivative_name(name, rendition, fmt):
+    # الامتداد الأصلي جزء من الاسم، فلا تتشارك foo.jpg وfoo.png النسخ نفسها
+    return f'derivatives/{rendition}/{name}.{dict(FORMATS)[fmt]}'
+
+
+def render_derivatives(media_root, name):
+    """توليد كل المقاسات والصيغ لصورة واحدة (يعمل داخل عملية التوليد)"""
+    from PIL import Image, ImageOps
+
+    with Image.open(os.path.join(media_root, name)) as original:
+        image = ImageOps.exif_transpose(original)
+        for rendition, width in RENDITIONS:
+            resized = image.copy()
+            resized.thumbnail((width, width * 4))
+            for fmt, _ in FORMATS:
+                target = os.path.join(media_root, derivative_name(name, rendition, fmt))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                converted = resized.convert('RGB') if fmt == 'jpeg' else resized.convert('RGBA')
+                # الكتابة إلى ملف مؤقت ثم إعادة التسمية حتى لا تُعرض صورة ناقصة
+                temporary = f'{target}.{os.getpid()}.tmp'
+                converted.save(temporary, format=fmt.upper(), quality=82, optimize=True)
+                os.replace(temporary, target)
+    return name
+
+
+def _ready_key(name):
+    # مبني على مسار آخر نسخة، فيتغير المفتاح إذا تغير تخطيط المسارات
+    return f'image-derivatives:{derivative_name(name, RENDITIONS[-1][0], FORMATS[-1][0])}'
+
+
+def has_derivatives(name):
+    """هل اكتمل توليد النسخ المصغرة؟ (آخر ملف يُكتب هو آخر مقاس بآخر صيغة)"""
+    if not name:
+        return False
+    ready = cache.get(_ready_key(name))
+    if ready is not None:
+        return ready
+    last_rendition, last_format = RENDITIONS[-1][0], FORMATS[-1][0]
+    ready = default_storage.exists(derivative_name(name, last_rendition, last_format))
+    cache.set(_ready_key(name), ready, None if ready else MISSING_TIMEOUT)
+    return ready
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def _media_root():
+    try:
+        return default_storage.path('')
+    except NotImplementedError:
+        return None
+
+
+def _finished(name):
+    """تسجيل اكتمال النسخ وإبطال جزء الصفحة الرئيسية الذي عُرض بالصورة الأصلية"""
+    from .cache import FEATURED_NAMESPACE, bump_version
+
+    cache.set(_ready_key(name), True, None)
+    bump_version(FEATURED_NAMESPACE)
+
+
+def _mark_ready(future):
+    try:
+        _finished(future.result())
+    except Exception:
+        logger.exception('فشل توليد النسخ المصغرة')
+
+
+def submit(names, force=False):
+    """إرسال الصور إلى مجموعة العمليات وإرجاع قائمة المهام"""
+    media_root = _media_root()
+    if media_root is None:
+        return []
+    futures = []
+    for name in names:
+        if name and (force or not has_derivatives(name)):
+            future = get_executor().submit(render_derivatives, media_root, name)
+            future.add_done_callback(_mark_ready)
+            futures.append(future)
+    return futures
+
+
+def schedule(*names):
+    """جدولة التوليد بعد حفظ المعاملة؛ متزامن إذا عُطّل IMAGE_DERIVATIVES_ASYNC"""
+    names = [name for name in names if name]
+    if not names:
+        return
+    if getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+        transaction.on_commit(lambda: submit(names))
+        return
+
+    media_root = _media_root()
+    for name in names:
+        if media_root is not None and not has_derivatives(name):
+            try:
+                _finished(render_derivatives(media_root, name))
+            except Exception:
+                logger.exception('فشل توليد النسخ المصغرة')
+
+
+def srcset(name, fmt):
+    return ', '.join(
+        f'{default_storage.url(derivative_name(name, rendition, fmt))} {width}w'
+        for rendition, width in RENDITIONS
+    )
+
+
+def picture_html(field_file, alt='', css_class='', sizes='100vw'):
+    """وسم <picture> بنسخ WebP وJPEG، أو الصورة الأصلية إذا لم تكتمل النسخ بعد"""
+    if not field_file:
+        return ''
+    if not has_derivatives(field_file.name):
+        return format_html('<img src="{}" class="{}" alt="{}" loading="lazy">', field_file.url, css_class, alt)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" class="{}" alt="{}" loading="lazy"></picture>',
+        srcset(field_file.name, 'webp'), sizes,
+        field_file.url, srcset(field_file.name, 'jpeg'), sizes, css_class, alt,
+    )
@@ -0,0 +1,95 @@
+"""
+سجل انتقالات حالة الطلبات. داخل recording() تُجمع الانتقالات في الذاكرة
+وتُكتب بإدخال واحد عند انتهاء العملية، ومنفذ التغيير يؤخذ من السياق نفسه.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+
+from .models import PropertyRequest, RentalRequest, RequestTransition
+
+REQUEST_TYPES = {
+    PropertyRequest: 'property',
+    RentalRequest: 'rental',
+}
+CITY_FIELDS = {
+    PropertyRequest: 'city',
+    RentalRequest: 'property__city',
+}
+DECISION_STATUSES = ('approved', 'rejected')
+
+_recording = ContextVar('request_transitions', default=None)
+
+
+class Recording:
+    def __init__(self, actor):
+        self.actor = actor
+        self.transitions = []
+
+    def flush(self):
+        RequestTransition.objects.bulk_create(self.transitions, batch_size=500)
+        self.transitions = []
+
+
+@contextmanager
+def recording(actor=None):
+    """تجميع الانتقالات حتى نهاية الكتلة؛ الكتل المتداخلة تشارك الكتلة الخارجية"""
+    current = _recording.get()
+    if current is not None:
+        yield current
+        return
+    current = Recording(actor)
+    token = _recording.set(current)
+    try:
+        yield current
+    finally:
+        _recording.reset(token)
+    current.flush()
+
+
+def record(model, rows, to_status):
+    """تسجيل انتقالات؛ كل صف (المعرّف، الحالة السابقة، تاريخ إنشاء الطلب، المدينة)"""
+    now = timezone.now()
+    current = _recording.get()
+    transitions = [
+        RequestTransition(
+            request_type=REQUEST_TYPES[model], request_id=pk, actor=current.actor if current else None,
+            from_status=from_status, to_status=to_status, city=city or '',
+            latency=now - created_at, created_at=now,
+        )
+        for pk, from_status, created_at, city in rows
+        if from_status != to_status
+    ]
+    if current is not None:
+        current.transitions.extend(transitions)
+    elif transitions:
+        RequestTransition.objects.bulk_create(transitions, batch_size=500)
+
+
+def record_changes(model, changes, to_status):
+    """تسجيل انتقالات عملية جماعية؛ changes هي {المعرّف: الحالة السابقة}"""
+    rows = model.objects.filter(pk__in=list(changes)).values_list('pk', 'created_at', CITY_FIELDS[model])
+    record(model, [(pk, changes[pk], created_at, city) for pk, created_at, city in rows], to_status)
+
+
+def decision_stats(group_by, since=None):
+    """
+    زمن اتخاذ القرار (من الانتظار إلى القبول أو الرفض) مجمّعاً حسب الموظف (actor)
+    أو المدينة (city)، لتخطيط قدرة فريق المراجعة.
+    """
+    field = {'actor': 'actor__username', 'city': 'city'}[group_by]
+    transitions = RequestTransition.objects.filter(from_status='pending', to_status__in=DECISION_STATUSES)
+    if since is not None:
+        transitions = transitions.filter(created_at__gte=since)
+    return list(
+        transitions.values(field)
+        .annotate(
+            decisions=Count('pk'),
+            approved=Count('pk', filter=Q(to_status='approved')),
+            avg_latency=Avg('latency'),
+            max_latency=Max('latency'),
+        )
+        .order_by('-decisions', field)
+    )
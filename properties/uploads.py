@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+# حقول الصور image_0 وimage_1 ...؛ رقم الخانة يربط الصورة بمربع is_main_N الخاص بها
+IMAGE_FIELD_PREFIX = 'image_'
+
+# البصمات المقبولة في بداية الملف
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',  # JPEG
+    b'\x89PNG\r\n\x1a\n',  # PNG
+    b'GIF87a',
+    b'GIF89a',
+)
+
+
+def is_image_header(data):
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return True
+    return data.startswith(IMAGE_SIGNATURES)
+
+
+def image_slot(field_name, prefix=IMAGE_FIELD_PREFIX):
+    """رقم الخانة من اسم الحقل (image_N)، أو None إذا لم يكن حقل صورة"""
+    number = field_name[len(prefix):]
+    if field_name.startswith(prefix) and number.isdigit():
+        return int(number)
+    return None
+
+
+class BoundedImageUploadHandler(FileUploadHandler):
+    """
+    يكتب صور حقول الخانات (image_N) على القرص دفعةً دفعة دون تحميل الملف كاملاً في الذاكرة،
+    ويرفض الملف مبكراً إذا تجاوز الحجم أو العدد أو لم تكن بدايته صورة.
+    الملفات المرفوضة تُسجل في rejected لعرضها للمستخدم.
+    """
+
+    def __init__(self, request=None, field_prefix=IMAGE_FIELD_PREFIX, max_size=None, max_count=None):
+        super().__init__(request)
+        self.field_prefix = field_prefix
+        self.max_size = max_size or settings.PROPERTY_REQUEST_MAX_IMAGE_SIZE
+        self.max_count = max_count or settings.PROPERTY_REQUEST_MAX_IMAGES
+        self.accepted = 0
+        self.rejected = []
+
+    def _reject(self, reason):
+        self.rejected.append((self.file_name, reason))
+        raise SkipFile()
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        # الملف السابق سُلّم للطلب ولا يجب أن يغلقه المحلل عند تخطي هذا الملف
+        self.__dict__.pop('file', None)
+        if image_slot(field_name, self.field_prefix) is None:
+            raise SkipFile()
+        if self.accepted >= self.max_count:
+            self._reject('تم تجاوز الحد الأقصى لعدد الصور')
+        if content_length and content_length > self.max_size:
+            self._reject('حجم الصورة أكبر من المسموح')
+        self.size = 0
+        self.file = TemporaryUploadedFile(file_name, content_type, 0, charset, content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not is_image_header(raw_data):
+            self._reject('الملف ليس صورة مدعومة')
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self._reject('حجم الصورة أكبر من المسموح')
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not file_size:
+            self.file.close()
+            del self.file
+            return None
+        self.accepted += 1
+        file = self.file
+        del self.file
+        file.seek(0)
+        file.size = file_size
+        return file
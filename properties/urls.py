@@ -1,12 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'properties'
 
+# الصفحات العامة غير المتزامنة لخادم ASGI
+public_views = async_views if getattr(settings, 'ASYNC_PUBLIC_VIEWS', False) else views
+
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('properties/', views.property_list, name='property_list'),
-    path('property/<int:pk>/', views.property_detail, name='property_detail'),
+    path('', public_views.home, name='home'),
+    path('properties/', public_views.property_list, name='property_list'),
+    path('property/<int:pk>/', public_views.property_detail, name='property_detail'),
     path('rent-request/<int:property_id>/', views.rent_request, name='rent_request'),
     path('add-property-request/', views.add_property_request, name='add_property_request'),
     path('my-requests/', views.my_requests, name='my_requests'),
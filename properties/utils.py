@@ -0,0 +1,53 @@
+import calendar
+import re
+
+from django.utils.dateparse import parse_date
+
+# التشكيل والتطويل
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+
+ARABIC_LETTER_VARIANTS = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+    'ئ': 'ي',
+    'ى': 'ي',
+    'ة': 'ه',
+})
+
+
+def normalize_arabic(text):
+    """توحيد النص العربي للبحث والفهرسة: حذف التشكيل وتوحيد أشكال الحروف"""
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS.sub('', text.casefold())
+    text = text.translate(ARABIC_LETTER_VARIANTS)
+    return ' '.join(text.split())
+
+
+def city_key(text):
+    """
+    مفتاح المدينة للبحث بالبادئة: النص الموحد بلا أداة التعريف في أول كل كلمة،
+    فيطابق "رياض" مدينة "الرياض" وتطابق "مكه" مدينة "مكة المكرمة".
+    """
+    return ' '.join(
+        word[2:] if word.startswith('ال') and len(word) > 3 else word
+        for word in normalize_arabic(text).split()
+    )
+
+
+def add_months(date, months):
+    """إضافة عدد من الأشهر مع تقليص اليوم لآخر أيام الشهر عند الحاجة"""
+    month_index = date.month - 1 + months
+    year, month = date.year + month_index // 12, month_index % 12 + 1
+    return date.replace(year=year, month=month, day=min(date.day, calendar.monthrange(year, month)[1]))
+
+
+def parse_date_param(value):
+    """تاريخ من معامل في الرابط، أو None إذا كان فارغاً أو غير صالح (مثل 2026-02-30)"""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
@@ -2,52 +2,63 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from .models import Property, PropertyRequest, RentalRequest
+from django.db import transaction
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import condition
+from core.routers import replica_reads
+from .models import Property, PropertyRequestImage
 from .forms import PropertyRequestForm, RentalRequestForm
-
+from .availability import has_conflict
+from .cache import FEATURED_NAMESPACE, cached_listing, featured_properties, get_version
+from .facets import get_facets
+from .feed import FEED_KINDS, feed_counts, get_feed_page
+from .filters import LISTING_SORTS, search_listings
+from .http import property_etag, property_last_modified, shared_cache_for_anonymous
+from .pagination import CursorPage, CursorPaginator
+from .uploads import BoundedImageUploadHandler, image_slot
+from .utils import add_months
+from . import thumbnails
+
+@replica_reads
 def home(request):
     """الصفحة الرئيسية"""
-    featured_properties = Property.objects.filter(is_approved=True, status='available')[:6]
+    featured_version = get_version(FEATURED_NAMESPACE)
     context = {
-        'featured_properties': featured_properties,
+        'featured_properties': featured_properties(featured_version),
+        'featured_version': featured_version,
     }
     return render(request, 'properties/home.html', context)
 
+@replica_reads
 def property_list(request):
     """قائمة العقارات"""
-    properties = Property.objects.filter(is_approved=True, status='available')
-
-    # فلترة حسب النوع
-    property_type = request.GET.get('type')
-    if property_type:
-        properties = properties.filter(property_type=property_type)
-
-    # فلترة حسب المدينة
-    city = request.GET.get('city')
-    if city:
-        properties = properties.filter(city__icontains=city)
-
-    # فلترة حسب السعر
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-    if min_price:
-        properties = properties.filter(price__gte=min_price)
-    if max_price:
-        properties = properties.filter(price__lte=max_price)
+    properties, query, sort = search_listings(request.GET)
 
-    paginator = Paginator(properties, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # الترقيم بأرقام الصفحات اختياري عبر ?page=، والافتراضي الترقيم بالمؤشر
+    if 'page' in request.GET:
+        paginator = Paginator(properties.order_by(*LISTING_SORTS[sort]), 12)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    else:
+        paginator = CursorPaginator(properties, 12, ordering=LISTING_SORTS[sort])
+        page_obj = cached_listing(request.GET, lambda: paginator.get_page(request.GET.get('cursor')))
 
     context = {
         'page_obj': page_obj,
+        'cursor_pagination': isinstance(page_obj, CursorPage),
         'property_types': Property.PROPERTY_TYPES,
+        'facets': get_facets(request.GET),
+        'sort': sort,
+        'query': query,
     }
     return render(request, 'properties/property_list.html', context)
 
+@replica_reads
+@shared_cache_for_anonymous
+@condition(etag_func=property_etag, last_modified_func=property_last_modified)
 def property_detail(request, pk):
     """تفاصيل العقار"""
-    property_obj = get_object_or_404(Property, pk=pk, is_approved=True)
+    properties = Property.objects.select_related('owner').prefetch_related('images')
+    property_obj = get_object_or_404(properties, pk=pk, is_approved=True)
     context = {
         'property': property_obj,
     }
@@ -64,9 +75,15 @@ def rent_request(request, property_id):
             rental_request = form.save(commit=False)
             rental_request.client = request.user
             rental_request.property = property_obj
-            rental_request.save()
-            messages.success(request, 'تم إرسال طلب الإيجار بنجاح!')
-            return redirect('properties:my_requests')
+            start = rental_request.preferred_start_date
+            if has_conflict(property_obj.pk, start, add_months(start, rental_request.duration_months)):
+                form.add_error('preferred_start_date', 'العقار محجوز في جزء من هذه الفترة، يرجى اختيار فترة أخرى')
+            else:
+                # الإشعار للمالك يُكتب في المعاملة نفسها
+                with transaction.atomic():
+                    rental_request.save()
+                messages.success(request, 'تم إرسال طلب الإيجار بنجاح!')
+                return redirect('properties:my_requests')
     else:
         form = RentalRequestForm()
 
@@ -76,15 +93,32 @@ def rent_request(request, property_id):
     }
     return render(request, 'properties/rent_request.html', context)
 
+@csrf_exempt
 @login_required
 def add_property_request(request):
     """طلب عرض عقار"""
+    # يجب تغيير معالجات الرفع قبل قراءة request.POST، لذلك يُفحص CSRF بعدها
+    request.upload_handlers = [BoundedImageUploadHandler(request)]
+    return _add_property_request(request)
+
+@csrf_protect
+def _add_property_request(request):
     if request.method == 'POST':
         form = PropertyRequestForm(request.POST, request.FILES)
+        for file_name, reason in request.upload_handlers[0].rejected:
+            messages.warning(request, f'لم تُرفع الصورة {file_name}: {reason}')
         if form.is_valid():
-            property_request = form.save(commit=False)
-            property_request.owner = request.user
-            property_request.save()
+            images = _slot_images(request.FILES)
+            with transaction.atomic():
+                property_request = form.save(commit=False)
+                property_request.owner = request.user
+                property_request.save()
+                main_slot = _main_image_slot(request.POST, images)
+                image_rows = PropertyRequestImage.objects.bulk_create([
+                    PropertyRequestImage(property_request=property_request, image=image, is_main=slot == main_slot)
+                    for slot, image in images.items()
+                ])
+                thumbnails.schedule(*[row.image.name for row in image_rows])
             messages.success(request, 'تم إرسال طلب عرض العقار بنجاح!')
             return redirect('properties:my_requests')
     else:
@@ -95,26 +129,37 @@ def add_property_request(request):
     }
     return render(request, 'properties/add_property_request.html', context)
 
+def _slot_images(files):
+    """الصور المرفوعة حسب رقم خانتها؛ الخانات الفارغة والصور المرفوضة لا تظهر"""
+    slots = {image_slot(name): files[name] for name in files}
+    return {slot: slots[slot] for slot in sorted(slot for slot in slots if slot is not None)}
+
+def _main_image_slot(data, images):
+    """خانة الصورة المختارة كرئيسية (is_main_N)، أو أول صورة إذا لم يُختر شيء"""
+    for slot in images:
+        if data.get(f'is_main_{slot}'):
+            return slot
+    return next(iter(images), None)
+
 @login_required
 def my_requests(request):
-    """طلباتي"""
-    if request.user.user_type == 'owner':
-        property_requests = PropertyRequest.objects.filter(owner=request.user).order_by('-created_at')
-        context = {
-            'property_requests': property_requests,
-        }
-    else:  # client
-        rental_requests = RentalRequest.objects.filter(client=request.user).order_by('-created_at')
-        context = {
-            'rental_requests': rental_requests,
-        }
-
+    """طلباتي: سجل موحد لكل طلبات المستخدم وطلبات الإيجار على عقاراته"""
+    kind = request.GET.get('kind')
+    kind = kind if kind in FEED_KINDS else ''
+    page_obj = get_feed_page(request.user, 20, request.GET.get('cursor'), kinds=[kind] if kind else None)
+    context = {
+        'feed': page_obj,
+        'page_obj': page_obj,
+        'counts': feed_counts(request.user),
+        'kind': kind,
+        'feed_kinds': FEED_KINDS,
+    }
     return render(request, 'properties/my_requests.html', context)
 
 @login_required
 def my_properties(request):
     """عقاراتي"""
-    properties = Property.objects.filter(owner=request.user).order_by('-created_at')
+    properties = Property.objects.filter(owner=request.user).select_related('main_image').order_by('-created_at')
     context = {
         'properties': properties,
     }
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from .models import Notification, User
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -13,3 +13,10 @@ class CustomUserAdmin(UserAdmin):
             'fields': ('user_type', 'phone', 'address', 'profile_image', 'is_verified')
         }),
     )
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    list_select_related = ('recipient',)
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at')
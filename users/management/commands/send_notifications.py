@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users import notifications
+
+
+class Command(BaseCommand):
+    help = 'إرسال الإشعارات المستحقة من صندوق الصادر على دفعات مع إعادة المحاولة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'NOTIFICATION_BATCH_SIZE', 100))
+        parser.add_argument(
+            '--concurrency', type=int, default=getattr(settings, 'NOTIFICATION_CONCURRENCY', 4),
+            help='أقصى عدد رسائل تُرسل في الوقت نفسه',
+        )
+        parser.add_argument('--max-attempts', type=int, default=getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5))
+        parser.add_argument('--loop', action='store_true', help='الاستمرار في العمل وفحص الطابور دورياً')
+        parser.add_argument('--interval', type=float, default=5, help='ثوانٍ بين كل فحص في وضع --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, retried, failed = notifications.drain(
+                options['batch_size'], options['concurrency'], options['max_attempts'],
+            )
+            if sent or retried or failed or not options['loop']:
+                self.stdout.write(f'أُرسلت {sent}، وأُجّلت {retried}، وفشلت {failed}')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
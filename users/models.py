@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 class User(AbstractUser):
     USER_TYPES = (
@@ -18,3 +19,34 @@ class User(AbstractUser):
 
     def __str__(self):
         return f"{self.username} - {self.get_user_type_display()}"
+
+
+class Notification(models.Model):
+    """رسالة في صندوق الصادر: تُكتب في معاملة التغيير نفسها وتُرسل لاحقاً بالأمر send_notifications"""
+    STATUS_CHOICES = (
+        ('pending', 'في الانتظار'),
+        ('sending', 'قيد الإرسال'),
+        ('sent', 'أُرسلت'),
+        ('failed', 'فشلت'),
+    )
+
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # موعد المحاولة التالية، أو نهاية مهلة الحجز أثناء الإرسال
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} - {self.recipient.username}"
+
+    class Meta:
+        verbose_name = "إشعار"
+        verbose_name_plural = "الإشعارات"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx'),
+        ]
@@ -0,0 +1,113 @@
+"""
+صندوق صادر للإشعارات: تُكتب الرسالة في قاعدة البيانات ضمن معاملة التغيير نفسها،
+ويرسلها الأمر send_notifications خارج مسار الطلب على دفعات، مع حد للتوازي
+وإعادة المحاولة بتأخير متضاعف.
+"""
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Notification
+
+# مدة حجز الدفعة للعامل؛ بعدها تعود الرسائل العالقة للطابور إذا توقف العامل
+CLAIM_LEASE = datetime.timedelta(minutes=5)
+
+
+def notify(recipient, subject, body):
+    """إضافة إشعار لمستخدم (يُحفظ مع معاملة المستدعي)"""
+    return Notification.objects.create(recipient=recipient, subject=subject, body=body)
+
+
+def notify_many(messages):
+    """إضافة عدة إشعارات بإدخال واحد؛ كل عنصر (معرّف المستلم، العنوان، النص)"""
+    return Notification.objects.bulk_create(
+        [Notification(recipient_id=recipient_id, subject=subject, body=body) for recipient_id, subject, body in messages],
+        batch_size=500,
+    )
+
+
+def retry_delay(attempts):
+    """التأخير قبل المحاولة التالية: يتضاعف مع كل فشل حتى حد أقصى"""
+    base = getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 60)
+    limit = getattr(settings, 'NOTIFICATION_RETRY_MAX_SECONDS', 3600)
+    return datetime.timedelta(seconds=min(base * 2 ** (attempts - 1), limit))
+
+
+def claim(batch_size, max_attempts=5):
+    """
+    حجز دفعة من الرسائل المستحقة لهذا العامل. المحاولة تُحسب عند الحجز لا بعد الإرسال،
+    فالرسالة التي توقف العامل أثناء إرسالها تبلغ max_attempts ثم تُعلّم فاشلة.
+    """
+    now = timezone.now()
+    # قيمة المهلة تميز دفعة هذا العامل عن أي عامل آخر يحجز في الوقت نفسه
+    lease_until = now + CLAIM_LEASE
+    due = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', next_attempt_at__lte=now)
+    with transaction.atomic():
+        ids = list(
+            Notification.objects.select_for_update(skip_locked=True).filter(due)
+            .order_by('next_attempt_at').values_list('pk', flat=True)[:batch_size]
+        )
+        Notification.objects.filter(pk__in=ids, status='sending', attempts__gte=max_attempts).update(
+            status='failed', last_error='توقف العامل أثناء الإرسال',
+        )
+        Notification.objects.filter(due, pk__in=ids).update(
+            status='sending', next_attempt_at=lease_until, attempts=F('attempts') + 1,
+        )
+    return list(
+        Notification.objects.filter(pk__in=ids, status='sending', next_attempt_at=lease_until)
+        .select_related('recipient')
+    )
+
+
+def deliver(notification):
+    """إرسال رسالة واحدة؛ يُرجع نص الخطأ أو None عند النجاح (لا يستخدم قاعدة البيانات)"""
+    if not notification.recipient.email:
+        return 'لا يوجد بريد إلكتروني للمستلم'
+    try:
+        send_mail(notification.subject, notification.body, None, [notification.recipient.email])
+    except Exception as exc:
+        return str(exc) or exc.__class__.__name__
+    return None
+
+
+def process(notifications, concurrency, max_attempts):
+    """إرسال دفعة بالتوازي ثم تسجيل النتائج بتحديثات جماعية"""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        errors = list(pool.map(deliver, notifications))
+
+    now = timezone.now()
+    sent, retried, failed = [], [], []
+    for notification, error in zip(notifications, errors):
+        if error is None:
+            sent.append(notification.pk)
+            continue
+        notification.last_error = error
+        if notification.attempts >= max_attempts:
+            notification.status = 'failed'
+            failed.append(notification)
+        else:
+            notification.status = 'pending'
+            notification.next_attempt_at = now + retry_delay(notification.attempts)
+            retried.append(notification)
+
+    Notification.objects.filter(pk__in=sent).update(status='sent', sent_at=now, last_error='')
+    Notification.objects.bulk_update(
+        retried + failed, ['status', 'last_error', 'next_attempt_at'], batch_size=500,
+    )
+    return len(sent), len(retried), len(failed)
+
+
+def drain(batch_size=100, concurrency=4, max_attempts=5):
+    """إرسال كل الرسائل المستحقة حالياً؛ يُرجع (المرسلة، المؤجلة، الفاشلة)"""
+    totals = [0, 0, 0]
+    while True:
+        batch = claim(batch_size, max_attempts)
+        if not batch:
+            return tuple(totals)
+        for index, count in enumerate(process(batch, concurrency, max_attempts)):
+            totals[index] += count
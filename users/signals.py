@@ -0,0 +1,57 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from properties.models import Property, RentalRequest
+from properties.signals import bulk_created, status_changed
+
+from . import stats
+
+
+def owners_of(property_ids):
+    return Property.objects.filter(pk__in=property_ids).values_list('owner_id', flat=True)
+
+
+def clients_of(property_id):
+    return RentalRequest.objects.filter(property_id=property_id).values_list('client_id', flat=True).distinct()
+
+
+def property_saving(sender, instance, **kwargs):
+    stored = instance.stored_values(('owner_id', 'price')) or {}
+    instance._stored_stats_owner = stored.get('owner_id')
+    # مجموع "المرسلة" لعملاء العقار محسوب من سعره أيضاً
+    instance._stats_price_changed = 'price' in stored and stored['price'] != instance.price
+
+
+def property_changed(sender, instance, **kwargs):
+    clients = clients_of(instance.pk) if getattr(instance, '_stats_price_changed', False) else []
+    stats.invalidate([instance.owner_id, getattr(instance, '_stored_stats_owner', None), *clients])
+
+
+def properties_bulk_created(sender, objects, **kwargs):
+    stats.invalidate(obj.owner_id for obj in objects)
+
+
+def rental_saving(sender, instance, **kwargs):
+    instance._stored_stats_values = instance.stored_values(('client_id', 'property_id')) or {}
+
+
+def rental_changed(sender, instance, **kwargs):
+    stored = getattr(instance, '_stored_stats_values', {})
+    stats.invalidate([
+        instance.client_id, stored.get('client_id'),
+        *owners_of({instance.property_id, stored.get('property_id')}),
+    ])
+
+
+def rentals_status_changed(sender, changes, status, **kwargs):
+    rows = RentalRequest.objects.filter(pk__in=list(changes)).values_list('client_id', 'property__owner_id')
+    stats.invalidate(user_id for row in rows for user_id in row)
+
+
+pre_save.connect(property_saving, sender=Property)
+post_save.connect(property_changed, sender=Property)
+post_delete.connect(property_changed, sender=Property)
+bulk_created.connect(properties_bulk_created, sender=Property)
+pre_save.connect(rental_saving, sender=RentalRequest)
+post_save.connect(rental_changed, sender=RentalRequest)
+post_delete.connect(rental_changed, sender=RentalRequest)
+status_changed.connect(rentals_status_changed, sender=RentalRequest)
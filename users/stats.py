@@ -0,0 +1,82 @@
+"""
+إحصائيات الملف الشخصي للمالك والعميل. تُحسب باستعلام تجميع واحد (UNION ALL)
+وتُحفظ في الذاكرة المؤقتة لكل مستخدم حتى تتغير عقاراته أو طلبات الإيجار المرتبطة به.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, Q, Sum, Value
+
+from properties.models import OCCUPYING, Property, RentalRequest
+
+RENTAL_STATUSES = ('pending', 'approved', 'rejected', 'completed')
+
+
+def stats_key(user_id):
+    return f'user-stats:{user_id}'
+
+
+def invalidate(user_ids):
+    """حذف الإحصائيات المحفوظة لهؤلاء المستخدمين بعد الحفظ النهائي"""
+    keys = [stats_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _rental_rows(kind, queryset):
+    return (
+        queryset.order_by().annotate(kind=Value(kind)).values('kind', 'status')
+        .annotate(
+            count=Count('pk'),
+            listed=Value(0, output_field=IntegerField()),
+            months=Sum('duration_months', filter=OCCUPYING, default=0),
+            amount=Sum(
+                F('duration_months') * F('property__price'), filter=OCCUPYING, default=Decimal(0),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+    )
+
+
+def compute(user):
+    """
+    العقارات حسب الحالة، وطلبات الإيجار الواردة والمرسلة حسب الحالة، مع أشهر
+    الإشغال وتقدير الإيراد (المدة × السعر الشهري للطلبات المقبولة والمكتملة).
+    """
+    listings = (
+        Property.objects.filter(owner=user).order_by().annotate(kind=Value('listings')).values('kind', 'status')
+        .annotate(
+            count=Count('pk'),
+            listed=Count('pk', filter=Q(is_approved=True)),
+            months=Value(0, output_field=IntegerField()),
+            amount=Value(Decimal(0), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+    )
+    rows = listings.union(
+        _rental_rows('received', RentalRequest.objects.filter(property__owner=user)),
+        _rental_rows('sent', RentalRequest.objects.filter(client=user)),
+        all=True,
+    )
+
+    stats = {
+        'listings': {'total': 0, 'approved': 0, 'awaiting_approval': 0, **dict.fromkeys(dict(Property.STATUS_CHOICES), 0)},
+        'received': {'total': 0, 'months': 0, 'amount': Decimal(0), **dict.fromkeys(RENTAL_STATUSES, 0)},
+        'sent': {'total': 0, 'months': 0, 'amount': Decimal(0), **dict.fromkeys(RENTAL_STATUSES, 0)},
+    }
+    for row in rows:
+        group = stats[row['kind']]
+        group['total'] += row['count']
+        group[row['status']] = group.get(row['status'], 0) + row['count']
+        if row['kind'] == 'listings':
+            group['approved'] += row['listed']
+            group['awaiting_approval'] += row['count'] - row['listed']
+        else:
+            group['months'] += row['months'] or 0
+            group['amount'] += Decimal(row['amount'] or 0)
+    return stats
+
+
+def user_stats(user):
+    """إحصائيات المستخدم من الذاكرة المؤقتة، وتُحسب عند أول طلب بعد الإبطال"""
+    return cache.get_or_set(stats_key(user.pk), lambda: compute(user), None)
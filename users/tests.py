@@ -1,3 +1,146 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from properties import services
+from properties.models import Property, PropertyRequest, RentalRequest
+
+from . import notifications, stats
+from .models import Notification, User
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', email='owner@example.com', password='password123', user_type='owner')
+        self.client_user = User.objects.create_user('client', email='client@example.com', password='password123')
+        self.property = Property.objects.create(
+            owner=self.owner, title='شقة', description='وصف', property_type='apartment',
+            address='شارع', city='الرياض', area=100, price=3000, is_approved=True,
+        )
+
+    def test_rental_request_and_decision_are_queued_not_sent(self):
+        rental = RentalRequest.objects.create(
+            client=self.client_user, property=self.property, message='-',
+            preferred_start_date=datetime.date(2026, 1, 1), duration_months=6,
+        )
+        services.approve_rental_requests(ids=[rental.pk])
+        self.assertEqual(
+            list(Notification.objects.order_by('pk').values_list('recipient__username', 'status')),
+            [('owner', 'pending'), ('client', 'pending')],
+        )
+        self.assertEqual(mail.outbox, [])
+
+        call_command('send_notifications', stdout=mock.MagicMock())
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['client@example.com', 'owner@example.com'])
+        self.assertFalse(Notification.objects.exclude(status='sent').exists())
+
+    def test_bulk_decision_writes_one_notification_per_request(self):
+        PropertyRequest.objects.bulk_create([
+            PropertyRequest(
+                owner=self.owner, title=f'عقار {index}', description='وصف', property_type='villa',
+                address='شارع', city='جدة', area=100, price=3000,
+            )
+            for index in range(20)
+        ])
+        services.reject_property_requests()
+        self.assertEqual(Notification.objects.filter(recipient=self.owner).count(), 20)
+        self.assertEqual(notifications.drain(batch_size=7, concurrency=3), (20, 0, 0))
+        self.assertEqual(len(mail.outbox), 20)
+
+    def test_failures_back_off_then_give_up(self):
+        notification = notifications.notify(self.owner, 'عنوان', 'نص')
+        with mock.patch('users.notifications.send_mail', side_effect=OSError('smtp down')):
+            self.assertEqual(notifications.drain(max_attempts=2), (0, 1, 0))
+            notification.refresh_from_db()
+            self.assertEqual((notification.status, notification.attempts), ('pending', 1))
+            self.assertGreater(notification.next_attempt_at, timezone.now() + datetime.timedelta(seconds=50))
+            # لم يحن موعد المحاولة التالية بعد
+            self.assertEqual(notifications.drain(max_attempts=2), (0, 0, 0))
+
+            Notification.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(notifications.drain(max_attempts=2), (0, 0, 1))
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.last_error), ('failed', 'smtp down'))
+
+    def test_expired_claims_are_retried(self):
+        notifications.notify(self.owner, 'عنوان', 'نص')
+        Notification.objects.update(status='sending', next_attempt_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(notifications.drain(), (1, 0, 0))
+
+    def test_claims_that_crash_the_worker_give_up(self):
+        notification = notifications.notify(self.owner, 'عنوان', 'نص')
+        for attempt in (1, 2):
+            self.assertEqual([item.pk for item in notifications.claim(10, max_attempts=2)], [notification.pk])
+            notification.refresh_from_db()
+            self.assertEqual((notification.status, notification.attempts), ('sending', attempt))
+            # العامل توقف قبل تسجيل النتيجة فانتهت مهلة الحجز
+            Notification.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(notifications.claim(10, max_attempts=2), [])
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'failed')
+        self.assertEqual(mail.outbox, [])
+
+
+class UserStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='password123', user_type='owner')
+        self.client_user = User.objects.create_user('client', password='password123')
+        self.property = Property.objects.create(
+            owner=self.owner, title='شقة', description='وصف', property_type='apartment',
+            address='شارع', city='الرياض', area=100, price=3000, is_approved=True,
+        )
+        Property.objects.create(
+            owner=self.owner, title='محل', description='وصف', property_type='shop',
+            address='شارع', city='الرياض', area=50, price=1000, status='maintenance',
+        )
+
+    def rent(self, start, months, **kwargs):
+        return RentalRequest.objects.create(
+            client=self.client_user, property=self.property, message='-',
+            preferred_start_date=start, duration_months=months, **kwargs,
+        )
+
+    def test_stats_in_one_query_and_cached(self):
+        self.rent(datetime.date(2026, 1, 1), 6, status='completed')
+        self.rent(datetime.date(2026, 7, 1), 3)
+        with self.assertNumQueries(1):
+            owner_stats = stats.user_stats(self.owner)
+        with self.assertNumQueries(0):
+            stats.user_stats(self.owner)
+        self.assertEqual(owner_stats['listings'], {
+            'total': 2, 'approved': 1, 'awaiting_approval': 1, 'available': 1, 'rented': 0, 'maintenance': 1,
+        })
+        self.assertEqual(
+            (owner_stats['received']['pending'], owner_stats['received']['months'], owner_stats['received']['amount']),
+            (1, 6, Decimal('18000')),
+        )
+        self.assertEqual(stats.user_stats(self.client_user)['sent']['total'], 2)
+
+    def test_invalidated_by_changes(self):
+        pending = self.rent(datetime.date(2026, 1, 1), 4)
+        self.assertEqual(stats.user_stats(self.owner)['received']['months'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            services.approve_rental_requests(ids=[pending.pk])
+        self.assertEqual(stats.user_stats(self.owner)['received']['months'], 4)
+        self.assertEqual(stats.user_stats(self.client_user)['sent']['approved'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.price = 2000
+            self.property.save()
+        self.assertEqual(stats.user_stats(self.owner)['received']['amount'], Decimal('8000'))
+        self.assertEqual(stats.user_stats(self.client_user)['sent']['amount'], Decimal('8000'))
+
+    def test_profile_page(self):
+        self.client.login(username='owner', password='password123')
+        response = self.client.get(reverse('users:profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats']['listings']['approved'], 1)
@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib import messages
 from .forms import UserRegistrationForm, UserProfileForm
+from .stats import user_stats
 
 def login_view(request):
     """تسجيل الدخول"""
@@ -55,18 +56,9 @@ def profile_view(request):
     else:
         form = UserProfileForm(instance=request.user)
 
-    # إحصائيات المستخدم
-    if request.user.user_type == 'owner':
-        total_properties = request.user.properties.count()
-        active_properties = request.user.properties.filter(status='approved').count()
-    else:
-        total_properties = 0
-        active_properties = 0
-
     context = {
         'form': form,
-        'total_properties': total_properties,
-        'active_properties': active_properties,
+        'stats': user_stats(request.user),
     }
     return render(request, 'users/profile.html', context)
 